@@ -0,0 +1,150 @@
+"""
+Short-lived index of audit log entries pushed by the gateway
+
+on_audit_log_entry_create delivers each moderation action as it happens;
+indexing those by (guild, action, target) lets the member ban/unban/remove
+handlers find who acted and why without paging through guild.audit_logs()
+over HTTP. The audit log event and the member event arrive in no guaranteed
+order, so a lookup briefly waits for the entry. While the event stream is
+live for the guild (moderation intent plus View Audit Log), an entry that
+still hasn't arrived means there is none: a member leaving on their own has
+no kick entry, and that common case must not cost an API call. The HTTP
+fallback is only used when the stream isn't live, or when a call site opts
+in because the action always produces an entry (bans, unbans).
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogIndex:
+    """Recent audit log entries keyed by (guild_id, action, target_id)"""
+
+    def __init__(self, ttl=120, max_entries=2000, wait=2.0, on_lookup=None, is_live=None):
+        """
+        Args:
+            ttl: Seconds an entry stays in the index
+            max_entries: Upper bound on indexed entries (oldest evicted first)
+            wait: Seconds a lookup waits for a not-yet-arrived entry
+            on_lookup: Optional callable receiving 'hit' or 'miss' for each lookup
+            is_live: Optional callable taking a guild and returning whether
+                     audit log events are being delivered for it; without
+                     it the stream is never assumed live
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait = wait
+        self._entries = OrderedDict()  # key -> (monotonic time added, entry)
+        self._waiters = {}             # key -> [futures]
+        self.on_lookup = on_lookup
+        self.is_live = is_live
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+
+    @staticmethod
+    def _key(guild_id, action, target_id):
+        return (guild_id, action, target_id)
+
+    def add(self, entry):
+        """Index an entry from on_audit_log_entry_create"""
+        target_id = getattr(entry.target, "id", None) if entry.target is not None else None
+        key = self._key(entry.guild.id, entry.action, target_id)
+        self._entries[key] = (time.monotonic(), entry)
+        self._entries.move_to_end(key)
+        self._prune()
+        for waiter in self._waiters.pop(key, ()):
+            if not waiter.done():
+                waiter.set_result(entry)
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._entries:
+            key, (added, _) = next(iter(self._entries.items()))
+            if added >= cutoff and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+
+    def _fresh(self, entry, max_age):
+        return max_age is None or datetime.now(timezone.utc) - entry.created_at <= timedelta(seconds=max_age)
+
+    def get(self, guild_id, action, target_id, max_age=None):
+        """Indexed entry or None, without waiting or fetching"""
+        self._prune()
+        found = self._entries.get(self._key(guild_id, action, target_id))
+        if found and self._fresh(found[1], max_age):
+            return found[1]
+        return None
+
+    def live(self, guild):
+        """Whether audit log events are being delivered for a guild"""
+        try:
+            return bool(self.is_live and self.is_live(guild))
+        except Exception:
+            return False
+
+    async def lookup(self, guild, action, target_id, max_age=None, fetch_on_miss=None):
+        """
+        Find the audit log entry for an action on a target
+
+        Checks the index and waits up to `wait` seconds for the gateway event.
+        On a miss it fetches the most recent entries only if fetch_on_miss
+        says so; by default that is when the event stream isn't live.
+
+        Args:
+            guild: Guild the action happened in
+            action: discord.AuditLogAction
+            target_id: ID of the affected user
+            max_age: Ignore entries older than this many seconds
+            fetch_on_miss: True to always fall back to the API on a miss,
+                           False to never, None to fetch only when not live
+
+        Returns:
+            The AuditLogEntry, or None if there is none
+        """
+        entry = self.get(guild.id, action, target_id, max_age)
+        if entry is None and self.wait:
+            key = self._key(guild.id, action, target_id)
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.setdefault(key, []).append(waiter)
+            try:
+                entry = await asyncio.wait_for(waiter, self.wait)
+            except asyncio.TimeoutError:
+                entry = None
+            finally:
+                waiters = self._waiters.get(key)
+                if waiters and waiter in waiters:
+                    waiters.remove(waiter)
+                    if not waiters:
+                        del self._waiters[key]
+            if entry is not None and not self._fresh(entry, max_age):
+                entry = None
+
+        if entry is not None:
+            self.hits += 1
+            if self.on_lookup:
+                self.on_lookup("hit")
+            return entry
+
+        self.misses += 1
+        if self.on_lookup:
+            self.on_lookup("miss")
+        if fetch_on_miss is None:
+            fetch_on_miss = not self.live(guild)
+        if not fetch_on_miss:
+            return None
+
+        # Fall back to the API
+        self.fetches += 1
+        try:
+            async for fetched in guild.audit_logs(limit=5, action=action):
+                if getattr(fetched.target, "id", None) == target_id and self._fresh(fetched, max_age):
+                    return fetched
+        except Exception as e:
+            logger.error(f"Error fetching audit log for {action}: {e}")
+        return None
@@ -0,0 +1,366 @@
+"""
+Replay recorded gateway events through the Burp bot's event handlers
+
+Reads a recording made with GATEWAY_RECORD_PATH (see gateway_recorder.py)
+and dispatches each event to the bot's handlers the way discord.py does, as
+its own task, at the recorded pace scaled by --speed. The Discord side is a
+fake API layer: channels, messages, members and interaction responses count
+each call (optionally sleeping to simulate round-trip time) instead of
+talking to Discord.
+
+Reports handler latency percentiles per event type (time to first response
+for interactions), outgoing API calls by operation and memory over the run.
+
+Usage:
+    GATEWAY_RECORD_PATH=raid.jsonl.gz python bot.py          # record in production
+    python benchmarks/gateway_replay.py raid.jsonl.gz --speed 10 --api-latency-ms 80
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot as burp  # noqa: E402
+from gateway_recorder import read_recording  # noqa: E402
+
+CHANNEL_NAMES = {
+    burp.LOGS_CHANNEL: "logs",
+    burp.WELCOME_CHANNEL: "welcome",
+    burp.VERIFICATION_CHANNEL: "verification",
+    burp.LINKS_CHANNEL: "links",
+    burp.BURP_WINNERS_CHANNEL: "winners",
+    burp.NEW_PRIZE_POOLS_CHANNEL: "new_pools",
+}
+
+
+class FakeAPI:
+    """Counts outgoing Discord API calls and simulates their latency"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+
+    async def call(self, operation):
+        self.calls[operation] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class FakeAsset:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+
+class FakeRole:
+    def __init__(self, role_id, name):
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+
+
+class FakeGuild:
+    def __init__(self, guild_id, api):
+        self.id = guild_id
+        self.api = api
+        self.roles = [FakeRole(1, burp.BURPER_ROLE_NAME)]
+        self.members = []
+
+    def get_role(self, role_id):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+    async def audit_logs(self, **kwargs):
+        await self.api.call("guild.audit_logs")
+        return
+        yield
+
+
+class FakeMember:
+    def __init__(self, user_id, guild, api, created=None, joined=None):
+        self.id = user_id
+        self.name = f"user{user_id % 100000}"
+        self.mention = f"<@{user_id}>"
+        self.bot = False
+        self.guild = guild
+        self.api = api
+        self.roles = []
+        self.display_avatar = FakeAsset()
+        self.created_at = datetime.fromtimestamp(created or time.time() - 86400 * 30, tz=timezone.utc)
+        self.joined_at = datetime.fromtimestamp(joined, tz=timezone.utc) if joined else None
+
+    def __str__(self):
+        return self.name
+
+    def get_role(self, role_id):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+    async def add_roles(self, *roles, **kwargs):
+        await self.api.call("member.add_roles")
+        self.roles.extend(roles)
+
+
+class FakeSentMessage:
+    def __init__(self, api):
+        self.api = api
+
+    async def delete(self, **kwargs):
+        await self.api.call("message.delete")
+
+    async def edit(self, **kwargs):
+        await self.api.call("message.edit")
+
+
+class FakeChannel:
+    def __init__(self, channel_id, api):
+        self.id = channel_id
+        self.api = api
+        self.name = CHANNEL_NAMES.get(channel_id, f"channel{channel_id % 1000}")
+        self.mention = f"<#{channel_id}>"
+
+    async def send(self, *args, **kwargs):
+        await self.api.call(f"channel.send:{self.name}")
+        return FakeSentMessage(self.api)
+
+
+class FakeMessage:
+    def __init__(self, entry, author, channel, guild, api, state):
+        self.id = entry.get("id") or 0
+        self.author = author
+        self.content = entry.get("content") or ""
+        self.channel = channel
+        self.guild = guild
+        self.attachments = []
+        self.api = api
+        self._state = state
+
+    async def delete(self, **kwargs):
+        await self.api.call("message.delete")
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def _respond(self, operation):
+        self.interaction.first_response.set()
+        self._done = True
+        await self.interaction.api.call(operation)
+
+    async def send_message(self, *args, **kwargs):
+        await self._respond("interaction.send_message")
+
+    async def defer(self, *args, **kwargs):
+        await self._respond("interaction.defer")
+
+    async def edit_message(self, *args, **kwargs):
+        await self._respond("interaction.edit_message")
+
+
+class FakeFollowup:
+    def __init__(self, api):
+        self.api = api
+
+    async def send(self, *args, **kwargs):
+        await self.api.call("interaction.followup")
+
+
+class FakeInteraction:
+    def __init__(self, user, guild, channel, api):
+        self.user = user
+        self.guild = guild
+        self.channel = channel
+        self.api = api
+        self.client = burp.bot
+        self.first_response = asyncio.Event()
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(api)
+
+    async def edit_original_response(self, *args, **kwargs):
+        await self.api.call("interaction.edit_original_response")
+
+
+class Replay:
+    def __init__(self, args):
+        self.args = args
+        self.api = FakeAPI(args.api_latency_ms / 1000)
+        self.guild = FakeGuild(1, self.api)
+        self.channels = {}
+        self.members = {}
+        self.latencies = defaultdict(list)
+        self.skipped = Counter()
+        self.memory_samples = []
+        self.tasks = set()
+
+    def channel(self, channel_id):
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            channel = self.channels[channel_id] = FakeChannel(channel_id, self.api)
+        return channel
+
+    def member(self, user_id, entry=None):
+        member = self.members.get(user_id)
+        if member is None:
+            entry = entry or {}
+            member = self.members[user_id] = FakeMember(user_id, self.guild, self.api, entry.get("created"), entry.get("joined"))
+        return member
+
+    def install(self):
+        """Point the bot at the fake API layer"""
+        state = burp.bot._connection
+        state.user = FakeMember(0, self.guild, self.api)
+        burp.bot.get_channel = self.channel
+
+        async def fake_http_request(route, **kwargs):
+            await self.api.call(f"http:{route.method} {route.path}")
+            return {}
+        burp._discord_http_request = fake_http_request
+
+    async def _timed(self, kind, coro):
+        start = time.perf_counter()
+        try:
+            await coro
+        except Exception as e:
+            self.skipped[f"{kind}:error:{type(e).__name__}"] += 1
+        self.latencies[kind].append(time.perf_counter() - start)
+
+    async def _timed_interaction(self, kind, interaction, coro):
+        # Interactions are judged by time to first response (Discord's 3 second deadline)
+        start = time.perf_counter()
+        handler = asyncio.ensure_future(coro)
+        waiter = asyncio.ensure_future(interaction.first_response.wait())
+        await asyncio.wait({handler, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        self.latencies[kind].append(time.perf_counter() - start)
+        waiter.cancel()
+        self.tasks.add(handler)
+        handler.add_done_callback(self.tasks.discard)
+
+    def dispatch(self, entry):
+        kind = entry["type"]
+        if kind == "message":
+            author = self.member(entry["author"])
+            author.bot = entry.get("bot", False)
+            message = FakeMessage(entry, author, self.channel(entry["channel"]), self.guild, self.api, burp.bot._connection)
+            coro = self._timed("message", burp.on_message(message))
+        elif kind == "member_join":
+            coro = self._timed("member_join", burp.on_member_join(self.member(entry["user"], entry)))
+        elif kind == "member_remove":
+            member = self.members.pop(entry["user"], None) or FakeMember(entry["user"], self.guild, self.api, joined=entry.get("joined"))
+            coro = self._timed("member_remove", burp.on_member_remove(member))
+        elif kind == "interaction":
+            coro = self.interaction(entry)
+            if coro is None:
+                return
+        else:
+            self.skipped[f"unknown:{kind}"] += 1
+            return
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def interaction(self, entry):
+        interaction = FakeInteraction(self.member(entry["user"]), self.guild, self.channel(0), self.api)
+        if entry.get("custom_id") == "verification_start_captcha":
+            view = burp.VerificationView()
+            return self._timed_interaction("interaction:verify", interaction, view.start_captcha.callback(interaction))
+        command = burp.bot.tree.get_command(entry.get("command") or "")
+        if command is None or any(param.required for param in command.parameters):
+            self.skipped[f"interaction:{entry.get('command') or entry.get('custom_id')}"] += 1
+            return None
+        return self._timed_interaction(f"interaction:/{command.name}", interaction, command.callback(interaction))
+
+    def sample_memory(self, elapsed):
+        current, peak = tracemalloc.get_traced_memory()
+        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.memory_samples.append({"t": round(elapsed, 2), "traced_kb": current / 1024, "peak_kb": peak / 1024, "max_rss_kb": rss_kb})
+
+    async def run(self, events):
+        self.install()
+        tracemalloc.start()
+        speed = self.args.speed
+        start = time.perf_counter()
+        first_t = events[0]["t"] if events else 0
+        for index, entry in enumerate(events):
+            if speed:
+                delay = start + (entry["t"] - first_t) / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)
+            self.dispatch(entry)
+            if index % self.args.memory_every == 0:
+                self.sample_memory(time.perf_counter() - start)
+
+        # Let in-flight handlers finish, then cancel anything still waiting (e.g. captcha timeouts)
+        if self.tasks:
+            await asyncio.wait(set(self.tasks), timeout=self.args.drain_timeout)
+        for task in list(self.tasks):
+            task.cancel()
+        elapsed = time.perf_counter() - start
+        self.sample_memory(elapsed)
+        tracemalloc.stop()
+        return elapsed
+
+
+def summarise(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"count": len(ordered), "p50_ms": pick(0.5) * 1000, "p95_ms": pick(0.95) * 1000,
+            "p99_ms": pick(0.99) * 1000, "max_ms": ordered[-1] * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a gateway recording through the bot's handlers")
+    parser.add_argument("recording", help="File written by GATEWAY_RECORD_PATH")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier (0 = as fast as possible)")
+    parser.add_argument("--api-latency-ms", type=float, default=0.0, help="Simulated Discord API round trip")
+    parser.add_argument("--memory-every", type=int, default=500, help="Sample memory every N events")
+    parser.add_argument("--drain-timeout", type=float, default=10.0, help="Seconds to wait for handlers after the last event")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    events = list(read_recording(args.recording))
+    replay = Replay(args)
+    elapsed = asyncio.run(replay.run(events))
+
+    report = {
+        "events": len(events),
+        "elapsed_s": elapsed,
+        "speed": args.speed,
+        "latency": {kind: summarise(samples) for kind, samples in replay.latencies.items() if samples},
+        "api_calls": dict(replay.api.calls.most_common()),
+        "skipped": dict(replay.skipped),
+        "memory": replay.memory_samples,
+    }
+
+    print(f"Replayed {len(events):,} events in {elapsed:.1f}s at {args.speed}x")
+    print(f"\n{'handler':<28} {'count':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for kind, row in sorted(report["latency"].items()):
+        print(f"{kind:<28} {row['count']:>8} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['max_ms']:>9.2f}")
+    print(f"\n{'API call':<40} {'count':>8}")
+    for operation, count in report["api_calls"].items():
+        print(f"{operation:<40} {count:>8}")
+    if replay.skipped:
+        print(f"\nSkipped: {report['skipped']}")
+    last = replay.memory_samples[-1]
+    print(f"\nMemory: traced {last['traced_kb']:.0f} KB (peak {last['peak_kb']:.0f} KB), max RSS {last['max_rss_kb'] / 1024:.0f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
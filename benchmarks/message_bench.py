@@ -0,0 +1,308 @@
+"""
+Micro-benchmarks for the per-message path of the Burp bot
+
+Drives check_spam, contains_discord_invite and the full on_message handler
+with lightweight fake discord.Message/Member objects (no gateway, no HTTP)
+and reports latency percentiles, throughput and memory growth per scenario.
+
+Usage:
+    python benchmarks/message_bench.py                      # run all scenarios
+    python benchmarks/message_bench.py --messages 20000 --rate 500
+    python benchmarks/message_bench.py --save-baseline      # store results as the baseline
+    python benchmarks/message_bench.py --compare            # compare against the baseline
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import string
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot as burp  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "message_bench.json")
+SCENARIOS = ["normal", "invite_spam", "duplicate_flood", "many_users", "mixed"]
+WORDS = ["burp", "gas", "streak", "pool", "win", "gm", "lol", "ada", "when", "moon", "mixer", "nice", "the", "is", "a"]
+
+
+class FakeUser:
+    __slots__ = ("id", "name", "bot", "mention", "roles")
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.bot = False
+        self.mention = f"<@{user_id}>"
+        self.roles = []
+
+    def __str__(self):
+        return self.name
+
+
+class FakeChannel:
+    def __init__(self, channel_id=1234):
+        self.id = channel_id
+        self.name = "general"
+        self.mention = f"<#{channel_id}>"
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+    async def delete_messages(self, messages):
+        for message in messages:
+            message.deleted = True
+
+
+class FakeMessage:
+    __slots__ = ("id", "author", "content", "channel", "guild", "attachments", "_state", "deleted")
+
+    def __init__(self, message_id, author, content, channel, state):
+        self.id = message_id
+        self.author = author
+        self.content = content
+        self.channel = channel
+        self.guild = None
+        self.attachments = []
+        self._state = state
+        self.deleted = False
+
+    async def delete(self):
+        self.deleted = True
+
+
+def _sentence(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 14)))
+
+
+def generate_messages(scenario, count, seed=1):
+    """Yield (user_id, content) pairs for a scenario"""
+    rng = random.Random(seed)
+    if scenario == "mixed":
+        # Interleave the other scenarios at random
+        streams = {name: generate_messages(name, count, seed) for name in SCENARIOS[:-1]}
+        for _ in range(count):
+            yield next(streams[rng.choice(SCENARIOS[:-1])])
+        return
+
+    for i in range(count):
+        if scenario == "normal":
+            # A few dozen regulars chatting at a human pace
+            yield rng.randint(1, 50), _sentence(rng)
+        elif scenario == "invite_spam":
+            code = "".join(rng.choices(string.ascii_letters + string.digits, k=8))
+            yield rng.randint(1, 200), f"{_sentence(rng)} join discord.gg/{code} now"
+        elif scenario == "duplicate_flood":
+            # A handful of raiders repeating the same lines
+            yield rng.randint(1, 5), rng.choice(["FREE ADA CLICK HERE", "gm gm gm", "🚀🚀🚀"])
+        elif scenario == "many_users":
+            # Every message from a different user (worst case for per-user state)
+            yield 1_000_000 + i, _sentence(rng)
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "p50_us": pick(0.50) * 1e6,
+        "p90_us": pick(0.90) * 1e6,
+        "p99_us": pick(0.99) * 1e6,
+        "max_us": ordered[-1] * 1e6,
+        "mean_us": sum(ordered) / len(ordered) * 1e6,
+    }
+
+
+def reset_state():
+    burp.user_message_history.clear()
+    gc.collect()
+
+
+def measure_memory(func, inputs):
+    """Net bytes still allocated after running func over inputs (separate, untimed pass)"""
+    reset_state()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for args in inputs:
+        func(*args)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / 1024
+
+
+def bench_sync(name, func, inputs):
+    """Time a synchronous function per call"""
+    reset_state()
+    samples = []
+    perf = time.perf_counter
+    start = perf()
+    for args in inputs:
+        t0 = perf()
+        func(*args)
+        samples.append(perf() - t0)
+    elapsed = perf() - start
+    return {
+        "target": name,
+        "count": len(samples),
+        "throughput_per_s": len(samples) / elapsed if elapsed else 0,
+        "memory_growth_kb": measure_memory(func, inputs),
+        **percentiles(samples),
+    }
+
+
+async def drive_handler(messages, rate=0, samples=None):
+    """Feed fake messages through on_message, optionally paced at `rate` messages/second"""
+    state = burp.bot._connection
+    channel = FakeChannel()
+    users = {}
+    perf = time.perf_counter
+    start = perf()
+    for i, (user_id, content) in enumerate(messages):
+        if rate:
+            delay = start + i / rate - perf()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        author = users.get(user_id)
+        if author is None:
+            author = users[user_id] = FakeUser(user_id)
+        message = FakeMessage(i, author, content, channel, state)
+        t0 = perf()
+        await burp.on_message(message)
+        if samples is not None:
+            samples.append(perf() - t0)
+    return perf() - start, channel
+
+
+async def bench_handler(messages, rate):
+    """Time the full on_message handler, then measure its memory growth in a second pass"""
+    reset_state()
+    samples = []
+    elapsed, channel = await drive_handler(messages, rate, samples)
+    tracked_users = len(burp.user_message_history)
+
+    reset_state()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    await drive_handler(messages)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {
+        "target": "on_message",
+        "count": len(samples),
+        "throughput_per_s": len(samples) / elapsed if elapsed else 0,
+        "memory_growth_kb": (after - before) / 1024,
+        "tracked_users": tracked_users,
+        "warnings_sent": channel.sent,
+        **percentiles(samples),
+    }
+
+
+async def run(args):
+    # process_commands compares against the logged-in user; give the offline bot one
+    burp.bot._connection.user = FakeUser(0)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = {}
+    for scenario in args.scenarios:
+        messages = list(generate_messages(scenario, args.messages, seed=args.seed))
+        results[scenario] = [
+            bench_sync("check_spam", burp.burp_bot.check_spam, messages),
+            bench_sync("contains_discord_invite", burp.burp_bot.contains_discord_invite, [(content,) for _, content in messages]),
+            await bench_handler(messages, args.rate),
+        ]
+    return results
+
+
+def print_results(results, baseline=None):
+    header = f"{'scenario':<16} {'target':<24} {'p50 µs':>9} {'p99 µs':>9} {'max µs':>10} {'msg/s':>11} {'mem KB':>9}"
+    print(header)
+    print("-" * len(header))
+    for scenario, rows in results.items():
+        for row in rows:
+            line = (f"{scenario:<16} {row['target']:<24} {row['p50_us']:>9.1f} {row['p99_us']:>9.1f} "
+                    f"{row['max_us']:>10.1f} {row['throughput_per_s']:>11.0f} {row['memory_growth_kb']:>9.1f}")
+            if baseline:
+                old = next((r for r in baseline.get(scenario, []) if r["target"] == row["target"]), None)
+                if old and old.get("p99_us"):
+                    line += f"   p99 {(row['p99_us'] / old['p99_us'] - 1) * 100:+.0f}% vs baseline"
+            print(line)
+
+
+def compare(results, baseline, tolerance):
+    """Return the list of (scenario, target, metric, old, new) regressions beyond tolerance"""
+    regressions = []
+    for scenario, rows in results.items():
+        for row in rows:
+            old = next((r for r in baseline.get(scenario, []) if r["target"] == row["target"]), None)
+            if not old:
+                continue
+            for metric in ("p50_us", "p99_us"):
+                if old.get(metric) and row[metric] > old[metric] * (1 + tolerance):
+                    regressions.append((scenario, row["target"], metric, old[metric], row[metric]))
+            if old.get("throughput_per_s") and row["throughput_per_s"] < old["throughput_per_s"] * (1 - tolerance):
+                regressions.append((scenario, row["target"], "throughput_per_s", old["throughput_per_s"], row["throughput_per_s"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Burp bot message path")
+    parser.add_argument("--messages", type=int, default=5000, help="Messages per scenario")
+    parser.add_argument("--rate", type=float, default=0, help="Messages per second for on_message (0 = as fast as possible)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare against the baseline and exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression when comparing")
+    parser.add_argument("--output", help="Also write results JSON to this path")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    baseline = None
+    if args.compare and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    print_results(results, baseline)
+
+    document = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"messages": args.messages, "rate": args.rate, "seed": args.seed},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    if args.compare:
+        if baseline is None:
+            print(f"No baseline at {args.baseline}; run with --save-baseline first")
+            return 0
+        regressions = compare(results, baseline, args.tolerance)
+        for scenario, target, metric, old, new in regressions:
+            print(f"REGRESSION {scenario}/{target} {metric}: {old:.1f} -> {new:.1f}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
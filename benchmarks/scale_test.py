@@ -0,0 +1,296 @@
+"""
+Scale test for the Burp bot's database queries against a local Postgres
+
+Applies burpdatabaseschema.sql to a scratch database, bulk-loads synthetic
+pools, wallets, Gas Streaks sends and Gas Mixer spins with COPY, and times
+fetch_overall_stats, fetch_gas_streaks_stats, fetch_burp_slots_stats and the
+monitor queries at several table sizes. Data is appended between sizes, so a
+run over --sizes 100000 1000000 5000000 loads 5M rows in total.
+
+Usage:
+    createdb burp_scale
+    python benchmarks/scale_test.py --dsn postgresql://localhost/burp_scale --reset \
+        --sizes 100000 1000000 5000000 --output scale.json
+
+--reset drops and recreates the public schema: only point it at a scratch database.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import asyncpg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import bot as burp  # noqa: E402
+from query_profiler import QueryProfiler, ProfiledPool  # noqa: E402
+
+SCHEMA_PATH = os.path.join(ROOT, "burpdatabaseschema.sql")
+TOKENS = ["BURP", "SNEK", "HOSKY", "NIKE", "IAG", "MIN", "WMT", "DJED"]
+ADDRESS_CHARS = "023456789acdefghjklmnpqrstuvwxyz"
+COPY_BATCH = 50000
+
+
+def load_schema(path=SCHEMA_PATH):
+    """
+    Return the schema as runnable SQL
+
+    The export contains table constraints that Postgres rejects (names starting
+    with a digit, UNIQUE column lists exported character by character). NOT NULL
+    is already on the columns and every UNIQUE constraint is recreated by the
+    CREATE UNIQUE INDEX statements at the end, so those lines are dropped.
+    """
+    with open(path) as f:
+        sql = f.read()
+    sql = re.sub(r"^\s*CONSTRAINT .*$\n", "", sql, flags=re.MULTILINE)
+    sql = re.sub(r",(\s*\n\);)", r"\1", sql)
+    return sql
+
+
+def wallet_address(rng):
+    return "addr1q" + "".join(rng.choices(ADDRESS_CHARS, k=97))
+
+
+class Generator:
+    """Produces deterministic synthetic rows, continuing from the last loaded id"""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.start = datetime.utcnow() - timedelta(days=args.days)
+        self.span = args.days * 86400
+        self.pool_ids = [f"{token.lower()}_pool" for token in TOKENS[:args.pools]]
+        self.pool_ids[0] = "burp_default"
+        self.wallets = [wallet_address(self.rng) for _ in range(args.wallets)]
+
+    def timestamp(self, fraction):
+        # Rows are generated in id order, so created_at increases with id (plus jitter)
+        return self.start + timedelta(seconds=fraction * self.span + self.rng.uniform(-60, 60))
+
+    def pools(self):
+        for order, pool_id in enumerate(self.pool_ids, start=1):
+            token = TOKENS[order - 1]
+            yield (order, pool_id, f"{token} Pool", token, token, "00" * 28, token.encode().hex(), True, order,
+                   self.start - timedelta(days=1))
+
+    def prize_pools(self):
+        for index, pool_id in enumerate(self.pool_ids, start=1):
+            yield (index, pool_id, Decimal(self.rng.randint(1000, 500000)))
+
+    def streak_users(self):
+        for index, wallet in enumerate(self.wallets, start=1):
+            yield (index, wallet, self.rng.randint(0, 50), self.start)
+
+    def gas_streaks(self, first_id, last_id, total):
+        for row_id in range(first_id, last_id + 1):
+            user_index = self.rng.randrange(len(self.wallets))
+            won = self.rng.random() < self.args.win_rate
+            # Heavily skewed towards the default pool, like production
+            pool_id = self.pool_ids[0] if self.rng.random() < 0.7 else self.rng.choice(self.pool_ids)
+            yield (row_id, user_index + 1, pool_id, self.wallets[user_index], f"{row_id:064x}",
+                   self.rng.randint(1, 40), Decimal(1), Decimal(self.rng.randint(1, 100)) / 1000, won,
+                   Decimal(self.rng.randint(1000, 2_000_000) if won else 0), self.timestamp(row_id / total))
+
+    def slots_users(self):
+        for index, wallet in enumerate(self.wallets, start=1):
+            yield (index, wallet, self.start)
+
+    def slots_spins(self, first_id, last_id, total):
+        for row_id in range(first_id, last_id + 1):
+            bet = self.rng.choice([10, 25, 50, 100, 250, 1000])
+            payout = bet * self.rng.choice([1, 2, 3, 5, 10, 25, 100]) if self.rng.random() < self.args.slots_win_rate else 0
+            yield (row_id, self.rng.choice(self.wallets), bet, '["burp","burp","gas"]', payout,
+                   int(time.time()), self.timestamp(row_id / total), f"s{row_id:063x}")
+
+    def jackpots(self, first_id, last_id, total):
+        for row_id in range(first_id, last_id + 1):
+            bet = self.rng.choice([100, 250, 1000])
+            multiplier = self.rng.choice([100, 250, 500])
+            yield (row_id, self.rng.choice(self.wallets), '["burp","burp","burp"]', bet * multiplier, bet,
+                   multiplier, self.timestamp(row_id / total))
+
+    def topups(self, first_id, last_id, prefix):
+        for row_id in range(first_id, last_id + 1):
+            yield (row_id, self.rng.choice(self.wallets), self.rng.randint(100, 100000), f"{prefix}{row_id:063x}",
+                   int(time.time()), self.start)
+
+
+async def copy_rows(conn, table, columns, records):
+    """COPY records into a table in bounded batches"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= COPY_BATCH:
+            await conn.copy_records_to_table(table, records=batch, columns=columns)
+            batch.clear()
+    if batch:
+        await conn.copy_records_to_table(table, records=batch, columns=columns)
+
+
+async def max_id(conn, table):
+    return await conn.fetchval(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+
+
+async def load_static(conn, gen):
+    """Pools and wallets, loaded once"""
+    if await conn.fetchval("SELECT COUNT(*) FROM gas_admin_settings"):
+        return
+    await copy_rows(conn, "gas_admin_settings",
+                    ["id", "pool_id", "pool_name", "prize_token_name", "prize_token_symbol", "burp_policy_id",
+                     "burp_token_name_hex", "is_active", "pool_order", "created_at"], gen.pools())
+    await copy_rows(conn, "gas_streak_prize_pool", ["id", "pool_id", "total_amount"], gen.prize_pools())
+    await copy_rows(conn, "gas_streak_users", ["id", "wallet_address", "total_streaks_sent", "created_at"], gen.streak_users())
+    await copy_rows(conn, "burp_slots_users", ["id", "wallet_address", "created_at"], gen.slots_users())
+
+
+async def grow_to(conn, gen, size, final_size):
+    """Append rows until the event tables hold `size` rows"""
+    started = time.perf_counter()
+
+    first = await max_id(conn, "gas_streaks") + 1
+    await copy_rows(conn, "gas_streaks",
+                    ["id", "streak_user_id", "pool_id", "wallet_address", "transaction_hash", "streak_number",
+                     "burp_amount", "win_chance", "won", "prize_amount", "created_at"],
+                    gen.gas_streaks(first, size, final_size))
+
+    first = await max_id(conn, "burp_slots_spins") + 1
+    await copy_rows(conn, "burp_slots_spins",
+                    ["id", "wallet_address", "bet_amount", "symbols", "payout", "timestamp", "created_at", "transaction_hash"],
+                    gen.slots_spins(first, size, final_size))
+
+    # Jackpots and topups scale with the event tables at realistic ratios
+    first = await max_id(conn, "burp_slots_jackpots") + 1
+    await copy_rows(conn, "burp_slots_jackpots",
+                    ["id", "wallet_address", "symbols", "payout", "bet_amount", "multiplier", "created_at"],
+                    gen.jackpots(first, max(first - 1, size // 5000), final_size // 5000 or 1))
+    for table, prefix in (("gas_streak_topups", "g"), ("burp_slots_topups", "t")):
+        first = await max_id(conn, table) + 1
+        await copy_rows(conn, table, ["id", "wallet_address", "amount", "transaction_hash", "timestamp", "created_at"],
+                        gen.topups(first, max(first - 1, size // 50), prefix))
+
+    await conn.execute("ANALYZE")
+    return time.perf_counter() - started
+
+
+def summarise(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"p50_ms": pick(0.5) * 1000, "p95_ms": pick(0.95) * 1000, "max_ms": ordered[-1] * 1000}
+
+
+async def benchmark(pool, iterations):
+    """Time the bot's stats methods and monitor queries; returns {target: summary}"""
+    profiler = QueryProfiler(slow_threshold=float("inf"))
+    burp_bot = burp.BurpBot(None)
+    burp_bot.db_pool = ProfiledPool(pool, profiler)
+
+    async with pool.acquire() as conn:
+        newest_winner = await conn.fetchval("SELECT id FROM gas_streaks WHERE won = true ORDER BY created_at DESC LIMIT 1") or 0
+        newest_spin = await conn.fetchval("SELECT id FROM burp_slots_spins WHERE payout > 0 ORDER BY created_at DESC LIMIT 1") or 0
+        busiest_pool = await conn.fetchval("SELECT pool_id FROM gas_admin_settings ORDER BY pool_order LIMIT 1")
+
+    async def monitor_query(query, arg):
+        async with burp_bot.db_pool.acquire() as conn:
+            return await conn.fetch(query, arg)
+
+    targets = {
+        "fetch_overall_stats": burp_bot.fetch_overall_stats,
+        "fetch_gas_streaks_stats": burp_bot.fetch_gas_streaks_stats,
+        "fetch_gas_streaks_stats(pool)": lambda: burp_bot.fetch_gas_streaks_stats(busiest_pool),
+        "fetch_burp_slots_stats": burp_bot.fetch_burp_slots_stats,
+        "monitor_winners": lambda: monitor_query(burp.NEW_WINNERS_QUERY, newest_winner),
+        "monitor_slots_winners": lambda: monitor_query(burp.NEW_SLOTS_WINNERS_QUERY, newest_spin),
+        "monitor_new_pool_types": lambda: monitor_query(burp.NEW_POOLS_QUERY, datetime.utcnow() - timedelta(seconds=30)),
+    }
+
+    results = {}
+    for name, target in targets.items():
+        await target()  # Warm the plan cache and buffers
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            result = await target()
+            samples.append(time.perf_counter() - start)
+            if result is None:
+                raise RuntimeError(f"{name} failed; check the bot log output above")
+        results[name] = summarise(samples)
+
+    results["_slowest_statements"] = [
+        {"query": entry.fingerprint, "mean_ms": entry.mean_time * 1000, "calls": entry.calls}
+        for entry in profiler.top(5, key="mean_time")
+    ]
+    return results
+
+
+async def run(args):
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        if args.reset:
+            await conn.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public;")
+        if not await conn.fetchval("SELECT to_regclass('public.gas_streaks') IS NOT NULL"):
+            await conn.execute(load_schema())
+            print("Applied burpdatabaseschema.sql")
+
+        gen = Generator(args)
+        await load_static(conn, gen)
+
+        pool = await asyncpg.create_pool(args.dsn, min_size=1, max_size=3)
+        curves = {}
+        final_size = max(args.sizes)
+        for size in sorted(args.sizes):
+            load_seconds = await grow_to(conn, gen, size, final_size)
+            print(f"Loaded {size:,} rows per event table in {load_seconds:.1f}s, benchmarking...")
+            curves[size] = await benchmark(pool, args.iterations)
+        await pool.close()
+        return curves
+    finally:
+        await conn.close()
+
+
+def print_curves(curves):
+    sizes = list(curves)
+    targets = [name for name in curves[sizes[0]] if not name.startswith("_")]
+    print()
+    print(f"{'p50 ms / rows':<32}" + "".join(f"{size:>14,}" for size in sizes))
+    for name in targets:
+        print(f"{name:<32}" + "".join(f"{curves[size][name]['p50_ms']:>14.1f}" for size in sizes))
+    print()
+    print(f"Slowest statements at {sizes[-1]:,} rows:")
+    for entry in curves[sizes[-1]]["_slowest_statements"]:
+        print(f"  {entry['mean_ms']:>9.1f}ms  {entry['query'][:110]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load synthetic data and benchmark the bot's stats queries")
+    parser.add_argument("--dsn", default=os.environ.get("SCALE_TEST_DSN", "postgresql://localhost/burp_scale"))
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate the public schema first")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000],
+                        help="Rows in gas_streaks and burp_slots_spins at each measurement point")
+    parser.add_argument("--pools", type=int, default=4, choices=range(1, len(TOKENS) + 1))
+    parser.add_argument("--wallets", type=int, default=20000)
+    parser.add_argument("--win-rate", type=float, default=0.002, help="Fraction of Gas Streaks sends that win")
+    parser.add_argument("--slots-win-rate", type=float, default=0.3, help="Fraction of Gas Mixer spins that pay out")
+    parser.add_argument("--days", type=int, default=365, help="History span for created_at")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the latency curves as JSON")
+    args = parser.parse_args()
+
+    curves = asyncio.run(run(args))
+    print_curves(curves)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "curves": curves}, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Load test for the Burp bot's /webhook/winner and /webhook/new_pool endpoints
+
+Starts the bot's Flask webhook server in-process with the bot's event loop
+running in its own thread (as it does under bot.run), stubs the Discord
+channels, and fires concurrent POST streams at it through the real client in
+webhook_integration.py, so payloads have the production shape.
+
+Reports, per endpoint: request latency percentiles and error rate as seen by
+the client, end-to-end time from POST to the stubbed channel.send, payloads
+accepted but never delivered, the announcement backlog on the loop, and
+event-loop lag (with stacks of any stalls) for the whole run.
+
+Usage:
+    python benchmarks/webhook_load.py --concurrency 8 --rate 200 --duration 30
+    python benchmarks/webhook_load.py --rate 0 --send-latency-ms 150   # closed loop, slow Discord
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot as burp  # noqa: E402
+from loop_watchdog import LoopWatchdog  # noqa: E402
+from webhook_integration import DiscordWebhookIntegration  # noqa: E402
+
+# game_id of the announcement being sent, visible to the stub channel inside the task
+current_game_id = contextvars.ContextVar("current_game_id", default=None)
+
+
+class LagSamples(list):
+    """Histogram stand-in for LoopWatchdog that keeps every lag sample"""
+
+    def observe(self, value):
+        self.append(value)
+
+
+class StubChannel:
+    """Discord channel that records when each announcement reaches send()"""
+
+    def __init__(self, channel_id, results):
+        self.id = channel_id
+        self.results = results
+        self.mention = f"<#{channel_id}>"
+
+    async def send(self, *args, **kwargs):
+        if self.results.send_latency:
+            await asyncio.sleep(self.results.send_latency)
+        game_id = current_game_id.get()
+        if game_id is not None:
+            self.results.delivered[game_id] = time.perf_counter()
+        else:
+            self.results.other_sends[self.id] += 1
+
+
+class Results:
+    def __init__(self, send_latency):
+        self.send_latency = send_latency
+        self.lock = threading.Lock()
+        self.requests = defaultdict(list)   # endpoint -> [(latency, ok)]
+        self.sent_at = {}                   # game_id -> (endpoint, perf_counter at POST)
+        self.delivered = {}                 # game_id -> perf_counter at channel.send
+        self.other_sends = Counter()
+        self.backlog = []
+
+
+def install_stubs(results):
+    """Route the bot's channel lookups to stubs and tag each announcement task with its game_id"""
+    channels = {}
+
+    def get_channel(channel_id):
+        if channel_id not in channels:
+            channels[channel_id] = StubChannel(channel_id, results)
+        return channels[channel_id]
+
+    burp.bot.get_channel = get_channel
+
+    def traced(method):
+        async def wrapper(data):
+            current_game_id.set(data.get("game_id"))
+            return await method(data)
+        return wrapper
+
+    burp.burp_bot.send_winner_announcement = traced(burp.burp_bot.send_winner_announcement)
+    burp.burp_bot.send_new_pool_type_announcement = traced(burp.burp_bot.send_new_pool_type_announcement)
+
+
+def start_bot_loop():
+    """Run an event loop in a thread and hand it to the bot, like bot.run does"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="bot-loop", daemon=True)
+    thread.start()
+    burp.bot.loop = loop
+    return loop
+
+
+def start_webhook_server(port):
+    server = make_server("127.0.0.1", port, burp.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name="webhook-server", daemon=True)
+    thread.start()
+    return server
+
+
+def random_address(rng):
+    return "addr1q" + "".join(rng.choices("023456789acdefghjklmnpqrstuvwxyz", k=98))
+
+
+def stream(worker, args, base_url, results, stop_at):
+    """One client stream: POST announcements, paced at this stream's share of --rate"""
+    rng = random.Random(args.seed + worker)
+    client = DiscordWebhookIntegration(base_url, timeout=args.timeout, max_retries=args.max_retries)
+    interval = args.concurrency / args.rate if args.rate else 0
+    next_at = time.perf_counter()
+    sequence = 0
+    while time.perf_counter() < stop_at:
+        if interval:
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sequence += 1
+        game_id = f"load-{worker}-{sequence}"
+        start = time.perf_counter()
+        if rng.random() < args.pool_fraction:
+            endpoint = "new_pool"
+            results.sent_at[game_id] = (endpoint, start)
+            ok = client.announce_new_prize_pool(rng.choice([1000, 5000, 25000, 100000]), game_id)
+        else:
+            endpoint = "winner"
+            results.sent_at[game_id] = (endpoint, start)
+            ok = client.announce_winner(random_address(rng), rng.randint(5, 5000), rng.randint(3, 40), game_id)
+        with results.lock:
+            results.requests[endpoint].append((time.perf_counter() - start, ok))
+        if not ok:
+            results.sent_at.pop(game_id, None)
+    client.close()
+
+
+def sample_backlog(results, stop):
+    while not stop.wait(0.1):
+        results.backlog.append(burp.WEBHOOK_PENDING.get())
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {"p50_ms": pick(0.5), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": ordered[-1] * 1000}
+
+
+async def _start(watchdog):
+    # LoopWatchdog.start must run on the loop thread
+    watchdog.start()
+
+
+def run(args):
+    logging.getLogger().setLevel(logging.WARNING)
+    results = Results(args.send_latency_ms / 1000)
+    install_stubs(results)
+
+    loop = start_bot_loop()
+    lag = LagSamples()
+    watchdog = LoopWatchdog(interval=args.lag_interval, threshold=args.stall_threshold, histogram=lag)
+    asyncio.run_coroutine_threadsafe(_start(watchdog), loop).result()
+
+    server = start_webhook_server(args.port)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    stop_sampling = threading.Event()
+    sampler = threading.Thread(target=sample_backlog, args=(results, stop_sampling), daemon=True)
+    sampler.start()
+
+    stop_at = time.perf_counter() + args.duration
+    workers = [threading.Thread(target=stream, args=(i, args, base_url, results, stop_at)) for i in range(args.concurrency)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    # Give the loop time to work through the backlog before counting losses
+    drain_deadline = time.perf_counter() + args.drain_timeout
+    while burp.WEBHOOK_PENDING.get() > 0 and time.perf_counter() < drain_deadline:
+        time.sleep(0.05)
+
+    stop_sampling.set()
+    watchdog.stop()
+    server.shutdown()
+    loop.call_soon_threadsafe(loop.stop)
+    return results, lag, watchdog, elapsed
+
+
+def build_report(args, results, lag, watchdog, elapsed):
+    report = {"settings": vars(args), "elapsed_s": elapsed, "endpoints": {}}
+    end_to_end = defaultdict(list)
+    undelivered = Counter()
+    for game_id, (endpoint, sent) in list(results.sent_at.items()):
+        delivered = results.delivered.get(game_id)
+        if delivered is None:
+            undelivered[endpoint] += 1
+        else:
+            end_to_end[endpoint].append(delivered - sent)
+
+    for endpoint, rows in sorted(results.requests.items()):
+        errors = sum(1 for _, ok in rows if not ok)
+        report["endpoints"][endpoint] = {
+            "requests": len(rows),
+            "requests_per_s": len(rows) / elapsed if elapsed else 0,
+            "error_rate": errors / len(rows) if rows else 0,
+            "request_latency": percentiles([latency for latency, _ in rows]),
+            "end_to_end": percentiles(end_to_end[endpoint]),
+            "accepted_not_delivered": undelivered[endpoint],
+        }
+    report["backlog_max"] = max(results.backlog, default=0)
+    report["loop_lag"] = {**percentiles(lag), "samples": len(lag)}
+    report["stalls"] = [
+        {"blocked_ms": stall.blocked_for * 1000,
+         "location": f"{stall.location.filename}:{stall.location.lineno} in {stall.location.name}" if stall.location else None}
+        for stall in watchdog.reports
+    ]
+    report["other_channel_sends"] = dict(results.other_sends)
+    return report
+
+
+def print_report(report):
+    print(f"Ran {report['elapsed_s']:.1f}s with {report['settings']['concurrency']} streams")
+    print(f"\n{'endpoint':<10} {'reqs':>7} {'req/s':>8} {'errors':>7} {'p50 ms':>8} {'p99 ms':>8} {'e2e p50':>8} {'e2e p99':>8} {'lost':>6}")
+    for endpoint, row in report["endpoints"].items():
+        latency, e2e = row["request_latency"], row["end_to_end"]
+        print(f"{endpoint:<10} {row['requests']:>7} {row['requests_per_s']:>8.1f} {row['error_rate']:>6.1%} "
+              f"{latency.get('p50_ms', 0):>8.1f} {latency.get('p99_ms', 0):>8.1f} "
+              f"{e2e.get('p50_ms', 0):>8.1f} {e2e.get('p99_ms', 0):>8.1f} {row['accepted_not_delivered']:>6}")
+    lag = report["loop_lag"]
+    print(f"\nAnnouncement backlog on the loop: max {report['backlog_max']:.0f}")
+    print(f"Event-loop lag: p50 {lag.get('p50_ms', 0):.1f}ms, p99 {lag.get('p99_ms', 0):.1f}ms, max {lag.get('max_ms', 0):.1f}ms")
+    for stall in report["stalls"]:
+        print(f"  stall {stall['blocked_ms']:.0f}ms at {stall['location']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Burp bot webhook endpoints")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent client streams")
+    parser.add_argument("--rate", type=float, default=50, help="Total target requests per second (0 = closed loop)")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds to generate load")
+    parser.add_argument("--pool-fraction", type=float, default=0.1, help="Share of requests sent to /webhook/new_pool")
+    parser.add_argument("--send-latency-ms", type=float, default=0, help="Simulated Discord channel.send latency")
+    parser.add_argument("--max-retries", type=int, default=0, help="Client retries per request (0 measures raw errors)")
+    parser.add_argument("--timeout", type=float, default=10, help="Client request timeout in seconds")
+    parser.add_argument("--port", type=int, default=0, help="Webhook server port (0 = any free port)")
+    parser.add_argument("--lag-interval", type=float, default=0.05, help="Event-loop heartbeat interval in seconds")
+    parser.add_argument("--stall-threshold", type=float, default=0.1, help="Loop lag in seconds reported as a stall")
+    parser.add_argument("--drain-timeout", type=float, default=30, help="Seconds to wait for the backlog after the run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = build_report(args, *run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
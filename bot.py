@@ -5,7 +5,7 @@ import random
 import string
 import asyncio
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import requests
 from typing import Optional
 import re
@@ -13,10 +13,45 @@ import asyncpg
 import psycopg2
 from urllib.parse import urlparse
 import glob
+import hashlib
+import io
+import json
 import time
+import weakref
+from log_setup import configure_logging
+from metrics import Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE, timed
+from query_profiler import QueryProfiler, ProfiledPool
+from loop_watchdog import LoopWatchdog
+from gateway_recorder import GatewayRecorder
+from memory_tracker import MemoryTracker, format_bytes
+from stack_sampler import StackSampler
+from tracing import Tracer
+from state_store import StateStore
+from panels import PanelManager
+from guild_counters import GuildCounters
+from audit_index import AuditLogIndex
+from message_cache import MessageCache
+from member_lookup import MemberLookup, DepartedMember
+from role_registry import RoleRegistry
+from join_aggregator import JoinAggregator
+from moderation import ModerationExecutor
+from purge_jobs import PurgeJob, PurgeJobManager
+from message_filters import MessageFilterPipeline
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Process start, for the startup time logged on first ready
+PROCESS_START = time.monotonic()
+
+# Configure logging (queued, formatted off the event loop; high-volume lines sampled)
+LOG_SAMPLING_RULES = [
+    ('__main__', 'Skipping', 20),  # Below-threshold winner notifications
+    ('werkzeug', None, 10),        # Webhook server access log
+]
+log_handler = configure_logging(
+    level=logging.INFO,
+    queue_size=int(os.environ.get('LOG_QUEUE_SIZE', 10000)),
+    json_output=os.environ.get('LOG_FORMAT', 'json') == 'json',
+    sampling_rules=LOG_SAMPLING_RULES
+)
 logger = logging.getLogger(__name__)
 
 # Bot configuration
@@ -26,7 +61,24 @@ intents.members = True
 intents.guilds = True
 intents.moderation = True  # For audit logs (bans, kicks, etc.)
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+# Presence events keep the online count live but are privileged and high volume;
+# without them the online count comes from Discord's approximate counts
+TRACK_PRESENCES = os.environ.get('TRACK_PRESENCES') == '1'
+intents.presences = TRACK_PRESENCES
+
+# Lean member cache: don't download or keep every member; fetch the few the bot needs on demand
+LEAN_MEMBER_CACHE = os.environ.get('LEAN_MEMBER_CACHE') == '1'
+
+bot = commands.Bot(
+    command_prefix='!',
+    help_command=None,  # No prefix commands; on_message skips command parsing while none are registered
+    intents=intents,
+    max_messages=None,  # Delete/edit logging uses the compact message_cache instead
+    chunk_guilds_at_startup=not LEAN_MEMBER_CACHE,
+    member_cache_flags=discord.MemberCacheFlags.none() if LEAN_MEMBER_CACHE else discord.MemberCacheFlags.from_intents(intents),
+    # Sent with every IDENTIFY, so reconnects don't need a separate presence update
+    activity=discord.Activity(type=discord.ActivityType.watching, name="The Burp Community")
+)
 
 # Channel IDs
 BURP_WINNERS_CHANNEL = 1420198836768346244
@@ -39,6 +91,51 @@ LOGS_CHANNEL = 1427883248201236540
 # Winner notification settings
 MIN_BURP_NOTIFICATION_THRESHOLD = 100000  # Minimum BURP amount to trigger winner notification
 
+# Query profiling settings
+SLOW_QUERY_THRESHOLD = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 500)) / 1000  # Seconds
+SLOW_QUERY_DIGEST_INTERVAL = 300  # Seconds between slow-query digests to the logs channel
+
+# Event-loop watchdog settings
+LOOP_LAG_THRESHOLD = float(os.environ.get('LOOP_LAG_THRESHOLD_MS', 250)) / 1000  # Seconds blocked before reporting
+LOOP_STALL_REPORT_COOLDOWN = 60  # Seconds between stall reports to the logs channel
+
+# CPU profiler settings
+PROFILE_SAMPLE_INTERVAL = 0.01  # Seconds of CPU time between stack samples
+PROFILE_MAX_SECONDS = 120  # Longest profile /profile will run
+MEMORY_SNAPSHOT_COOLDOWN = 60  # Seconds between /memory snapshots (each one copies every traced allocation)
+
+# Background task supervision
+TASK_RESTART_DELAY = 30  # Seconds before restarting a background task that crashed
+DB_CONNECT_RETRY_MIN = 5  # Seconds before the first database reconnect attempt
+DB_CONNECT_RETRY_MAX = 300  # Longest wait between database reconnect attempts
+
+# Message cache for delete/edit logs
+MESSAGE_CACHE_MAX_MESSAGES = int(os.environ.get('MESSAGE_CACHE_MAX_MESSAGES', 50000))
+MESSAGE_CACHE_MAX_BYTES = int(os.environ.get('MESSAGE_CACHE_MAX_MB', 32)) * 1024 * 1024
+
+# Guild counters
+GUILD_COUNTER_RECONCILE_INTERVAL = 3600  # Seconds between full recounts of guild members
+GUILD_COUNTER_API_RECONCILE_INTERVAL = 86400  # Seconds between member-list downloads in lean member cache mode
+
+# Join bursts: above this many joins per minute welcomes are batched
+JOIN_BURST_THRESHOLD = int(os.environ.get('JOIN_BURST_THRESHOLD', 10))
+JOIN_BATCH_MIN_WINDOW = 5  # Seconds between batched welcomes at the threshold
+JOIN_BATCH_MAX_WINDOW = 30  # Seconds between batched welcomes at the highest join rates
+
+# Purge jobs
+PURGE_MAX_MESSAGES = 10000  # Most messages one /purge will delete
+PURGE_JOBS_PER_CHANNEL = 1  # Purges allowed to run at once in one channel
+PURGE_SINGLE_DELETE_INTERVAL = 1.0  # Seconds between deletes of messages too old for bulk delete
+PURGE_PROGRESS_INTERVAL = 3  # Seconds between progress updates
+PURGE_PROGRESS_WINDOW = 14 * 60  # Seconds of progress edits (interaction tokens expire after 15 minutes)
+
+# Persistent bot state (command tree hash, panel message IDs)
+BOT_STATE_FILE = os.environ.get('BOT_STATE_FILE', 'burpbot-state.json')
+bot_state = StateStore(BOT_STATE_FILE)
+
+# Announcement tracing (spans are kept in memory; set TRACE_FILE to also write them to a rotating file)
+TRACE_FILE = os.environ.get('TRACE_FILE', '')
+
 # Role configuration
 BURPER_ROLE_NAME = "Burper"
 
@@ -65,6 +162,9 @@ SPAM_DUPLICATE_THRESHOLD = 3  # Same message repeated
 # User message tracking for spam detection
 user_message_history = {}  # {user_id: [(timestamp, message_content), ...]}
 
+# Live StatsView instances (for memory reporting)
+live_stats_views = weakref.WeakSet()
+
 # Discord invite link patterns
 DISCORD_INVITE_PATTERNS = [
     r'discord\.gg/[a-zA-Z0-9]+',
@@ -77,6 +177,110 @@ DISCORD_INVITE_PATTERNS = [
 # Compile regex patterns for better performance
 COMPILED_INVITE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in DISCORD_INVITE_PATTERNS]
 
+# Blocked words/phrases (comma separated), matched case-insensitively on word boundaries
+MESSAGE_BLOCKLIST = [word.strip() for word in os.environ.get('MESSAGE_BLOCKLIST', '').split(',') if word.strip()]
+COMPILED_BLOCKLIST = re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in MESSAGE_BLOCKLIST) + r')\b', re.IGNORECASE) if MESSAGE_BLOCKLIST else None
+
+# Metrics (exposed on the webhook server at /metrics)
+STATS_QUERY_SECONDS = Histogram('burpbot_stats_query_seconds', 'Time spent in fetch_*_stats queries', ['query'])
+MONITOR_TICK_SECONDS = Histogram('burpbot_monitor_tick_seconds', 'Duration of one database monitor iteration', ['monitor'])
+DB_POOL_ACQUIRE_SECONDS = Histogram('burpbot_db_pool_acquire_seconds', 'Time spent waiting for a database connection')
+DB_POOL_IN_USE = Gauge('burpbot_db_pool_connections_in_use', 'Database connections currently checked out')
+DB_POOL_SIZE = Gauge('burpbot_db_pool_connections', 'Database connections currently open')
+ON_MESSAGE_SECONDS = Histogram(
+    'burpbot_on_message_seconds', 'on_message handler latency',
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+)
+MESSAGE_FILTER_SECONDS = Histogram(
+    'burpbot_message_filter_seconds', 'Time spent in each on_message filter check', ['stage'],
+    buckets=(0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005)
+)
+MESSAGE_FILTER_HITS = Counter('burpbot_message_filter_hits_total', 'Messages acted on by each on_message filter', ['stage'])
+DISCORD_REQUEST_SECONDS = Histogram('burpbot_discord_request_seconds', 'Discord REST API call latency (including retries)', ['route'])
+DISCORD_RATE_LIMITED = Counter('burpbot_discord_rate_limited_total', 'Discord REST API 429 responses')
+WEBHOOK_REQUEST_SECONDS = Histogram('burpbot_webhook_request_seconds', 'Webhook HTTP request latency', ['endpoint', 'status'])
+WEBHOOK_SCHEDULED = Counter('burpbot_webhook_announcements_scheduled_total', 'Webhook announcements handed to the event loop')
+WEBHOOK_COMPLETED = Counter('burpbot_webhook_announcements_completed_total', 'Webhook announcements finished on the event loop')
+WEBHOOK_PENDING = Gauge('burpbot_webhook_announcements_pending', 'Webhook announcements waiting on the event loop')
+WEBHOOK_PENDING.set_function(lambda: WEBHOOK_SCHEDULED.get() - WEBHOOK_COMPLETED.get())
+SPAM_TRACKED_USERS = Gauge('burpbot_spam_tracked_users', 'Users with message history held for spam detection')
+SPAM_TRACKED_USERS.set_function(lambda: len(user_message_history))
+LOOP_LAG_SECONDS = Histogram(
+    'burpbot_event_loop_lag_seconds', 'Event-loop scheduling lag measured by the watchdog heartbeat',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+LOG_RECORDS_DROPPED = Gauge('burpbot_log_records_dropped', 'Log records dropped because the log queue was full')
+LOG_RECORDS_DROPPED.set_function(lambda: log_handler.dropped)
+LOG_RECORDS_SAMPLED_OUT = Gauge('burpbot_log_records_sampled_out', 'Log records suppressed by sampling rules')
+LOG_RECORDS_SAMPLED_OUT.set_function(lambda: log_handler.sampling_filter.sampled_out)
+CACHE_LOOKUPS = Counter('burpbot_cache_lookups_total', 'Cache lookups by cache and result (hit/miss)', ['cache', 'result'])
+PROCESS_RSS_BYTES = Gauge('burpbot_process_resident_memory_bytes', 'Resident memory of the bot process')
+PROCESS_RSS_BYTES.set_function(lambda: resident_memory_bytes())
+MEMBER_JOINS = Counter('burpbot_member_joins_total', 'Member joins by how they were welcomed (single/batched)', ['mode'])
+MEMBER_JOIN_RATE = Gauge('burpbot_member_joins_per_minute', 'Member joins in the last minute')
+JOIN_BURST_ACTIVE = Gauge('burpbot_join_burst_active', '1 while welcomes are being batched')
+WELCOME_BATCH_SIZE = Histogram('burpbot_welcome_batch_size', 'Members per batched welcome', buckets=(2, 5, 10, 20, 35, 50))
+MODERATION_ACTIONS = Counter('burpbot_moderation_actions_total', 'Auto-moderation actions (delete/bulk_delete/warning/warning_suppressed)', ['action'])
+MESSAGE_CACHE_BYTES = Gauge('burpbot_message_cache_bytes', 'Approximate memory held by the message cache')
+MESSAGE_CACHE_BYTES.set_function(lambda: message_cache.bytes)
+
+def resident_memory_bytes():
+    """Current resident set size (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def cached_channel(channel_id):
+    """bot.get_channel, counting hits and misses of discord.py's channel cache"""
+    channel = bot.get_channel(channel_id)
+    CACHE_LOOKUPS.labels('channel', 'hit' if channel is not None else 'miss').inc()
+    return channel
+
+# Span tracing from DB row / webhook to posted announcement
+tracer = Tracer()
+
+def seconds_since(created_at):
+    """Age of a database timestamp (naive UTC or timezone-aware)"""
+    now = datetime.now(created_at.tzinfo) if created_at.tzinfo else datetime.utcnow()
+    return (now - created_at).total_seconds()
+
+def record_announcement_posted(announcement):
+    """Record end-to-end latency once an announcement has been posted"""
+    created_at = announcement.get('created_at')
+    if created_at:
+        tracer.observe('db_insert_to_post', seconds_since(created_at))
+    span = tracer.current()
+    if span is not None and span.root.name.startswith('webhook.'):
+        tracer.observe('webhook_to_post', time.time() - span.root.start_wall)
+
+# Monitor queries (shared with benchmarks/scale_test.py)
+NEW_WINNERS_QUERY = """
+    SELECT id, wallet_address, prize_amount, created_at, transaction_hash, streak_number, pool_id
+    FROM gas_streaks 
+    WHERE won = true 
+    AND id > $1
+    ORDER BY created_at ASC
+"""
+NEW_SLOTS_WINNERS_QUERY = """
+    SELECT id, wallet_address, payout, bet_amount, created_at, transaction_hash
+    FROM burp_slots_spins 
+    WHERE payout > 0 
+    AND id > $1
+    ORDER BY created_at ASC
+"""
+NEW_POOLS_QUERY = """
+    SELECT gas.pool_id, gas.pool_name, gas.prize_token_symbol, gas.created_at,
+           gpp.total_amount
+    FROM gas_admin_settings gas
+    LEFT JOIN gas_streak_prize_pool gpp ON gas.pool_id = gpp.pool_id
+    WHERE gas.is_active = true 
+    AND gas.created_at > $1
+    ORDER BY gas.created_at ASC
+"""
+
 # Links for the links channel
 BURP_LINKS = {
     "Official Website": "https://www.burpcoin.site/",
@@ -91,12 +295,14 @@ class BurpBot:
         self.last_checked_winner_id = None
         self.last_checked_game_id = None
         self.last_checked_slots_winner_id = None  # For Gas Mixer winners
-        self.monitoring_task = None
-        self.pool_monitoring_task = None
-        self.slots_monitoring_task = None  # For Gas Mixer monitoring
+        self.tasks = {}  # Background task name -> asyncio.Task (at most one running per name)
+        self.query_profiler = QueryProfiler(slow_threshold=SLOW_QUERY_THRESHOLD)
     
     async def init_database(self):
         """Initialize database connection pool"""
+        if self.db_pool:
+            return
+        
         try:
             database_url = os.environ.get('DATABASE_URL')
             if not database_url:
@@ -106,7 +312,7 @@ class BurpBot:
             # Parse the database URL for asyncpg
             parsed = urlparse(database_url)
             
-            self.db_pool = await asyncpg.create_pool(
+            pool = await asyncpg.create_pool(
                 host=parsed.hostname,
                 port=parsed.port,
                 user=parsed.username,
@@ -116,11 +322,37 @@ class BurpBot:
                 min_size=1,
                 max_size=3
             )
+            self.db_pool = ProfiledPool(pool, self.query_profiler, on_acquire=DB_POOL_ACQUIRE_SECONDS.observe)
+            DB_POOL_SIZE.set_function(pool.get_size)
+            DB_POOL_IN_USE.set_function(lambda: pool.get_size() - pool.get_idle_size())
             logger.info("Database connection pool initialized")
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
             self.db_pool = None
     
+    async def connect_database(self):
+        """Background task: connect to the database, retrying with backoff, then start monitoring"""
+        delay = DB_CONNECT_RETRY_MIN
+        while True:
+            await self.init_database()
+            if self.db_pool or not os.environ.get('DATABASE_URL'):
+                break
+            logger.warning(f"Database unavailable, retrying in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, DB_CONNECT_RETRY_MAX)
+        
+        await self.attach_state()
+        await self.start_monitoring()
+    
+    async def attach_state(self):
+        """Keep bot_state in the database once connected (the dyno filesystem doesn't survive restarts)"""
+        if not self.db_pool or bot_state.durable:
+            return
+        try:
+            await bot_state.attach_database(self.db_pool)
+        except Exception as e:
+            logger.error(f"Failed to load bot state from the database: {e}")
+    
     async def start_monitoring(self):
         """Start monitoring database for new winners"""
         if not self.db_pool:
@@ -131,12 +363,34 @@ class BurpBot:
         await self.init_last_winner_id()
         await self.init_last_slots_winner_id()
         
-        # Start the monitoring tasks
-        self.monitoring_task = asyncio.create_task(self.monitor_winners())
-        self.pool_monitoring_task = asyncio.create_task(self.monitor_new_pool_types())
-        self.slots_monitoring_task = asyncio.create_task(self.monitor_slots_winners())
+        # Start the monitoring tasks (no-op for any that are already running)
+        self.ensure_task('monitor_winners', self.monitor_winners)
+        self.ensure_task('monitor_new_pool_types', self.monitor_new_pool_types)
+        self.ensure_task('monitor_slots_winners', self.monitor_slots_winners)
+        self.ensure_task('report_slow_queries', self.report_slow_queries)
         logger.info("Started database monitoring for new winners, new pool types, and Gas Mixer winners")
     
+    def ensure_task(self, name, factory):
+        """Start a supervised background task unless one with this name is already running"""
+        task = self.tasks.get(name)
+        if task is not None and not task.done():
+            return task
+        
+        task = asyncio.create_task(factory(), name=name)
+        task.add_done_callback(lambda finished: self._on_task_done(name, factory, finished))
+        self.tasks[name] = task
+        return task
+    
+    def _on_task_done(self, name, factory, task):
+        """Restart a background task that exited unexpectedly"""
+        if task.cancelled() or self.tasks.get(name) is not task:
+            return
+        if task.exception() is None:
+            # Returned normally: a one-shot task (e.g. connect_database) that finished its job
+            return
+        logger.error(f"Background task {name} stopped unexpectedly: {task.exception()!r}; restarting in {TASK_RESTART_DELAY}s")
+        asyncio.get_running_loop().call_later(TASK_RESTART_DELAY, self.ensure_task, name, factory)
+    
     async def init_last_winner_id(self):
         """Initialize the last checked winner ID to avoid duplicate notifications"""
         try:
@@ -173,38 +427,38 @@ class BurpBot:
     
     async def monitor_winners(self):
         """Background task to monitor for new winners"""
+        # Channels are only cached once the gateway is ready
+        await self.bot.wait_until_ready()
+        
         while True:
             try:
                 if not self.db_pool:
                     await asyncio.sleep(60)  # Wait 1 minute if no database
                     continue
                 
-                async with self.db_pool.acquire() as conn:
-                    # Check for new winners since last check
-                    if self.last_checked_winner_id:
-                        query = """
-                            SELECT id, wallet_address, prize_amount, created_at, transaction_hash, streak_number, pool_id
-                            FROM gas_streaks 
-                            WHERE won = true 
-                            AND id > $1
-                            ORDER BY created_at ASC
-                        """
-                        new_winners = await conn.fetch(query, self.last_checked_winner_id)
-                    else:
-                        # First time check - get the most recent winner
-                        query = """
-                            SELECT id, wallet_address, prize_amount, created_at, transaction_hash, streak_number, pool_id
-                            FROM gas_streaks 
-                            WHERE won = true 
-                            ORDER BY created_at DESC 
-                            LIMIT 1
-                        """
-                        new_winners = await conn.fetch(query)
-                    
-                    # Process new winners
-                    for winner in new_winners:
-                        await self.process_new_winner(winner)
-                        self.last_checked_winner_id = winner['id']
+                tick_start = time.perf_counter()
+                with tracer.span('monitor_winners.poll') as poll_span:
+                    async with self.db_pool.acquire() as conn:
+                        # Check for new winners since last check
+                        if self.last_checked_winner_id:
+                            new_winners = await conn.fetch(NEW_WINNERS_QUERY, self.last_checked_winner_id)
+                        else:
+                            # First time check - get the most recent winner
+                            query = """
+                                SELECT id, wallet_address, prize_amount, created_at, transaction_hash, streak_number, pool_id
+                                FROM gas_streaks 
+                                WHERE won = true 
+                                ORDER BY created_at DESC 
+                                LIMIT 1
+                            """
+                            new_winners = await conn.fetch(query)
+                        poll_span.set(new_winners=len(new_winners))
+                        
+                        # Process new winners
+                        for winner in new_winners:
+                            await self.process_new_winner(winner)
+                            self.last_checked_winner_id = winner['id']
+                MONITOR_TICK_SECONDS.labels('winners').observe(time.perf_counter() - tick_start)
                 
                 # Check every 30 seconds for new winners
                 await asyncio.sleep(30)
@@ -213,15 +467,20 @@ class BurpBot:
                 logger.error(f"Error in winner monitoring: {e}")
                 await asyncio.sleep(60)  # Wait longer on error
     
+    @tracer.traced('process_new_winner')
     async def process_new_winner(self, winner_row):
         """Process a new winner and send notification"""
         try:
+            tracer.current().set(winner_id=winner_row['id'], tx=winner_row['transaction_hash'], created_at=winner_row['created_at'])
+            tracer.observe('db_insert_to_detected', seconds_since(winner_row['created_at']))
+            
             # Get token symbol for this pool
-            async with self.db_pool.acquire() as conn:
-                pool_info = await conn.fetchrow(
-                    "SELECT prize_token_symbol, pool_name FROM gas_admin_settings WHERE pool_id = $1",
-                    winner_row.get('pool_id', 'burp_default')
-                )
+            with tracer.span('gas_admin_settings_lookup'):
+                async with self.db_pool.acquire() as conn:
+                    pool_info = await conn.fetchrow(
+                        "SELECT prize_token_symbol, pool_name FROM gas_admin_settings WHERE pool_id = $1",
+                        winner_row.get('pool_id', 'burp_default')
+                    )
             
             token_symbol = pool_info['prize_token_symbol'] if pool_info else 'TOKENS'
             pool_name = pool_info['pool_name'] if pool_info else 'Unknown Pool'
@@ -240,7 +499,8 @@ class BurpBot:
                 'streak_length': str(winner_row['streak_number']),
                 'token_symbol': token_symbol,
                 'pool_name': pool_name,
-                'pool_id': winner_row.get('pool_id', 'burp_default')
+                'pool_id': winner_row.get('pool_id', 'burp_default'),
+                'created_at': winner_row['created_at']
             }
             
             logger.info(f"New winner detected: {winner_data['winner_address']} won {winner_data['prize_amount']} {token_symbol} on streak {winner_data['streak_length']} in {pool_name}")
@@ -253,23 +513,20 @@ class BurpBot:
     
     async def monitor_slots_winners(self):
         """Background task to monitor for new Gas Mixer winners"""
+        # Channels are only cached once the gateway is ready
+        await self.bot.wait_until_ready()
+        
         while True:
             try:
                 if not self.db_pool:
                     await asyncio.sleep(60)  # Wait 1 minute if no database
                     continue
                 
+                tick_start = time.perf_counter()
                 async with self.db_pool.acquire() as conn:
                     # Check for new winners since last check
                     if self.last_checked_slots_winner_id:
-                        query = """
-                            SELECT id, wallet_address, payout, bet_amount, created_at, transaction_hash
-                            FROM burp_slots_spins 
-                            WHERE payout > 0 
-                            AND id > $1
-                            ORDER BY created_at ASC
-                        """
-                        new_winners = await conn.fetch(query, self.last_checked_slots_winner_id)
+                        new_winners = await conn.fetch(NEW_SLOTS_WINNERS_QUERY, self.last_checked_slots_winner_id)
                     else:
                         # First time check - get the most recent winner
                         query = """
@@ -285,6 +542,7 @@ class BurpBot:
                     for winner in new_winners:
                         await self.process_slots_winner(winner)
                         self.last_checked_slots_winner_id = winner['id']
+                MONITOR_TICK_SECONDS.labels('slots').observe(time.perf_counter() - tick_start)
                 
                 # Check every 30 seconds for new winners
                 await asyncio.sleep(30)
@@ -364,6 +622,9 @@ class BurpBot:
     
     async def monitor_new_pool_types(self):
         """Background task to monitor for newly created pool types"""
+        # Channels are only cached once the gateway is ready
+        await self.bot.wait_until_ready()
+        
         # Track the last time we checked (start from bot startup time)
         last_check_time = datetime.utcnow()
         logger.info(f"Started new pool monitoring from: {last_check_time}")
@@ -374,18 +635,10 @@ class BurpBot:
                     await asyncio.sleep(60)  # Wait 1 minute if no database
                     continue
                 
+                tick_start = time.perf_counter()
                 async with self.db_pool.acquire() as conn:
                     # Check for pools created since our last check
-                    new_pools = await conn.fetch(
-                        """SELECT gas.pool_id, gas.pool_name, gas.prize_token_symbol, gas.created_at,
-                                  gpp.total_amount
-                           FROM gas_admin_settings gas
-                           LEFT JOIN gas_streak_prize_pool gpp ON gas.pool_id = gpp.pool_id
-                           WHERE gas.is_active = true 
-                           AND gas.created_at > $1
-                           ORDER BY gas.created_at ASC""",
-                        last_check_time
-                    )
+                    new_pools = await conn.fetch(NEW_POOLS_QUERY, last_check_time)
                     
                     for pool in new_pools:
                         pool_data = {
@@ -405,6 +658,7 @@ class BurpBot:
                 # Update last check time to now if no new pools found
                 if not new_pools:
                     last_check_time = datetime.utcnow()
+                MONITOR_TICK_SECONDS.labels('pools').observe(time.perf_counter() - tick_start)
                 
                 # Check every 30 seconds for new pool types
                 await asyncio.sleep(30)
@@ -413,6 +667,40 @@ class BurpBot:
                 logger.error(f"Error in new pool type monitoring: {e}")
                 await asyncio.sleep(60)  # Wait longer on error
     
+    async def report_slow_queries(self):
+        """Background task posting a batched digest of slow queries to the logs channel"""
+        while True:
+            await asyncio.sleep(SLOW_QUERY_DIGEST_INTERVAL)
+            try:
+                slow_queries = self.query_profiler.drain_slow_queries()
+                if not slow_queries:
+                    continue
+                
+                # Group by fingerprint: count and worst latency
+                grouped = {}
+                for _, query_fingerprint, elapsed, _ in slow_queries:
+                    count, worst = grouped.get(query_fingerprint, (0, 0.0))
+                    grouped[query_fingerprint] = (count + 1, max(worst, elapsed))
+                
+                embed = discord.Embed(
+                    title="🐢 Slow Query Digest",
+                    description=f"{len(slow_queries)} statement(s) over {SLOW_QUERY_THRESHOLD * 1000:.0f}ms in the last {SLOW_QUERY_DIGEST_INTERVAL // 60} minutes",
+                    color=0xff9900,
+                    timestamp=datetime.utcnow()
+                )
+                for query_fingerprint, (count, worst) in sorted(grouped.items(), key=lambda item: item[1][1], reverse=True)[:10]:
+                    embed.add_field(
+                        name=f"{count}x, worst {worst * 1000:.0f}ms",
+                        value=f"```sql\n{query_fingerprint[:400]}```",
+                        inline=False
+                    )
+                
+                await self.send_log(embed)
+                logger.info(f"Reported {len(slow_queries)} slow queries")
+            except Exception as e:
+                logger.error(f"Error reporting slow queries: {e}")
+    
+    @timed(STATS_QUERY_SECONDS.labels('overall'))
     async def fetch_overall_stats(self):
         """Fetch overall statistics across both games"""
         try:
@@ -462,6 +750,7 @@ class BurpBot:
             logger.error(f"Error fetching overall stats: {e}")
             return None
     
+    @timed(STATS_QUERY_SECONDS.labels('gas_streaks'))
     async def fetch_gas_streaks_stats(self, pool_id=None):
         """Fetch real-time stats from burpcoin database for specific pool or all pools"""
         try:
@@ -580,6 +869,7 @@ class BurpBot:
             logger.error(f"Error fetching gas streaks stats: {e}")
             return None
     
+    @timed(STATS_QUERY_SECONDS.labels('burp_slots'))
     async def fetch_burp_slots_stats(self):
         """Fetch Burp Slots statistics"""
         try:
@@ -651,9 +941,7 @@ class BurpBot:
     
     def get_fallback_stats(self, guild):
         """Get fallback stats when API is unavailable"""
-        burper_role = discord.utils.get(guild.roles, name=BURPER_ROLE_NAME)
-        verified_count = len([m for m in guild.members if burper_role and burper_role in m.roles]) if burper_role else 0
-        online_count = len([m for m in guild.members if m.status != discord.Status.offline])
+        counts = guild_counters.get(guild)
         
         return {
             "gas_streaks": {
@@ -667,15 +955,15 @@ class BurpBot:
                 "total_active": "N/A"
             },
             "community": {
-                "discord_members": len(guild.members),
-                "verified_burpers": verified_count,
-                "online_now": online_count,
+                "discord_members": counts.total,
+                "verified_burpers": counts.verified,
+                "online_now": counts.online,
                 "bot_status": "Online"
             },
             "recent_activity": {
                 "last_winner": "N/A",
                 "last_game": "N/A", 
-                "new_members_today": "N/A",
+                "new_members_today": counts.joins_today,
                 "messages_today": "N/A"
             }
         }
@@ -690,12 +978,19 @@ class BurpBot:
     async def send_log(self, embed):
         """Send log embed to logs channel"""
         try:
-            logs_channel = self.bot.get_channel(LOGS_CHANNEL)
+            logs_channel = cached_channel(LOGS_CHANNEL)
             if logs_channel:
                 await logs_channel.send(embed=embed)
         except Exception as e:
             logger.error(f"Error sending log: {e}")
     
+    def find_blocked_content(self, message_content):
+        """The first blocklisted word in a message, or None"""
+        if COMPILED_BLOCKLIST is None:
+            return None
+        match = COMPILED_BLOCKLIST.search(message_content)
+        return match.group(0) if match else None
+    
     def check_spam(self, user_id, message_content):
         """Check if user is spamming"""
         current_time = time.time()
@@ -727,20 +1022,13 @@ class BurpBot:
     async def handle_spam(self, message, spam_type):
         """Handle spam detection and moderation"""
         try:
-            # Delete the message
-            await message.delete()
-            
-            # Send warning message that auto-deletes
+            # Warning message that auto-deletes
             if spam_type == "rapid_messages":
-                warning_msg = await message.channel.send(
-                    f"⚠️ {message.author.mention}, slow down! You're sending messages too quickly.",
-                    delete_after=5
-                )
+                warning = f"⚠️ {message.author.mention}, slow down! You're sending messages too quickly."
             elif spam_type == "duplicate_messages":
-                warning_msg = await message.channel.send(
-                    f"⚠️ {message.author.mention}, please don't spam the same message repeatedly.",
-                    delete_after=5
-                )
+                warning = f"⚠️ {message.author.mention}, please don't spam the same message repeatedly."
+            else:
+                warning = None
             
             # Log to logs channel
             embed = discord.Embed(
@@ -753,28 +1041,19 @@ class BurpBot:
             embed.add_field(name="Type", value=spam_type.replace("_", " ").title(), inline=True)
             embed.add_field(name="Message", value=message.content[:1024] if message.content else "*No content*", inline=False)
             
-            await self.send_log(embed)
+            # Delete, warn and log concurrently
+            await moderation.moderate(message, warning, embed)
             
             logger.info(f"Deleted spam ({spam_type}) from {message.author.name} ({message.author.id}) in #{message.channel.name}")
             
-        except discord.errors.NotFound:
-            pass
-        except discord.errors.Forbidden:
-            logger.error("Bot doesn't have permission to delete messages")
         except Exception as e:
             logger.error(f"Error handling spam: {e}")
     
     async def handle_discord_invite(self, message):
         """Handle Discord invite link detection and moderation"""
         try:
-            # Delete the message
-            await message.delete()
-            
-            # Send simple warning message that auto-deletes
-            warning_msg = await message.channel.send(
-                f"❌ {message.author.mention}, can't do that here! Discord invite links are not allowed.",
-                delete_after=5
-            )
+            # Simple warning message that auto-deletes
+            warning = f"❌ {message.author.mention}, can't do that here! Discord invite links are not allowed."
             
             # Log to logs channel
             embed = discord.Embed(
@@ -787,21 +1066,45 @@ class BurpBot:
             embed.add_field(name="Message", value=message.content[:1024], inline=False)
             embed.set_footer(text=f"User ID: {message.author.id}")
             
-            await self.send_log(embed)
+            # Delete, warn and log concurrently
+            await moderation.moderate(message, warning, embed)
             
             logger.info(f"Deleted Discord invite from {message.author.name} ({message.author.id}) in #{message.channel.name}")
             
-        except discord.errors.NotFound:
-            pass
-        except discord.errors.Forbidden:
-            logger.error("Bot doesn't have permission to delete messages")
         except Exception as e:
             logger.error(f"Error handling Discord invite: {e}")
     
+    async def handle_blocked_content(self, message, blocked_word):
+        """Handle messages containing blocklisted words"""
+        try:
+            warning = f"🚫 {message.author.mention}, that message isn't allowed here."
+            
+            # Log to logs channel
+            embed = discord.Embed(
+                title="🚫 Blocked Content Removed",
+                color=0xff0000,
+                timestamp=datetime.utcnow()
+            )
+            embed.add_field(name="User", value=f"{message.author.mention} ({message.author})", inline=False)
+            embed.add_field(name="Channel", value=message.channel.mention, inline=True)
+            embed.add_field(name="Matched", value=blocked_word[:1024], inline=True)
+            embed.add_field(name="Message", value=message.content[:1024], inline=False)
+            embed.set_footer(text=f"User ID: {message.author.id}")
+            
+            # Delete, warn and log concurrently
+            await moderation.moderate(message, warning, embed)
+            
+            logger.info(f"Deleted blocked content from {message.author.name} ({message.author.id}) in #{message.channel.name}")
+            
+        except Exception as e:
+            logger.error(f"Error handling blocked content: {e}")
+    
+    @tracer.traced('send_winner_announcement')
     async def send_winner_announcement(self, winner_data):
         """Send gas streaks winner announcement to burp-winners channel"""
         try:
-            channel = self.bot.get_channel(BURP_WINNERS_CHANNEL)
+            tracer.current().set(game_id=winner_data.get('game_id'))
+            channel = cached_channel(BURP_WINNERS_CHANNEL)
             if not channel:
                 logger.error(f"Could not find burp-winners channel {BURP_WINNERS_CHANNEL}")
                 return
@@ -860,7 +1163,9 @@ class BurpBot:
                 inline=True
             )
             
-            await channel.send(embed=embed)
+            with tracer.span('discord.send', channel=BURP_WINNERS_CHANNEL):
+                await channel.send(embed=embed)
+            record_announcement_posted(winner_data)
             logger.info(f"Sent {token_symbol} winner announcement for {winner_address} in {pool_name}")
             
         except Exception as e:
@@ -869,7 +1174,7 @@ class BurpBot:
     async def send_slots_winner_announcement(self, winner_data):
         """Send Gas Mixer winner announcement to burp-winners channel"""
         try:
-            channel = self.bot.get_channel(BURP_WINNERS_CHANNEL)
+            channel = cached_channel(BURP_WINNERS_CHANNEL)
             if not channel:
                 logger.error(f"Could not find burp-winners channel {BURP_WINNERS_CHANNEL}")
                 return
@@ -941,10 +1246,11 @@ class BurpBot:
         except Exception as e:
             logger.error(f"Error sending Gas Mixer winner announcement: {e}")
     
+    @tracer.traced('send_new_pool_type_announcement')
     async def send_new_pool_type_announcement(self, pool_data):
         """Send new prize pool announcement"""
         try:
-            channel = self.bot.get_channel(NEW_PRIZE_POOLS_CHANNEL)
+            channel = cached_channel(NEW_PRIZE_POOLS_CHANNEL)
             if not channel:
                 logger.error(f"Could not find new prize pools channel {NEW_PRIZE_POOLS_CHANNEL}")
                 return
@@ -972,7 +1278,9 @@ class BurpBot:
                 inline=False
             )
             
-            await channel.send(embed=embed)
+            with tracer.span('discord.send', channel=NEW_PRIZE_POOLS_CHANNEL):
+                await channel.send(embed=embed)
+            record_announcement_posted(pool_data)
             logger.info(f"Sent new pool type announcement: {token_symbol} - {pool_name}")
             
         except Exception as e:
@@ -981,6 +1289,148 @@ class BurpBot:
 # Initialize bot helper
 burp_bot = BurpBot(bot)
 
+# Auto-moderation actions: concurrent delete/warn/log, bulk deletes, one warning per user per window
+moderation = ModerationExecutor(burp_bot.send_log, on_action=lambda action: MODERATION_ACTIONS.labels(action).inc())
+
+# Member/user lookups that work without a full member cache
+member_lookup = MemberLookup(bot, on_lookup=lambda result: CACHE_LOOKUPS.labels('member', result).inc())
+
+# Recent message content for delete/edit logs
+message_cache = MessageCache(
+    max_messages=MESSAGE_CACHE_MAX_MESSAGES,
+    max_bytes=MESSAGE_CACHE_MAX_BYTES,
+    on_lookup=lambda result: CACHE_LOOKUPS.labels('message', result).inc()
+)
+
+# Recent audit log entries pushed by the gateway, so moderation logs need no audit log fetches
+audit_index = AuditLogIndex(
+    on_lookup=lambda result: CACHE_LOOKUPS.labels('audit_log', result).inc(),
+    is_live=lambda guild: bot.intents.moderation and guild.me is not None and guild.me.guild_permissions.view_audit_log
+)
+
+def moderator_name(entry):
+    """Who performed an audit log action (the user may not be cached)"""
+    if entry.user is not None:
+        return str(entry.user)
+    user_id = getattr(entry, 'user_id', None)
+    return f"<@{user_id}>" if user_id else "Unknown"
+
+# Configured role names resolved to IDs once per guild
+role_registry = RoleRegistry(bot, on_lookup=lambda result: CACHE_LOOKUPS.labels('role', result).inc())
+
+# Member/verified/online/joins-today counts, kept current from gateway events
+guild_counters = GuildCounters(BURPER_ROLE_NAME, track_presences=TRACK_PRESENCES, roles=role_registry, track_member_ids=LEAN_MEMBER_CACHE)
+
+def count_raw_member_updates():
+    """
+    Feed every GUILD_MEMBER_UPDATE payload to the guild counters
+
+    discord.py discards updates for members it hasn't cached (so on_member_update
+    never fires for them in lean mode); the payload still carries the member's
+    role IDs, so the parser is wrapped to count it before discord.py handles it.
+    """
+    parsers = bot._connection.parsers
+    parse_member_update = parsers['GUILD_MEMBER_UPDATE']
+    
+    def parse(data):
+        try:
+            guild = bot.get_guild(int(data['guild_id']))
+            if guild is not None:
+                guild_counters.member_payload_updated(guild, data)
+        except Exception as e:
+            logger.error(f"Error counting member update: {e}")
+        parse_member_update(data)
+    
+    parsers['GUILD_MEMBER_UPDATE'] = parse
+
+if LEAN_MEMBER_CACHE:
+    count_raw_member_updates()
+
+async def reconcile_guild_counters():
+    """Background task correcting guild counter drift with a periodic full recount"""
+    await bot.wait_until_ready()
+    api_reconciled_at = {}
+    while True:
+        for guild in bot.guilds:
+            try:
+                guild_counters.reconcile(guild)
+                # Lean member cache: download the member list once at startup to seed the
+                # verified IDs, then rarely; raw member events keep the counts current in between
+                last = api_reconciled_at.get(guild.id)
+                if LEAN_MEMBER_CACHE and (last is None or time.monotonic() - last >= GUILD_COUNTER_API_RECONCILE_INTERVAL):
+                    await guild_counters.reconcile_from_api(guild)
+                    api_reconciled_at[guild.id] = time.monotonic()
+                if not TRACK_PRESENCES:
+                    counted = await bot.fetch_guild(guild.id, with_counts=True)
+                    guild_counters.set_online(guild.id, counted.approximate_presence_count or 0)
+            except Exception as e:
+                logger.error(f"Error reconciling counters for {guild.name}: {e}")
+        await asyncio.sleep(GUILD_COUNTER_RECONCILE_INTERVAL)
+
+# Memory attribution for /memory (tracemalloc only starts on first use)
+memory_tracker = MemoryTracker()
+memory_snapshot_running = False
+memory_tracker.register('user_message_history', lambda: user_message_history)
+memory_tracker.register('verification_challenges', lambda: verification_challenges)
+memory_tracker.register('burp_cooldowns', lambda: burp_cooldowns)
+memory_tracker.register('burpfact_cooldowns', lambda: burpfact_cooldowns)
+memory_tracker.register('stats_cooldowns', lambda: stats_cooldowns)
+memory_tracker.register('StatsView objects', lambda: len(live_stats_views))
+memory_tracker.register('member cache', lambda: [member for guild in bot.guilds for member in guild.members])
+memory_tracker.register('message cache', lambda: message_cache.records)
+memory_tracker.register('verified member IDs', lambda: guild_counters.verified_ids_count())
+
+# Time every Discord REST call, keyed by route template (bounded cardinality)
+_discord_http_request = bot.http.request
+
+async def _instrumented_discord_request(route, **kwargs):
+    start = time.perf_counter()
+    try:
+        if tracer.current() is None:
+            return await _discord_http_request(route, **kwargs)
+        # Inside a traced announcement: show the REST call (and any rate-limit wait) as its own span
+        with tracer.span('discord.http', route=f"{route.method} {route.path}"):
+            return await _discord_http_request(route, **kwargs)
+    finally:
+        DISCORD_REQUEST_SECONDS.labels(f"{route.method} {route.path}").observe(time.perf_counter() - start)
+
+bot.http.request = _instrumented_discord_request
+
+_last_stall_report = 0.0
+
+async def report_loop_stall(report):
+    """Post a blocked event-loop report to the logs channel (rate limited)"""
+    global _last_stall_report
+    if time.time() - _last_stall_report < LOOP_STALL_REPORT_COOLDOWN:
+        return
+    _last_stall_report = time.time()
+    
+    location = report.location
+    embed = discord.Embed(
+        title="⏱️ Event Loop Blocked",
+        description=f"The event loop was blocked for at least **{report.blocked_for * 1000:.0f}ms**",
+        color=0xff9900,
+        timestamp=datetime.utcnow()
+    )
+    if location:
+        embed.add_field(
+            name="Location",
+            value=f"`{os.path.basename(location.filename)}:{location.lineno}` in `{location.name}`\n```{(location.line or '')[:200]}```",
+            inline=False
+        )
+    embed.add_field(name="Stack", value=f"```{report.format_stack(limit=6)[-1000:]}```", inline=False)
+    await burp_bot.send_log(embed)
+
+loop_watchdog = LoopWatchdog(threshold=LOOP_LAG_THRESHOLD, histogram=LOOP_LAG_SECONDS, on_stall=report_loop_stall)
+
+class RateLimitCounter(logging.Handler):
+    """Counts the 429 warnings discord.py logs before retrying a request"""
+    def emit(self, record):
+        if 'rate limited' in str(record.msg):
+            DISCORD_RATE_LIMITED.inc()
+
+logging.getLogger('discord.http').addHandler(RateLimitCounter(level=logging.WARNING))
+
 # Custom check for admin commands
 def is_admin_user():
     """Check if the user is the designated admin"""
@@ -999,43 +1449,135 @@ def check_cooldown(user_id, cooldown_dict, cooldown_seconds):
     return True, 0
 
 @bot.event
-async def on_ready():
-    """Bot startup event"""
-    logger.info(f'{bot.user} has connected to Discord!')
+async def setup_hook():
+    """One-time startup, run once after login and before connecting to the gateway"""
+    # Start measuring event-loop lag
+    loop_watchdog.start()
+    
+    # Write trace spans to a file only when asked to (not on import, so benchmarks and scripts don't create one)
+    if TRACE_FILE:
+        tracer.open(TRACE_FILE)
     
-    # Initialize database connection
+    # Try the database once up front so saved state (command tree hash, panels, purges) comes from it
     await burp_bot.init_database()
+    await burp_bot.attach_state()
+    
+    # Keep connecting (if that failed) with backoff, then start monitoring for new winners
+    burp_bot.ensure_task('connect_database', burp_bot.connect_database)
     
-    # Start monitoring for new winners
-    await burp_bot.start_monitoring()
+    # Keep guild counters reconciled
+    burp_bot.ensure_task('reconcile_guild_counters', reconcile_guild_counters)
+    
+    # Add persistent views for buttons
+    bot.add_view(VerificationView())
     
-    # Sync slash commands
+    # Sync slash commands (only if they changed since the last sync)
     try:
-        synced = await bot.tree.sync()
-        logger.info(f"Synced {len(synced)} command(s)")
+        await sync_command_tree()
     except Exception as e:
         logger.error(f"Failed to sync commands: {e}")
+
+def command_tree_hash():
+    """Stable hash of the global command tree as it would be sent to Discord"""
+    payload = sorted(
+        (command.to_dict() for command in bot.tree.get_commands()),
+        key=lambda command: (command.get('type', 1), command['name'])
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+async def sync_command_tree(force=False):
+    """Sync slash commands if the tree changed since the last sync (or if forced)"""
+    state_key = f'command_tree_hash:{bot.application_id}'
+    tree_hash = command_tree_hash()
+    if not force and bot_state.get(state_key) == tree_hash:
+        logger.info("Command tree unchanged since last sync, skipping sync")
+        return None
     
-    # Send links embed to links channel
-    await send_links_embed()
+    synced = await bot.tree.sync()
+    bot_state.set(state_key, tree_hash)
+    logger.info(f"Synced {len(synced)} command(s)")
+    return synced
+
+panels_posted = False
+
+@bot.event
+async def on_ready():
+    """Gateway ready; fires again after every reconnect, so only the first one posts panels"""
+    global panels_posted
+    logger.info(f'{bot.user} has connected to Discord!')
     
-    # Send verification embed to verification channel
-    await send_verification_embed()
+    if panels_posted:
+        return
+    panels_posted = True
     
-    # Add persistent views for buttons
-    bot.add_view(VerificationView())
+    cached_members = sum(len(guild.members) for guild in bot.guilds)
+    logger.info(
+        f"Startup took {time.monotonic() - PROCESS_START:.1f}s "
+        f"({'lean' if LEAN_MEMBER_CACHE else 'full'} member cache, {cached_members:,} members cached, "
+        f"RSS {resident_memory_bytes() / 1024 / 1024:.0f}MB)"
+    )
     
-    # Set bot status
-    await bot.change_presence(
-        activity=discord.Activity(
-            type=discord.ActivityType.watching,
-            name="The Burp Community"
-        )
+    # Bring the links and verification panels up to date
+    await panel_manager.ensure_all()
+    
+    # Pick up purges interrupted by a restart
+    purge_jobs.resume_all()
+
+def purge_progress_text(job):
+    """Status line for a purge job's progress message"""
+    status = {
+        'running': "running",
+        'done': "finished",
+        'cancelled': "cancelled",
+        'failed': f"failed ({job.error}); resume with `/purgejobs resume {job.id}`",
+    }.get(job.status, job.status)
+    text = (
+        f"🧹 Purge `{job.id}` {status}\n"
+        f"Deleted {job.deleted:,} of up to {job.limit:,} ({job.scanned:,} scanned)\n"
+        f"Filters: {job.describe()}"
     )
+    if job.progress_expired and job.status == 'running':
+        text += "\nStill running; progress updates stop here. Check `/purgejobs`, the result goes to the logs channel."
+    return text
+
+async def log_purge_job(job):
+    """Log a finished, cancelled or failed purge to the logs channel"""
+    embed = discord.Embed(
+        title=f"🧹 Purge {job.status.title()}",
+        color=0x2ecc71 if job.status == 'done' else 0xff9900,
+        timestamp=datetime.utcnow()
+    )
+    embed.add_field(name="Channel", value=f"<#{job.channel_id}>", inline=True)
+    embed.add_field(name="Requested By", value=f"<@{job.requested_by}>", inline=True)
+    embed.add_field(name="Deleted", value=f"{job.deleted:,} ({job.scanned:,} scanned)", inline=True)
+    embed.add_field(name="Filters", value=job.describe()[:1024], inline=False)
+    if job.error:
+        embed.add_field(name="Error", value=job.error[:1024], inline=False)
+    embed.set_footer(text=f"Job {job.id}")
+    await burp_bot.send_log(embed)
+
+# Background purges: bulk delete for recent messages, throttled single deletes for older ones
+purge_jobs = PurgeJobManager(
+    bot,
+    bot_state,
+    max_per_channel=PURGE_JOBS_PER_CHANNEL,
+    single_delete_interval=PURGE_SINGLE_DELETE_INTERVAL,
+    progress_interval=PURGE_PROGRESS_INTERVAL,
+    on_finished=log_purge_job
+)
 
-@bot.tree.command(name='purge', description='Delete messages in bulk (Admin only)')
-async def purge_command(interaction: discord.Interaction, amount: int):
-    """Admin command to delete messages in bulk"""
+def parse_purge_time(value):
+    """Parse a UTC 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM' purge bound"""
+    for fmt in ('%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value.strip(), fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid time `{value}`. Use YYYY-MM-DD or YYYY-MM-DD HH:MM (UTC)")
+
+@bot.tree.command(name='purge', description='Delete messages in bulk, optionally filtered by user, text or time (Admin only)')
+async def purge_command(interaction: discord.Interaction, amount: int, user: discord.User = None, contains: str = None, after: str = None, before: str = None):
+    """Admin command to start a background purge job in this channel"""
     try:
         # Check if user is admin
         if interaction.user.id != ADMIN_USER_ID:
@@ -1047,32 +1589,99 @@ async def purge_command(interaction: discord.Interaction, amount: int):
             await interaction.response.send_message("❌ Amount must be at least 1", ephemeral=True)
             return
         
-        if amount > 100:
-            await interaction.response.send_message("❌ Cannot delete more than 100 messages at once", ephemeral=True)
+        if amount > PURGE_MAX_MESSAGES:
+            await interaction.response.send_message(f"❌ Cannot delete more than {PURGE_MAX_MESSAGES:,} messages at once", ephemeral=True)
+            return
+        
+        # Validate filters
+        try:
+            after_time = parse_purge_time(after) if after else None
+            before_time = parse_purge_time(before) if before else None
+            if contains:
+                re.compile(contains)
+        except re.error as e:
+            await interaction.response.send_message(f"❌ Invalid pattern: {e}", ephemeral=True)
+            return
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
             return
         
-        # Defer response
-        await interaction.response.defer(ephemeral=True)
+        job = PurgeJob(
+            interaction.channel.id,
+            interaction.user.id,
+            amount,
+            author_id=user.id if user else None,
+            after=after_time,
+            before=before_time,
+            pattern=contains
+        )
         
-        # Purge messages
-        deleted = await interaction.channel.purge(limit=amount)
+        async def report_progress(job):
+            await interaction.edit_original_response(content=purge_progress_text(job))
         
-        # Send confirmation
-        await interaction.followup.send(f"🧹 Cleaned {len(deleted)} messages", ephemeral=True)
+        try:
+            purge_jobs.start(job, progress=report_progress, progress_for=PURGE_PROGRESS_WINDOW)
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}. Check `/purgejobs`.", ephemeral=True)
+            return
         
-        logger.info(f"Admin {interaction.user.name} purged {len(deleted)} messages in #{interaction.channel.name}")
+        await interaction.response.send_message(purge_progress_text(job), ephemeral=True)
+        logger.info(f"Admin {interaction.user.name} started purge job {job.id} in #{interaction.channel.name} ({job.describe()})")
         
-    except discord.Forbidden:
-        await interaction.followup.send("❌ I don't have permission to delete messages in this channel", ephemeral=True)
-    except discord.HTTPException as e:
-        await interaction.followup.send(f"❌ Error deleting messages: {str(e)}", ephemeral=True)
     except Exception as e:
         logger.error(f"Error in purge command: {e}")
         try:
-            await interaction.followup.send("❌ An error occurred while purging messages", ephemeral=True)
+            await interaction.followup.send("❌ An error occurred while starting the purge", ephemeral=True)
         except:
             pass
 
+@bot.tree.command(name='purgejobs', description='List, cancel or resume purge jobs (Admin only)')
+async def purgejobs_command(interaction: discord.Interaction, action: str = None, job_id: str = None):
+    """Admin command to manage background purge jobs"""
+    # Check if user is admin
+    if interaction.user.id != ADMIN_USER_ID:
+        await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
+        return
+    
+    if action and action.lower() in ['cancel', 'stop']:
+        if not job_id or not purge_jobs.cancel(job_id):
+            await interaction.response.send_message("❌ No running purge with that ID.", ephemeral=True)
+            return
+        await interaction.response.send_message(f"🛑 Cancelling purge `{job_id}`...", ephemeral=True)
+        logger.info(f"Purge job {job_id} cancelled by {interaction.user.name}")
+        return
+    
+    if action and action.lower() == 'resume':
+        try:
+            job = purge_jobs.resume(job_id) if job_id else None
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
+        if job is None:
+            await interaction.response.send_message("❌ No saved purge with that ID.", ephemeral=True)
+            return
+        await interaction.response.send_message(f"▶️ Resumed purge `{job.id}` ({job.deleted:,} deleted so far).", ephemeral=True)
+        return
+    
+    if action and action.lower() not in ['list', 'status']:
+        await interaction.response.send_message("❌ Invalid action. Use `list`, `cancel` or `resume`", ephemeral=True)
+        return
+    
+    lines = []
+    for job in purge_jobs.jobs.values():
+        lines.append(f"`{job.id}` <#{job.channel_id}> {job.status}: {job.deleted:,} deleted, {job.scanned:,} scanned")
+    for saved_id, data in purge_jobs.saved_jobs().items():
+        if saved_id not in purge_jobs.jobs:
+            lines.append(f"`{saved_id}` <#{data['channel_id']}> saved: {data['deleted']:,} deleted so far")
+    
+    embed = discord.Embed(
+        title="🧹 Purge Jobs",
+        description="\n".join(lines[-20:]) if lines else "No purge jobs.",
+        color=0x5865F2,
+        timestamp=datetime.utcnow()
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 @bot.tree.command(name='burp', description='Post a random burp sound!')
 async def burp_command(interaction: discord.Interaction):
     """Fun command that posts actual burp sound files"""
@@ -1325,6 +1934,7 @@ class StatsView(discord.ui.View):
     def __init__(self, user_id: int):
         super().__init__(timeout=180)  # 3 minute timeout
         self.user_id = user_id
+        live_stats_views.add(self)
     
     @discord.ui.button(label='Overall Stats', style=discord.ButtonStyle.primary, emoji='📊')
     async def overall_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -1347,7 +1957,7 @@ class StatsView(discord.ui.View):
         
         # Add thumbnail
         try:
-            target_user = interaction.client.get_user(1419117925465460878)
+            target_user = await member_lookup.user(1419117925465460878)
             if target_user:
                 embed.set_thumbnail(url=target_user.display_avatar.url)
         except:
@@ -1412,7 +2022,7 @@ class StatsView(discord.ui.View):
         
         # Add thumbnail
         try:
-            target_user = interaction.client.get_user(1419117925465460878)
+            target_user = await member_lookup.user(1419117925465460878)
             if target_user:
                 embed.set_thumbnail(url=target_user.display_avatar.url)
         except:
@@ -1489,7 +2099,7 @@ class StatsView(discord.ui.View):
         
         # Add thumbnail
         try:
-            target_user = interaction.client.get_user(1419117925465460878)
+            target_user = await member_lookup.user(1419117925465460878)
             if target_user:
                 embed.set_thumbnail(url=target_user.display_avatar.url)
         except:
@@ -1659,7 +2269,7 @@ class GasStreaksPoolView(discord.ui.View):
         
         # Add thumbnail
         try:
-            target_user = interaction.client.get_user(1419117925465460878)
+            target_user = await member_lookup.user(1419117925465460878)
             if target_user:
                 embed.set_thumbnail(url=target_user.display_avatar.url)
         except:
@@ -1752,7 +2362,7 @@ async def stats_command(interaction: discord.Interaction):
         
         # Add thumbnail
         try:
-            target_user = bot.get_user(1419117925465460878)
+            target_user = await member_lookup.user(1419117925465460878)
             if target_user:
                 embed.set_thumbnail(url=target_user.display_avatar.url)
         except:
@@ -1789,9 +2399,14 @@ async def stats_command(interaction: discord.Interaction):
 # Old verification command removed - now using button system
 
 @bot.event
-async def on_message_delete(message):
-    """Log deleted messages"""
-    if message.author.bot:
+async def on_raw_message_delete(payload):
+    """Log deleted messages (content comes from the compact message cache)"""
+    cached = message_cache.pop(payload.message_id)
+    # Messages deleted by a purge job are logged with the job
+    if purge_jobs.was_single_deleted(payload.message_id):
+        return
+    # Bot messages (e.g. auto-deleted moderation warnings) aren't logged
+    if cached is not None and cached.author_bot:
         return
     
     try:
@@ -1800,18 +2415,19 @@ async def on_message_delete(message):
             color=0xff6b6b,
             timestamp=datetime.utcnow()
         )
-        embed.add_field(name="Author", value=f"{message.author.mention} ({message.author})", inline=False)
-        embed.add_field(name="Channel", value=message.channel.mention, inline=True)
+        if cached:
+            embed.add_field(name="Author", value=f"<@{cached.author_id}> ({cached.author_name})", inline=False)
+        else:
+            embed.add_field(name="Author", value="Unknown (message not cached)", inline=False)
+        embed.add_field(name="Channel", value=f"<#{payload.channel_id}>", inline=True)
         
         # Add message content if available
-        if message.content:
-            content = message.content[:1024]
-            embed.add_field(name="Content", value=content, inline=False)
+        if cached and cached.content:
+            embed.add_field(name="Content", value=cached.content[:1024], inline=False)
         
         # Add attachments info if any
-        if message.attachments:
-            attachments_info = "\n".join([f"[{att.filename}]({att.url})" for att in message.attachments])
-            embed.add_field(name="Attachments", value=attachments_info[:1024], inline=False)
+        if cached and cached.attachments:
+            embed.add_field(name="Attachments", value="\n".join(cached.attachments)[:1024], inline=False)
         
         
         await burp_bot.send_log(embed)
@@ -1819,9 +2435,28 @@ async def on_message_delete(message):
         logger.error(f"Error logging message delete: {e}")
 
 @bot.event
-async def on_message_edit(before, after):
-    """Log edited messages"""
-    if before.author.bot or before.content == after.content:
+async def on_raw_bulk_message_delete(payload):
+    """Forget bulk-deleted messages (purges are logged by the purge command)"""
+    for message_id in payload.message_ids:
+        message_cache.discard(message_id)
+
+@bot.event
+async def on_raw_message_edit(payload):
+    """Log edited messages (previous content comes from the compact message cache)"""
+    data = payload.data
+    author = data.get('author') or {}
+    # Embed unfurls also arrive as edits, without content
+    if 'content' not in data or author.get('bot'):
+        return
+    
+    cached = message_cache.get(payload.message_id)
+    after_content = data['content']
+    if cached and cached.content == after_content[:message_cache.snippet_length]:
+        return
+    
+    # Nothing to attribute the edit to
+    author_id = author.get('id') or (cached.author_id if cached else None)
+    if author_id is None:
         return
     
     try:
@@ -1830,18 +2465,24 @@ async def on_message_edit(before, after):
             color=0xffa500,
             timestamp=datetime.utcnow()
         )
-        embed.add_field(name="Author", value=f"{before.author.mention} ({before.author})", inline=False)
-        embed.add_field(name="Channel", value=before.channel.mention, inline=True)
-        embed.add_field(name="Message Link", value=f"[Jump to Message]({after.jump_url})", inline=True)
+        author_name = cached.author_name if cached else author.get('username', 'Unknown')
+        embed.add_field(name="Author", value=f"<@{author_id}> ({author_name})", inline=False)
+        embed.add_field(name="Channel", value=f"<#{payload.channel_id}>", inline=True)
+        jump_url = f"https://discord.com/channels/{payload.guild_id or '@me'}/{payload.channel_id}/{payload.message_id}"
+        embed.add_field(name="Message Link", value=f"[Jump to Message]({jump_url})", inline=True)
         
         # Before content
-        if before.content:
-            embed.add_field(name="Before", value=before.content[:1024], inline=False)
+        if cached and cached.content:
+            embed.add_field(name="Before", value=cached.content[:1024], inline=False)
+        elif not cached:
+            embed.add_field(name="Before", value="*Not cached*", inline=False)
         
         # After content
-        if after.content:
-            embed.add_field(name="After", value=after.content[:1024], inline=False)
+        if after_content:
+            embed.add_field(name="After", value=after_content[:1024], inline=False)
         
+        if cached:
+            message_cache.update_content(cached, after_content)
         
         await burp_bot.send_log(embed)
     except Exception as e:
@@ -1850,6 +2491,7 @@ async def on_message_edit(before, after):
 @bot.event
 async def on_member_update(before, after):
     """Log member updates (nickname changes, role changes)"""
+    guild_counters.member_updated(before, after)
     try:
         # Check for nickname change
         if before.nick != after.nick:
@@ -1890,6 +2532,16 @@ async def on_member_update(before, after):
     except Exception as e:
         logger.error(f"Error logging member update: {e}")
 
+@bot.event
+async def on_presence_update(before, after):
+    """Keep the online count current (only dispatched with the presences intent)"""
+    guild_counters.presence_updated(before, after)
+
+@bot.event
+async def on_audit_log_entry_create(entry):
+    """Index moderation actions as they happen (needs the moderation intent and View Audit Log)"""
+    audit_index.add(entry)
+
 @bot.event
 async def on_member_ban(guild, user):
     """Log member bans"""
@@ -1898,14 +2550,11 @@ async def on_member_ban(guild, user):
         ban_reason = "No reason provided"
         banned_by = "Unknown"
         
-        try:
-            async for entry in guild.audit_logs(limit=5, action=discord.AuditLogAction.ban):
-                if entry.target.id == user.id:
-                    ban_reason = entry.reason or "No reason provided"
-                    banned_by = entry.user
-                    break
-        except:
-            pass
+        # Every ban has an audit log entry, so a late one is worth fetching
+        entry = await audit_index.lookup(guild, discord.AuditLogAction.ban, user.id, max_age=60, fetch_on_miss=True)
+        if entry:
+            ban_reason = entry.reason or "No reason provided"
+            banned_by = moderator_name(entry)
         
         embed = discord.Embed(
             title="🔨 Member Banned",
@@ -1928,13 +2577,9 @@ async def on_member_unban(guild, user):
         # Try to get unban info from audit log
         unbanned_by = "Unknown"
         
-        try:
-            async for entry in guild.audit_logs(limit=5, action=discord.AuditLogAction.unban):
-                if entry.target.id == user.id:
-                    unbanned_by = entry.user
-                    break
-        except:
-            pass
+        entry = await audit_index.lookup(guild, discord.AuditLogAction.unban, user.id, max_age=60, fetch_on_miss=True)
+        if entry:
+            unbanned_by = moderator_name(entry)
         
         embed = discord.Embed(
             title="🔓 Member Unbanned",
@@ -1949,26 +2594,34 @@ async def on_member_unban(guild, user):
     except Exception as e:
         logger.error(f"Error logging member unban: {e}")
 
+@bot.event
+async def on_raw_member_remove(payload):
+    """on_member_remove only fires for cached members; in lean mode handle the rest here"""
+    if not LEAN_MEMBER_CACHE or isinstance(payload.user, discord.Member):
+        return
+    guild = bot.get_guild(payload.guild_id)
+    if guild is None:
+        return
+    member = member_lookup.forget(guild.id, payload.user.id) or DepartedMember(payload.user, guild)
+    await on_member_remove(member)
+
 @bot.event
 async def on_member_remove(member):
     """Log member leaves/kicks"""
+    guild_counters.member_removed(member)
     try:
         # Check if it was a kick by looking at audit logs
         was_kicked = False
         kicked_by = None
         kick_reason = None
         
-        try:
-            async for entry in member.guild.audit_logs(limit=5, action=discord.AuditLogAction.kick):
-                if entry.target.id == member.id:
-                    # Check if kick happened within last 5 seconds
-                    if (datetime.utcnow() - entry.created_at).total_seconds() < 5:
-                        was_kicked = True
-                        kicked_by = entry.user
-                        kick_reason = entry.reason or "No reason provided"
-                        break
-        except:
-            pass
+        # Only a kick within the last few seconds explains this removal; with the
+        # audit log stream live, no entry means they left on their own (no API call)
+        entry = await audit_index.lookup(member.guild, discord.AuditLogAction.kick, member.id, max_age=10)
+        if entry:
+            was_kicked = True
+            kicked_by = moderator_name(entry)
+            kick_reason = entry.reason or "No reason provided"
         
         if was_kicked:
             embed = discord.Embed(
@@ -1994,106 +2647,169 @@ async def on_member_remove(member):
     except Exception as e:
         logger.error(f"Error logging member remove: {e}")
 
+async def welcome_member(member):
+    """Welcome message and join log for one member"""
+    # Send welcome message
+    channel = cached_channel(WELCOME_CHANNEL)
+    if channel:
+        embed = discord.Embed(
+            title="Welcome!",
+            description=f"Hey mmhmmphff {member.mention}!",
+            color=0x00ff00
+        )
+        embed.set_image(url=member.display_avatar.url)
+        await channel.send(embed=embed)
+        logger.info(f"Sent welcome message for {member.name}")
+    
+    # Log to logs channel
+    embed = discord.Embed(
+        title="📥 Member Joined",
+        color=0x2ecc71,
+        timestamp=datetime.utcnow()
+    )
+    embed.add_field(name="User", value=f"{member.mention} ({member})", inline=False)
+    embed.add_field(name="Account Created", value=member.created_at.strftime("%Y-%m-%d %H:%M:%S UTC"), inline=True)
+    
+    # Calculate account age
+    account_age = discord.utils.utcnow() - member.created_at
+    embed.add_field(name="Account Age", value=f"{account_age.days} days", inline=True)
+    
+    embed.set_thumbnail(url=member.display_avatar.url)
+    
+    await burp_bot.send_log(embed)
+
+async def welcome_members(members):
+    """One welcome message and one summary log for a batch of members joining in a burst"""
+    WELCOME_BATCH_SIZE.observe(len(members))
+    mentions = ", ".join(member.mention for member in members)
+    
+    channel = cached_channel(WELCOME_CHANNEL)
+    if channel:
+        await channel.send(f"Hey mmhmmphff {mentions}! Welcome!")
+        logger.info(f"Sent batched welcome message for {len(members)} members")
+    
+    now = discord.utils.utcnow()
+    new_accounts = sum(1 for member in members if (now - member.created_at).days < 7)
+    
+    lines = []
+    for member in members:
+        line = f"{member.mention} ({member}) - {(now - member.created_at).days}d old"
+        if len("\n".join(lines + [line])) > 950:
+            lines.append(f"… and {len(members) - len(lines)} more")
+            break
+        lines.append(line)
+    
+    embed = discord.Embed(
+        title=f"📥 {len(members)} Members Joined",
+        description=f"Join burst: {join_aggregator.rate()} joins in the last minute",
+        color=0x2ecc71,
+        timestamp=datetime.utcnow()
+    )
+    embed.add_field(name="Members", value="\n".join(lines), inline=False)
+    embed.add_field(name="Accounts Under 7 Days", value=str(new_accounts), inline=True)
+    
+    await burp_bot.send_log(embed)
+
+# Individual welcomes normally, batched welcomes during join bursts
+join_aggregator = JoinAggregator(
+    welcome_member,
+    welcome_members,
+    threshold=JOIN_BURST_THRESHOLD,
+    min_window=JOIN_BATCH_MIN_WINDOW,
+    max_window=JOIN_BATCH_MAX_WINDOW
+)
+MEMBER_JOIN_RATE.set_function(join_aggregator.rate)
+JOIN_BURST_ACTIVE.set_function(lambda: 1 if join_aggregator.bursting else 0)
+
 @bot.event
 async def on_member_join(member):
     """Welcome new members and log joins"""
+    guild_counters.member_joined(member)
+    if LEAN_MEMBER_CACHE:
+        member_lookup.remember(member)
     try:
-        # Send welcome message
-        channel = bot.get_channel(WELCOME_CHANNEL)
-        if channel:
-            embed = discord.Embed(
-                title="Welcome!",
-                description=f"Hey mmhmmphff {member.mention}!",
-                color=0x00ff00
-            )
-            embed.set_image(url=member.display_avatar.url)
-            await channel.send(embed=embed)
-            logger.info(f"Sent welcome message for {member.name}")
-        
-        # Log to logs channel
-        embed = discord.Embed(
-            title="📥 Member Joined",
-            color=0x2ecc71,
-            timestamp=datetime.utcnow()
-        )
-        embed.add_field(name="User", value=f"{member.mention} ({member})", inline=False)
-        embed.add_field(name="Account Created", value=member.created_at.strftime("%Y-%m-%d %H:%M:%S UTC"), inline=True)
-        
-        # Calculate account age
-        account_age = datetime.utcnow() - member.created_at
-        embed.add_field(name="Account Age", value=f"{account_age.days} days", inline=True)
-        
-        embed.set_thumbnail(url=member.display_avatar.url)
-        
-        await burp_bot.send_log(embed)
-        
+        mode = await join_aggregator.add(member)
+        MEMBER_JOINS.labels(mode).inc()
     except Exception as e:
         logger.error(f"Error in member join: {e}")
 
 @bot.event
 async def on_message(message):
     """Handle auto-moderation and other messages"""
+    start = time.perf_counter()
+    message_cache.add(message)
+    try:
+        await handle_message(message)
+    finally:
+        ON_MESSAGE_SECONDS.observe(time.perf_counter() - start)
+
+def record_filter_stage(stage, seconds, hit):
+    """Per-stage metrics for the on_message filter pipeline"""
+    MESSAGE_FILTER_SECONDS.labels(stage).observe(seconds)
+    if hit:
+        MESSAGE_FILTER_HITS.labels(stage).inc()
+
+# Auto-moderation filters, cheapest first; the first one that hits handles the message
+message_filters = MessageFilterPipeline(on_stage=record_filter_stage)
+message_filters.add(
+    'spam',
+    lambda message: burp_bot.check_spam(message.author.id, message.content)[1],
+    burp_bot.handle_spam,
+    cost=1,
+    enabled=lambda: spam_detection_enabled
+)
+message_filters.add(
+    'invite',
+    lambda message: burp_bot.contains_discord_invite(message.content),
+    lambda message, _: burp_bot.handle_discord_invite(message),
+    cost=2,
+    needs_content=True,
+    enabled=lambda: auto_mod_enabled
+)
+message_filters.add(
+    'blocklist',
+    lambda message: burp_bot.find_blocked_content(message.content),
+    burp_bot.handle_blocked_content,
+    cost=3,
+    needs_content=True,
+    enabled=lambda: auto_mod_enabled and COMPILED_BLOCKLIST is not None
+)
+
+async def handle_message(message):
+    """Run auto-moderation on a message, then process commands"""
     if message.author.bot:
         return
     
     # Skip moderation for the designated admin user
-    if message.author.id == ADMIN_USER_ID:
-        await bot.process_commands(message)
-        return
-    
-    # Check for spam (if enabled)
-    if spam_detection_enabled:
-        is_spam, spam_type = burp_bot.check_spam(message.author.id, message.content)
-        if is_spam:
-            await burp_bot.handle_spam(message, spam_type)
-            return  # Don't process further if message was spam
-    
-    # Check for Discord invite links (auto-moderation)
-    if auto_mod_enabled and burp_bot.contains_discord_invite(message.content):
-        await burp_bot.handle_discord_invite(message)
-        return  # Don't process further if message was moderated
+    if message.author.id != ADMIN_USER_ID:
+        if await message_filters.run(message):
+            return  # Don't process further if message was moderated
     
-    # Process other commands
-    await bot.process_commands(message)
+    # Only parse prefix commands if any are registered
+    if bot.all_commands:
+        await bot.process_commands(message)
 
 # Command error handling now handled within individual slash commands
 
-async def send_links_embed():
-    """Send links embed to links channel on startup"""
+async def build_links_panel():
+    """Build the links channel panel"""
+    embed = discord.Embed(
+        title="Burp Community Links",
+        description="Official Website\nhttps://www.burpcoin.site/\n\nGas Streaks Game\nhttps://www.burpcoin.site/gas-streaks\n\nTwitter/X\nhttps://x.com/burpcoinada",
+        color=0x00ff00,
+    )
+    embed.set_thumbnail(url=await panel_thumbnail_url())
+    return {'embed': embed}
+
+async def panel_thumbnail_url():
+    """The specified user's avatar for panel thumbnails"""
     try:
-        channel = bot.get_channel(LINKS_CHANNEL)
-        if not channel:
-            logger.error(f"Could not find links channel {LINKS_CHANNEL}")
-            return
-        
-        # Clear previous messages (optional)
-        async for message in channel.history(limit=10):
-            if message.author == bot.user:
-                await message.delete()
-        
-        embed = discord.Embed(
-            title="Burp Community Links",
-            description="Official Website\nhttps://www.burpcoin.site/\n\nGas Streaks Game\nhttps://www.burpcoin.site/gas-streaks\n\nTwitter/X\nhttps://x.com/burpcoinada",
-            color=0x00ff00,
-        )
-        
-        # Get the specified user's avatar for thumbnail
-        try:
-            target_user = bot.get_user(1419117925465460878)
-            if target_user:
-                thumbnail_url = target_user.display_avatar.url
-            else:
-                thumbnail_url = "https://www.burpcoin.site/favicon.ico"
-        except:
-            thumbnail_url = "https://www.burpcoin.site/favicon.ico"
-        
-        embed.set_thumbnail(url=thumbnail_url)
-        
-        await channel.send(embed=embed)
-        logger.info("Sent links embed to links channel")
-        
-    except Exception as e:
-        logger.error(f"Error sending links embed: {e}")
+        target_user = await member_lookup.user(1419117925465460878)
+        if target_user:
+            return target_user.display_avatar.url
+    except:
+        pass
+    return "https://www.burpcoin.site/favicon.ico"
 
 class VerificationView(discord.ui.View):
     def __init__(self):
@@ -2102,8 +2818,7 @@ class VerificationView(discord.ui.View):
     @discord.ui.button(label='Start Captcha', style=discord.ButtonStyle.green, emoji='🔐', custom_id='verification_start_captcha')
     async def start_captcha(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Check if user already has the role
-        burper_role = discord.utils.get(interaction.guild.roles, name=BURPER_ROLE_NAME)
-        if burper_role and burper_role in interaction.user.roles:
+        if role_registry.has_role(interaction.user, BURPER_ROLE_NAME):
             await interaction.response.send_message("✅ You're already verified!", ephemeral=True)
             return
         
@@ -2170,7 +2885,7 @@ class KeypadView(discord.ui.View):
     async def check_code(self, interaction: discord.Interaction):
         if self.entered_code == self.correct_code:
             # Grant role
-            burper_role = discord.utils.get(interaction.guild.roles, name=BURPER_ROLE_NAME)
+            burper_role = role_registry.get(interaction.guild, BURPER_ROLE_NAME)
             if burper_role:
                 try:
                     await interaction.user.add_roles(burper_role)
@@ -2312,50 +3027,27 @@ class KeypadView(discord.ui.View):
             else:
                 await self.update_display(interaction)
 
-async def send_verification_embed():
-    """Send verification instructions to verification channel on startup"""
-    try:
-        channel = bot.get_channel(VERIFICATION_CHANNEL)
-        if not channel:
-            logger.error(f"Could not find verification channel {VERIFICATION_CHANNEL}")
-            return
-        
-        # Clear previous messages (optional)
-        async for message in channel.history(limit=10):
-            if message.author == bot.user:
-                await message.delete()
-        
-        embed = discord.Embed(
-            title="Verification Required",
-            description="Get your Burper role to access the full server!",
-            color=0x00ff00,
-        )
-        
-        embed.add_field(
-            name="What You Get",
-            value="• Access to all channels\n• Burper role\n• Community privileges",
-            inline=False
-        )
-        
-        # Get the specified user's avatar for thumbnail
-        try:
-            target_user = bot.get_user(1419117925465460878)
-            if target_user:
-                thumbnail_url = target_user.display_avatar.url
-            else:
-                thumbnail_url = "https://www.burpcoin.site/favicon.ico"
-        except:
-            thumbnail_url = "https://www.burpcoin.site/favicon.ico"
-        
-        embed.set_thumbnail(url=thumbnail_url)
-        
-        # Send with verification button
-        view = VerificationView()
-        await channel.send(embed=embed, view=view)
-        logger.info("Sent verification embed with button to verification channel")
-        
-    except Exception as e:
-        logger.error(f"Error sending verification embed: {e}")
+async def build_verification_panel():
+    """Build the verification channel panel (instructions plus captcha button)"""
+    embed = discord.Embed(
+        title="Verification Required",
+        description="Get your Burper role to access the full server!",
+        color=0x00ff00,
+    )
+    
+    embed.add_field(
+        name="What You Get",
+        value="• Access to all channels\n• Burper role\n• Community privileges",
+        inline=False
+    )
+    
+    embed.set_thumbnail(url=await panel_thumbnail_url())
+    return {'embed': embed, 'view': VerificationView()}
+
+# Persistent panels: edited in place when their content changes, reposted only if deleted
+panel_manager = PanelManager(bot, bot_state)
+panel_manager.register('links', LINKS_CHANNEL, build_links_panel)
+panel_manager.register('verification', VERIFICATION_CHANNEL, build_verification_panel)
 
 # API endpoints for external integration removed - use webhooks instead
 
@@ -2479,23 +3171,268 @@ async def spam_command(interaction: discord.Interaction, action: str = None):
     else:
         await interaction.response.send_message("❌ Invalid option. Use `on`, `off`, or `status`", ephemeral=True)
 
+@bot.tree.command(name='querystats', description='Show the most expensive database queries (Admin only)')
+async def querystats_command(interaction: discord.Interaction, top: int = 10):
+    """Admin command to dump the top-N most expensive queries since startup"""
+    # Check if user is admin
+    if interaction.user.id != ADMIN_USER_ID:
+        await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
+        return
+    
+    profiler = burp_bot.query_profiler
+    entries = profiler.top(max(1, min(top, 10)))  # Keep the embed under 6000 characters
+    if not entries:
+        await interaction.response.send_message("No queries recorded yet.", ephemeral=True)
+        return
+    
+    uptime_minutes = int((time.time() - profiler.started_at) // 60)
+    mean_wait = profiler.acquire_wait_total / profiler.acquire_count if profiler.acquire_count else 0
+    embed = discord.Embed(
+        title="🗄️ Query Statistics",
+        description=f"Top {len(entries)} queries by total time over {uptime_minutes} minutes\n"
+                    f"Pool acquires: {profiler.acquire_count:,} (mean wait {mean_wait * 1000:.1f}ms, max {profiler.acquire_wait_max * 1000:.1f}ms)",
+        color=0x5865F2
+    )
+    for entry in entries:
+        embed.add_field(
+            name=f"{entry.total_time:.2f}s total • {entry.calls:,} calls • {entry.mean_time * 1000:.1f}ms avg • {entry.max_time * 1000:.0f}ms max",
+            value=f"```sql\n{entry.fingerprint[:400]}```rows: {entry.total_rows:,} • errors: {entry.errors}",
+            inline=False
+        )
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+    logger.info(f"Query stats viewed by {interaction.user.name}")
+
+@bot.tree.command(name='memory', description='Snapshot memory usage and show what grew (Admin only)')
+async def memory_command(interaction: discord.Interaction, action: str = None):
+    """Admin command to diff tracemalloc snapshots and size the bot's state containers"""
+    global memory_snapshot_running
+    
+    # Check if user is admin
+    if interaction.user.id != ADMIN_USER_ID:
+        await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
+        return
+    
+    if action and action.lower() in ['stop', 'off']:
+        memory_tracker.stop()
+        await interaction.response.send_message("🧠 Memory tracing stopped.", ephemeral=True)
+        logger.info(f"Memory tracing stopped by {interaction.user.name}")
+        return
+    
+    previous_at = memory_tracker.last_snapshot_at
+    if previous_at and time.time() - previous_at < MEMORY_SNAPSHOT_COOLDOWN:
+        await interaction.response.send_message(f"❌ Please wait {int(MEMORY_SNAPSHOT_COOLDOWN - (time.time() - previous_at))}s between snapshots.", ephemeral=True)
+        return
+    if memory_snapshot_running:
+        await interaction.response.send_message("❌ A snapshot is already being taken.", ephemeral=True)
+        return
+    
+    # Snapshots can take seconds on a large heap; the diffing runs in a worker thread
+    await interaction.response.defer(ephemeral=True)
+    memory_snapshot_running = True
+    try:
+        report = await memory_tracker.snapshot_async(top=8)
+    finally:
+        memory_snapshot_running = False
+    
+    if report.baseline:
+        description = "Tracing started and a baseline snapshot taken. Run `/memory` again later to see what grew."
+    else:
+        description = f"Changes over the last {int((report.taken_at - previous_at) // 60)} minutes"
+    embed = discord.Embed(
+        title="🧠 Memory Report",
+        description=f"{description}\nTraced: {format_bytes(report.traced_current)} (peak {format_bytes(report.traced_peak)})",
+        color=0x5865F2,
+        timestamp=datetime.utcnow()
+    )
+    
+    lines = []
+    for stat in report.containers:
+        size = format_bytes(stat.bytes) if stat.bytes is not None else "-"
+        change = f" ({stat.entries_delta:+,})" if stat.entries_delta else ""
+        lines.append(f"{stat.name[:24]:<24} {stat.entries:>8,}{change} {size:>9}")
+    embed.add_field(name="State Containers (entries, approx size)", value=f"```{chr(10).join(lines)[:1000]}```", inline=False)
+    
+    if report.top_growth:
+        lines = []
+        for stat in report.top_growth:
+            frame = stat.traceback[0]
+            filename = os.path.basename(frame.filename)
+            lines.append(f"{filename}:{frame.lineno} +{format_bytes(stat.size_diff)} ({stat.count_diff:+,} blocks)")
+        embed.add_field(name="Top Growth Since Last Snapshot", value=f"```{chr(10).join(lines)[:1000]}```", inline=False)
+    
+    embed.set_footer(text="Use /memory stop to turn tracing off")
+    await interaction.followup.send(embed=embed, ephemeral=True)
+    logger.info(f"Memory report viewed by {interaction.user.name}")
+
+active_profiler = None
+
+@bot.tree.command(name='profile', description='Sample CPU usage for a while and upload a flamegraph file (Admin only)')
+async def profile_command(interaction: discord.Interaction, seconds: int = 30, format: str = 'speedscope'):
+    """Admin command to run the sampling CPU profiler and post the result to the logs channel"""
+    global active_profiler
+    
+    # Check if user is admin
+    if interaction.user.id != ADMIN_USER_ID:
+        await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
+        return
+    
+    if not StackSampler.available():
+        await interaction.response.send_message("❌ CPU profiling is not supported on this platform.", ephemeral=True)
+        return
+    if active_profiler is not None:
+        await interaction.response.send_message("❌ A profile is already running.", ephemeral=True)
+        return
+    if format not in ['speedscope', 'collapsed']:
+        await interaction.response.send_message("❌ Invalid format. Use `speedscope` or `collapsed`", ephemeral=True)
+        return
+    
+    seconds = max(1, min(seconds, PROFILE_MAX_SECONDS))
+    await interaction.response.send_message(f"🔥 Profiling CPU for {seconds} seconds...", ephemeral=True)
+    logger.info(f"CPU profile ({seconds}s) started by {interaction.user.name}")
+    
+    active_profiler = StackSampler(interval=PROFILE_SAMPLE_INTERVAL)
+    try:
+        active_profiler.start()
+        await asyncio.sleep(seconds)
+    finally:
+        active_profiler.stop()
+        profiler, active_profiler = active_profiler, None
+    
+    if not profiler.sample_count:
+        await interaction.followup.send("The bot was idle: no CPU samples were recorded.", ephemeral=True)
+        return
+    
+    stamp = datetime.utcnow().strftime('%Y%m%d-%H%M%S')
+    if format == 'collapsed':
+        data, filename = profiler.collapsed(), f"burpbot-{stamp}.collapsed.txt"
+    else:
+        data, filename = profiler.speedscope(name=f"burpbot {stamp}"), f"burpbot-{stamp}.speedscope.json"
+    
+    cpu_seconds = profiler.sample_count * profiler.interval
+    embed = discord.Embed(
+        title="🔥 CPU Profile",
+        description=f"{profiler.sample_count:,} samples (~{cpu_seconds:.1f}s CPU) over {seconds}s wall time\n"
+                    f"Open the attached file in https://www.speedscope.app",
+        color=0xe67e22,
+        timestamp=datetime.utcnow()
+    )
+    top = "\n".join(f"{count * 100 / profiler.sample_count:5.1f}% {label[:80]}" for label, count in profiler.top_functions(8))
+    embed.add_field(name="Top Functions (self time)", value=f"```{top[:1000]}```", inline=False)
+    threads = "\n".join(f"{count * 100 / profiler.sample_count:5.1f}% {name[:40]}" for name, count in profiler.thread_totals()[:8])
+    if not profiler.per_thread:
+        threads += "\n(no per-thread CPU clocks: other threads' CPU is charged to the main thread)"
+    embed.add_field(name="CPU by Thread", value=f"```{threads[:1000]}```", inline=False)
+    embed.set_footer(text=f"Requested by {interaction.user.name}")
+    
+    logs_channel = cached_channel(LOGS_CHANNEL)
+    if logs_channel:
+        message = await logs_channel.send(embed=embed, file=discord.File(io.BytesIO(data.encode()), filename=filename))
+        await interaction.followup.send(f"✅ Profile uploaded: {message.jump_url}", ephemeral=True)
+    else:
+        await interaction.followup.send(embed=embed, file=discord.File(io.BytesIO(data.encode()), filename=filename), ephemeral=True)
+
+@bot.tree.command(name='tracestats', description='Show announcement latency from DB insert or webhook to Discord (Admin only)')
+async def tracestats_command(interaction: discord.Interaction):
+    """Admin command to summarise recent announcement traces"""
+    # Check if user is admin
+    if interaction.user.id != ADMIN_USER_ID:
+        await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
+        return
+    
+    summary = tracer.summary()
+    if not summary:
+        await interaction.response.send_message("No announcements traced yet.", ephemeral=True)
+        return
+    
+    def rows(names):
+        lines = []
+        for name in names:
+            count, p50, p99, worst = summary[name]
+            lines.append(f"{name[:28]:<28} {count:>5} {p50 * 1000:>9.0f} {p99 * 1000:>9.0f} {worst * 1000:>9.0f}")
+        header = f"{'':<28} {'n':>5} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+        return f"```{header}\n" + "\n".join(lines)[:900] + "```"
+    
+    end_to_end = [name for name in ('db_insert_to_detected', 'db_insert_to_post', 'webhook_to_post') if name in summary]
+    spans = [name for name in summary if name not in end_to_end]
+    
+    embed = discord.Embed(
+        title="🛰️ Announcement Traces",
+        description=f"Last {tracer.window} samples per stage" + (f" • spans written to `{tracer.path}`" if tracer.path else ""),
+        color=0x5865F2,
+        timestamp=datetime.utcnow()
+    )
+    if end_to_end:
+        embed.add_field(name="End to End", value=rows(end_to_end), inline=False)
+    if spans:
+        embed.add_field(name="Spans", value=rows(spans), inline=False)
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+    logger.info(f"Trace stats viewed by {interaction.user.name}")
+
+@bot.tree.command(name='synccommands', description='Force a slash command sync with Discord (Admin only)')
+async def synccommands_command(interaction: discord.Interaction):
+    """Admin command to sync the command tree even if it looks unchanged"""
+    # Check if user is admin
+    if interaction.user.id != ADMIN_USER_ID:
+        await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
+        return
+    
+    await interaction.response.defer(ephemeral=True)
+    try:
+        synced = await sync_command_tree(force=True)
+        await interaction.followup.send(f"✅ Synced {len(synced)} command(s). Changes can take a few minutes to appear.", ephemeral=True)
+        logger.info(f"Command sync forced by {interaction.user.name}")
+    except Exception as e:
+        logger.error(f"Failed to sync commands: {e}")
+        await interaction.followup.send(f"❌ Sync failed: {e}", ephemeral=True)
+
 # HTTP webhook endpoints (for integration with your gas streaks app)
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 import threading
 
 app = Flask(__name__)
 
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    start = getattr(g, 'request_start', None)
+    if start is not None and request.endpoint != 'metrics_endpoint':
+        WEBHOOK_REQUEST_SECONDS.labels(request.endpoint or 'unknown', str(response.status_code)).observe(time.perf_counter() - start)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+async def run_traced_announcement(send, event, parent):
+    """Run a webhook announcement on the bot loop as a child of the request's span"""
+    with tracer.span('webhook.dispatch', parent=parent, game_id=event.get('game_id')) as span:
+        span.set(queued_ms=round((span.start_wall - parent.start_wall) * 1000, 3))
+        await send(event)
+
 @app.route('/webhook/winner', methods=['POST'])
 def webhook_winner():
     """Webhook endpoint for winner announcements"""
     try:
         data = request.json
         
-        # Schedule the announcement
-        asyncio.run_coroutine_threadsafe(
-            burp_bot.send_winner_announcement(data),
-            bot.loop
-        )
+        # Accept a single event or a batch (list) of events
+        events = data if isinstance(data, list) else [data]
+        
+        # Schedule the announcements
+        with tracer.span('webhook.winner', events=len(events)) as span:
+            for event in events:
+                future = asyncio.run_coroutine_threadsafe(
+                    run_traced_announcement(burp_bot.send_winner_announcement, event, span),
+                    bot.loop
+                )
+                WEBHOOK_SCHEDULED.inc()
+                future.add_done_callback(lambda _: WEBHOOK_COMPLETED.inc())
         
         return jsonify({"status": "success"}), 200
     except Exception as e:
@@ -2508,11 +3445,18 @@ def webhook_new_pool():
     try:
         data = request.json
         
-        # Schedule the announcement
-        asyncio.run_coroutine_threadsafe(
-            burp_bot.send_new_prize_pool_announcement(data),
-            bot.loop
-        )
+        # Accept a single event or a batch (list) of events
+        events = data if isinstance(data, list) else [data]
+        
+        # Schedule the announcements
+        with tracer.span('webhook.new_pool', events=len(events)) as span:
+            for event in events:
+                future = asyncio.run_coroutine_threadsafe(
+                    run_traced_announcement(burp_bot.send_new_pool_type_announcement, event, span),
+                    bot.loop
+                )
+                WEBHOOK_SCHEDULED.inc()
+                future.add_done_callback(lambda _: WEBHOOK_COMPLETED.inc())
         
         return jsonify({"status": "success"}), 200
     except Exception as e:
@@ -2524,9 +3468,17 @@ def run_flask():
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
 
 if __name__ == '__main__':
+    # Optionally record gateway events for benchmarks/gateway_replay.py
+    if os.environ.get('GATEWAY_RECORD_PATH'):
+        gateway_recorder = GatewayRecorder(
+            os.environ['GATEWAY_RECORD_PATH'],
+            anonymise=os.environ.get('GATEWAY_RECORD_RAW') != '1'
+        )
+        gateway_recorder.attach(bot)
+    
     # Start Flask server in a separate thread for webhooks
     flask_thread = threading.Thread(target=run_flask, daemon=True)
     flask_thread.start()
     
-    # Start Discord bot
-    bot.run(os.environ.get('DISCORD_BOT_TOKEN'))
+    # Start Discord bot (logging is already configured above)
+    bot.run(os.environ.get('DISCORD_BOT_TOKEN'), log_handler=None)
@@ -0,0 +1,150 @@
+"""
+Gateway event recorder for the Burp bot
+
+Records messages, member joins/removes and interactions as they reach the
+bot, with their arrival time, to a gzip-compressed JSON-lines file. The file
+is replayed by benchmarks/gateway_replay.py.
+
+Recordings are anonymised by default: user, message and guild IDs are
+replaced by stable salted hashes, and message text is replaced word by word
+with hashed tokens. Repeated words stay repeated and invite links keep their
+domain, so spam and invite detection behave the same on replay.
+"""
+
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+_INVITE_DOMAIN = re.compile(r"((?:discord\.gg|discord(?:app)?\.com/invite|dsc\.gg)/)([a-zA-Z0-9]+)", re.IGNORECASE)
+
+
+class Anonymiser:
+    """Stable salted hashing of IDs and message words"""
+
+    def __init__(self, salt=None):
+        self.salt = (salt or os.urandom(16).hex()).encode()
+
+    def _digest(self, value):
+        return hashlib.blake2b(str(value).encode(), key=self.salt[:64], digest_size=8).digest()
+
+    def id(self, value):
+        if value is None:
+            return None
+        # Keep it a positive 63-bit integer so it still looks like a snowflake
+        return int.from_bytes(self._digest(value), "big") >> 1
+
+    def word(self, word):
+        invite = _INVITE_DOMAIN.search(word)
+        if invite:
+            return f"{invite.group(1)}{self._digest(invite.group(2)).hex()[:8]}"
+        return "w" + self._digest(word).hex()[:6]
+
+    def text(self, content):
+        if not content:
+            return content
+        return " ".join(self.word(word) for word in content.split())
+
+
+class _Passthrough:
+    def id(self, value):
+        return value
+
+    def text(self, content):
+        return content
+
+
+class GatewayRecorder:
+    """Appends gateway events to a compact recording file"""
+
+    def __init__(self, path, anonymise=True, salt=None):
+        self.path = path
+        self.anon = Anonymiser(salt) if anonymise else _Passthrough()
+        self.started = time.monotonic()
+        self.events = 0
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._write({"v": FORMAT_VERSION, "type": "header", "anonymised": anonymise, "wall": time.time()})
+        atexit.register(self.close)
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+    def _record(self, event_type, **fields):
+        try:
+            fields["type"] = event_type
+            fields["t"] = round(time.monotonic() - self.started, 4)
+            self._write(fields)
+            self.events += 1
+            # Flush periodically so a crash loses little
+            if self.events % 100 == 0:
+                self._file.flush()
+        except Exception as e:
+            logger.error(f"Error recording gateway event: {e}")
+
+    def attach(self, bot):
+        """Register recording listeners alongside the bot's own event handlers"""
+        bot.add_listener(self.on_message, "on_message")
+        bot.add_listener(self.on_member_join, "on_member_join")
+        bot.add_listener(self.on_member_remove, "on_member_remove")
+        bot.add_listener(self.on_interaction, "on_interaction")
+        logger.info(f"Recording gateway events to {self.path}")
+
+    def close(self):
+        self._file.close()
+
+    async def on_message(self, message):
+        a = self.anon
+        self._record(
+            "message",
+            id=a.id(message.id),
+            author=a.id(message.author.id),
+            bot=message.author.bot,
+            channel=a.id(message.channel.id),
+            content=a.text(message.content),
+            attachments=len(message.attachments)
+        )
+
+    async def on_member_join(self, member):
+        a = self.anon
+        self._record(
+            "member_join",
+            user=a.id(member.id),
+            guild=a.id(member.guild.id),
+            created=member.created_at.timestamp() if member.created_at else None
+        )
+
+    async def on_member_remove(self, member):
+        a = self.anon
+        self._record(
+            "member_remove",
+            user=a.id(member.id),
+            guild=a.id(member.guild.id),
+            joined=member.joined_at.timestamp() if member.joined_at else None
+        )
+
+    async def on_interaction(self, interaction):
+        a = self.anon
+        data = interaction.data or {}
+        self._record(
+            "interaction",
+            user=a.id(interaction.user.id),
+            kind=interaction.type.name,
+            command=data.get("name"),
+            custom_id=data.get("custom_id")
+        )
+
+
+def read_recording(path):
+    """Yield the recorded events (header excluded) in order"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry.get("type") != "header":
+                yield entry
@@ -0,0 +1,192 @@
+"""
+Incrementally maintained guild membership counters
+
+Keeps per-guild totals (members, verified role holders, online members, joins
+today) up to date from member and presence events, so reading them is O(1)
+instead of a pass over guild.members. A periodic full reconciliation corrects
+any drift from missed events.
+
+Without a member cache discord.py doesn't dispatch member updates and a
+departed member's roles are unknown, so with track_member_ids the counters
+keep each guild's verified member IDs themselves. Raw GUILD_MEMBER_UPDATE
+payloads (which carry role IDs) keep that set current, and a leave only
+needs the user ID.
+"""
+
+from datetime import datetime
+
+import discord
+
+
+class GuildCounts:
+    __slots__ = ("total", "verified", "online", "joins_today", "day", "reconciled_at")
+
+    def __init__(self):
+        self.total = 0
+        self.verified = 0
+        self.online = 0
+        self.joins_today = 0
+        self.day = datetime.utcnow().date()
+        self.reconciled_at = None
+
+    def roll_day(self):
+        today = datetime.utcnow().date()
+        if today != self.day:
+            self.day = today
+            self.joins_today = 0
+
+
+def _is_online(member):
+    return getattr(member, "status", discord.Status.offline) != discord.Status.offline
+
+
+class GuildCounters:
+    """Per-guild member, verified, online and joins-today counts"""
+
+    def __init__(self, verified_role_name, track_presences=True, roles=None, track_member_ids=False):
+        """
+        Args:
+            verified_role_name: Name of the role counted as verified
+            track_presences: Whether online counts come from presence events
+                             (needs the presences intent); if False they are
+                             only set by set_online()
+            roles: Optional RoleRegistry used to resolve the verified role
+            track_member_ids: Keep the IDs of verified members so leaves and
+                              raw member updates can be counted without
+                              cached Member objects (lean member cache)
+        """
+        self.verified_role_name = verified_role_name
+        self.track_presences = track_presences
+        self.roles = roles
+        self.track_member_ids = track_member_ids
+        self._guilds = {}
+        self._verified_ids = {}  # guild_id -> set of verified member IDs (track_member_ids only)
+
+    def _counts(self, guild_id):
+        counts = self._guilds.get(guild_id)
+        if counts is None:
+            counts = self._guilds[guild_id] = GuildCounts()
+        return counts
+
+    def _verified_role(self, guild):
+        if self.roles is not None:
+            return self.roles.get(guild, self.verified_role_name)
+        return discord.utils.get(guild.roles, name=self.verified_role_name)
+
+    def _is_verified(self, member):
+        if self.roles is not None:
+            return self.roles.has_role(member, self.verified_role_name)
+        return any(role.name == self.verified_role_name for role in member.roles)
+
+    def _set_verified(self, guild_id, user_id, verified):
+        """Record a member's verified state in the ID set, adjusting the count if it changed"""
+        ids = self._verified_ids.setdefault(guild_id, set())
+        if (user_id in ids) == verified:
+            return
+        counts = self._counts(guild_id)
+        if verified:
+            ids.add(user_id)
+            counts.verified += 1
+        else:
+            ids.discard(user_id)
+            counts.verified = max(0, counts.verified - 1)
+
+    def verified_ids_count(self):
+        return sum(len(ids) for ids in self._verified_ids.values())
+
+    def reconcile(self, guild):
+        """
+        Recount with a full pass over the guild's cached members
+
+        Role and presence counts are only recomputed when the member cache is
+        complete (guild.chunked); otherwise they are left for
+        reconcile_from_api.
+        """
+        counts = self._counts(guild.id)
+        counts.roll_day()
+        counts.total = guild.member_count or len(guild.members)
+        if guild.chunked:
+            role = self._verified_role(guild)
+            counts.verified = len(role.members) if role else 0
+            if self.track_member_ids:
+                self._verified_ids[guild.id] = {member.id for member in role.members} if role else set()
+            if self.track_presences:
+                counts.online = sum(1 for member in guild.members if _is_online(member))
+        counts.reconciled_at = datetime.utcnow()
+        return counts
+
+    async def reconcile_from_api(self, guild):
+        """Recount verified members by streaming the member list over HTTP (nothing is cached)"""
+        counts = self._counts(guild.id)
+        role = self._verified_role(guild)
+        total = 0
+        verified_ids = set()
+        async for member in guild.fetch_members(limit=None):
+            total += 1
+            if role and member.get_role(role.id):
+                verified_ids.add(member.id)
+        counts.roll_day()
+        counts.total = total
+        counts.verified = len(verified_ids)
+        if self.track_member_ids:
+            self._verified_ids[guild.id] = verified_ids
+        counts.reconciled_at = datetime.utcnow()
+        return counts
+
+    def set_online(self, guild_id, online):
+        self._counts(guild_id).online = online
+
+    def member_joined(self, member):
+        counts = self._counts(member.guild.id)
+        counts.roll_day()
+        counts.total += 1
+        counts.joins_today += 1
+        if self.track_member_ids:
+            self._set_verified(member.guild.id, member.id, self._is_verified(member))
+        elif self._is_verified(member):
+            counts.verified += 1
+        if self.track_presences and _is_online(member):
+            counts.online += 1
+
+    def member_removed(self, member):
+        counts = self._counts(member.guild.id)
+        counts.total = max(0, counts.total - 1)
+        if self.track_member_ids:
+            self._set_verified(member.guild.id, member.id, False)
+        elif self._is_verified(member):
+            counts.verified = max(0, counts.verified - 1)
+        if self.track_presences and _is_online(member):
+            counts.online = max(0, counts.online - 1)
+
+    def member_updated(self, before, after):
+        if self.track_member_ids:
+            self._set_verified(after.guild.id, after.id, self._is_verified(after))
+            return
+        was, now = self._is_verified(before), self._is_verified(after)
+        if was != now:
+            counts = self._counts(after.guild.id)
+            counts.verified = max(0, counts.verified + (1 if now else -1))
+
+    def member_payload_updated(self, guild, data):
+        """Count a raw GUILD_MEMBER_UPDATE payload (dispatched for cached and uncached members alike)"""
+        if not self.track_member_ids:
+            return
+        role = self._verified_role(guild)
+        verified = role is not None and str(role.id) in data.get("roles", ())
+        self._set_verified(guild.id, int(data["user"]["id"]), verified)
+
+    def presence_updated(self, before, after):
+        if not self.track_presences:
+            return
+        was, now = _is_online(before), _is_online(after)
+        if was != now:
+            counts = self._counts(after.guild.id)
+            counts.online = max(0, counts.online + (1 if now else -1))
+
+    def get(self, guild):
+        """Current counts for a guild (reconciled on first use)"""
+        counts = self._guilds.get(guild.id)
+        if counts is None or counts.reconciled_at is None:
+            counts = self.reconcile(guild)
+        counts.roll_day()
+        return counts
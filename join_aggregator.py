@@ -0,0 +1,120 @@
+"""
+Join burst aggregation for welcome messages
+
+At normal join rates every member gets their own welcome. Once joins in the
+last `rate_window` seconds reach `threshold` the aggregator switches to burst
+mode: members are queued and flushed as one batched welcome (plus one summary
+log) per window. The window grows with the join rate, so a bigger raid means
+fewer, larger batches. Burst mode ends once the rate falls back below half
+the threshold and the queue is empty.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class JoinAggregator:
+    """Switches between individual and batched welcomes based on the join rate"""
+
+    def __init__(self, send_single, send_batch, threshold=10, rate_window=60,
+                 min_window=5, max_window=30, max_batch=50):
+        """
+        Args:
+            send_single: Coroutine function welcoming one member
+            send_batch: Coroutine function welcoming a list of members
+            threshold: Joins within rate_window that switch on burst mode
+            rate_window: Seconds over which the join rate is measured
+            min_window: Shortest batching window in seconds
+            max_window: Longest batching window in seconds
+            max_batch: Most members in one batched welcome
+        """
+        self.send_single = send_single
+        self.send_batch = send_batch
+        self.threshold = threshold
+        self.rate_window = rate_window
+        self.min_window = min_window
+        self.max_window = max_window
+        self.max_batch = max_batch
+        self.bursting = False
+        self.batches_sent = 0
+        self._joins = deque()
+        self._pending = []
+        self._flush_task = None
+
+    def _trim(self, now):
+        cutoff = now - self.rate_window
+        while self._joins and self._joins[0] < cutoff:
+            self._joins.popleft()
+
+    def rate(self):
+        """Joins within the last rate_window seconds"""
+        self._trim(time.monotonic())
+        return len(self._joins)
+
+    def window(self):
+        """Current batching window: min_window at the threshold, scaled up with the rate"""
+        scaled = self.min_window * self.rate() / max(1, self.threshold)
+        return max(self.min_window, min(self.max_window, scaled))
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    async def add(self, member):
+        """
+        Record a join and welcome the member
+
+        Returns:
+            'single' if welcomed immediately, 'batched' if queued for a batch
+        """
+        now = time.monotonic()
+        self._joins.append(now)
+        self._trim(now)
+
+        if self.bursting and not self._pending and len(self._joins) < self.threshold / 2:
+            self._end_burst()
+        elif not self.bursting and len(self._joins) >= self.threshold:
+            self.bursting = True
+            logger.warning(f"Join burst: {len(self._joins)} joins in {self.rate_window}s, batching welcomes")
+
+        if not self.bursting:
+            try:
+                await self.send_single(member)
+            except Exception as e:
+                logger.error(f"Error sending welcome: {e}")
+            return "single"
+
+        self._pending.append(member)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        return "batched"
+
+    def _end_burst(self):
+        self.bursting = False
+        logger.info("Join burst over, welcoming members individually")
+
+    async def _send_pending(self):
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            try:
+                await self.send_batch(batch)
+                self.batches_sent += 1
+            except Exception as e:
+                logger.error(f"Error sending batched welcome for {len(batch)} members: {e}")
+
+    async def _flush_loop(self):
+        while self._pending:
+            await asyncio.sleep(self.window())
+            await self._send_pending()
+        if self.rate() < self.threshold / 2:
+            self._end_burst()
+
+    async def flush(self):
+        """Send anything queued now (e.g. on shutdown)"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self._send_pending()
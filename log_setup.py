@@ -0,0 +1,142 @@
+"""
+Non-blocking structured logging for the Burp bot
+
+Log calls on the event loop only copy the record onto a bounded queue; a
+QueueListener thread formats it as one JSON object per line and writes it to
+stderr. When the queue is full the record is dropped and counted instead of
+stalling the loop, and the number of dropped records is logged once there is
+room again. A sampling filter thins out known high-volume lines.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+
+# Attributes present on every LogRecord; anything else was passed via `extra`
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only 1 in N records matching a rule
+
+    Each rule is (logger_name, message_prefix, keep_every): records from that
+    logger (or its children) whose message starts with message_prefix (None
+    matches any message) are passed through once every keep_every times.
+    WARNING and above are never sampled.
+    """
+
+    def __init__(self, rules):
+        super().__init__()
+        self.rules = [(name, prefix, max(1, int(every))) for name, prefix, every in rules]
+        self.seen = [0] * len(self.rules)
+        self.sampled_out = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        for index, (name, prefix, every) in enumerate(self.rules):
+            if record.name != name and not record.name.startswith(name + "."):
+                continue
+            if prefix is not None and not str(record.msg).startswith(prefix):
+                continue
+            self.seen[index] += 1
+            if (self.seen[index] - 1) % every:
+                self.sampled_out += 1
+                return False
+            return True
+        return True
+
+
+class DropCountingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: records are dropped and counted when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported_drops = 0
+
+    def prepare(self, record):
+        # Only resolve %-args on the calling thread; JSON formatting happens in the listener
+        record = copy.copy(record)
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self._unreported_drops:
+                notice = logging.LogRecord(
+                    __name__, logging.WARNING, __file__, 0,
+                    f"Dropped {self._unreported_drops} log record(s): log queue was full", None, None
+                )
+                self.queue.put_nowait(notice)
+                self._unreported_drops = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported_drops += 1
+
+
+def configure_logging(level=logging.INFO, queue_size=10000, json_output=True, sampling_rules=()):
+    """
+    Route all logging through a bounded queue to a background writer thread
+
+    Args:
+        level: Root logger level
+        queue_size: Maximum records waiting to be written
+        json_output: Write JSON lines if True, plain text otherwise
+        sampling_rules: Rules for SamplingFilter, see its docstring
+
+    Returns:
+        The installed DropCountingQueueHandler (exposes `dropped`)
+    """
+    log_queue = queue.Queue(maxsize=queue_size)
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if json_output:
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    queue_handler = DropCountingQueueHandler(log_queue)
+    queue_handler.sampling_filter = SamplingFilter(sampling_rules)
+    queue_handler.addFilter(queue_handler.sampling_filter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    queue_handler.listener = listener
+    return queue_handler
@@ -0,0 +1,146 @@
+"""
+Event-loop lag watchdog for the Burp bot
+
+A heartbeat task on the event loop wakes up every `interval` seconds and
+records how late it was scheduled (the loop lag). A separate daemon thread
+watches the heartbeat; when it has not ticked for longer than `threshold`
+the loop is blocked, so the thread captures the loop thread's current stack
+with sys._current_frames(). That stack points at the blocking coroutine or
+callback, and the innermost frame outside the standard library and
+site-packages is reported as its source location.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+_LIBRARY_PATHS = tuple(
+    os.path.normcase(os.path.abspath(path))
+    for path in {sysconfig.get_paths().get(name) for name in ("stdlib", "platstdlib", "purelib", "platlib")}
+    if path
+)
+
+
+def _is_library_frame(filename):
+    filename = os.path.normcase(os.path.abspath(filename))
+    return filename.startswith(_LIBRARY_PATHS) or filename == os.path.normcase(os.path.abspath(__file__))
+
+
+class StallReport:
+    """A captured blocking episode of the event loop"""
+    __slots__ = ("detected_at", "blocked_for", "stack", "location")
+
+    def __init__(self, detected_at, blocked_for, stack, location):
+        self.detected_at = detected_at
+        self.blocked_for = blocked_for
+        self.stack = stack
+        self.location = location
+
+    def format_stack(self, limit=15):
+        return "".join(traceback.format_list(self.stack[-limit:]))
+
+
+class LoopWatchdog:
+    """Measures event-loop scheduling lag and captures stacks of blocking calls"""
+
+    def __init__(self, interval=0.25, threshold=0.5, histogram=None, on_stall=None, max_reports=50):
+        """
+        Args:
+            interval: Seconds between heartbeat ticks on the loop
+            threshold: Seconds without a heartbeat before the loop counts as blocked
+            histogram: Optional metrics histogram receiving every lag sample
+            on_stall: Optional coroutine function called on the loop with a
+                      StallReport once the loop is responsive again
+            max_reports: Recent stall reports kept in memory
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.histogram = histogram
+        self.on_stall = on_stall
+        self.reports = deque(maxlen=max_reports)
+        self.max_lag = 0.0
+        self._loop = None
+        self._loop_thread_id = None
+        self._last_beat = time.monotonic()
+        self._heartbeat_task = None
+        self._monitor_thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._heartbeat_task is not None and not self._heartbeat_task.done()
+
+    def start(self):
+        """Start the watchdog; must be called from the event loop thread"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._monitor_thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._monitor_thread.start()
+        logger.info(f"Event-loop watchdog started (interval {self.interval}s, threshold {self.threshold}s)")
+
+    def stop(self):
+        self._stop.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._last_beat = now
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if self.histogram is not None:
+                self.histogram.observe(lag)
+
+    def _monitor(self):
+        reported_beat = None
+        while not self._stop.wait(self.interval / 2):
+            last_beat = self._last_beat
+            blocked_for = time.monotonic() - last_beat - self.interval
+            if blocked_for < self.threshold or last_beat == reported_beat:
+                continue
+
+            # Report each stall once, with the stack at the moment it crossed the threshold
+            reported_beat = last_beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            del frame
+            location = next(
+                (entry for entry in reversed(stack) if not _is_library_frame(entry.filename)),
+                stack[-1] if stack else None
+            )
+            report = StallReport(time.time(), blocked_for, stack, location)
+            self.reports.append(report)
+
+            where = f"{location.filename}:{location.lineno} in {location.name}" if location else "unknown"
+            logger.warning(f"Event loop blocked for at least {blocked_for * 1000:.0f}ms at {where}\n{report.format_stack()}")
+
+            if self.on_stall is not None:
+                # Runs as soon as the loop is free again
+                self._loop.call_soon_threadsafe(self._dispatch, report)
+
+    def _dispatch(self, report):
+        task = self._loop.create_task(self.on_stall(report))
+        task.add_done_callback(self._log_dispatch_error)
+
+    def _log_dispatch_error(self, task):
+        if not task.cancelled() and task.exception():
+            logger.error(f"Error reporting loop stall: {task.exception()}")
@@ -0,0 +1,141 @@
+"""
+On-demand member and user lookups for running without a full member cache
+
+With chunk_guilds_at_startup=False and restricted MemberCacheFlags most
+members are not in discord.py's cache. Lookups here check that cache first,
+then a small TTL cache, and only then fetch over HTTP, so repeated lookups of
+the same member in a burst (verification waves, join/leave logging) cost one
+request.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class _TTLCache:
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._items = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            return None
+        if item[0] < time.monotonic():
+            del self._items[key]
+            return None
+        return item[1]
+
+    def put(self, key, value):
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def pop(self, key):
+        item = self._items.pop(key, None)
+        return item[1] if item and item[0] >= time.monotonic() else None
+
+    def __len__(self):
+        return len(self._items)
+
+
+class MemberLookup:
+    """Member/user resolution: discord.py cache, then TTL cache, then API"""
+
+    def __init__(self, bot, member_ttl=300, user_ttl=3600, max_entries=5000, on_lookup=None):
+        """
+        Args:
+            bot: The discord.py client
+            member_ttl: Seconds a fetched member is reused
+            user_ttl: Seconds a fetched user is reused
+            max_entries: Upper bound on entries in each TTL cache
+            on_lookup: Optional callable receiving 'hit' or 'miss' for each
+                       lookup that wasn't answered by discord.py's cache
+        """
+        self.bot = bot
+        self.on_lookup = on_lookup
+        self._members = _TTLCache(member_ttl, max_entries)
+        self._users = _TTLCache(user_ttl, max_entries)
+
+    def _count(self, result):
+        if self.on_lookup:
+            self.on_lookup(result)
+
+    def remember(self, member):
+        """Keep a member seen in an event payload for later lookups"""
+        self._members.put((member.guild.id, member.id), member)
+
+    def forget(self, guild_id, user_id):
+        """Drop and return a remembered member (e.g. when they leave)"""
+        return self._members.pop((guild_id, user_id))
+
+    async def member(self, guild, user_id):
+        """Resolve a guild member, or None if they aren't in the guild"""
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+
+        key = (guild.id, user_id)
+        member = self._members.get(key)
+        if member is not None:
+            self._count("hit")
+            return member
+
+        self._count("miss")
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching member {user_id}: {e}")
+            return None
+        self._members.put(key, member)
+        return member
+
+    async def user(self, user_id):
+        """Resolve a user, or None if they don't exist"""
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            return user
+
+        user = self._users.get(user_id)
+        if user is not None:
+            self._count("hit")
+            return user
+
+        self._count("miss")
+        try:
+            user = await self.bot.fetch_user(user_id)
+        except discord.NotFound:
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching user {user_id}: {e}")
+            return None
+        self._users.put(user_id, user)
+        return user
+
+
+class DepartedMember:
+    """Stand-in for a member who left while not in the member cache"""
+
+    def __init__(self, user, guild):
+        self._user = user
+        self.guild = guild
+        self.joined_at = None
+        self.roles = []
+
+    def get_role(self, role_id):
+        return None
+
+    def __getattr__(self, name):
+        return getattr(self._user, name)
+
+    def __str__(self):
+        return str(self._user)
@@ -0,0 +1,230 @@
+"""
+On-demand memory attribution for the Burp bot
+
+Takes tracemalloc snapshots and diffs each one against the previous, so the
+top allocation sites show what grew between two checks. Known state
+containers (cooldown dicts, message history, caches) are registered by name
+and reported with their entry count and an approximate deep size.
+
+tracemalloc is only started by the first snapshot and can be stopped again,
+so there is no tracing overhead until someone asks for it.
+"""
+
+import asyncio
+import sys
+import time
+import tracemalloc
+
+# Don't attribute the profiler's own bookkeeping
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+_CONTAINERS = (dict, list, tuple, set, frozenset)
+
+
+def approx_sizeof(obj, sample=200):
+    """
+    Approximate deep size in bytes of a container and its entries
+
+    Builtin containers are followed recursively; other objects count their own
+    size plus their direct attribute values, without following references into
+    other objects (a cached member must not count the whole guild). Containers
+    with more than `sample` entries are measured on a sample and extrapolated.
+    """
+    return _sizeof(obj, set(), sample)
+
+
+def _sizeof(obj, seen, sample):
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        items = obj.items()
+        count = len(obj)
+        measured = 0
+        for index, (key, value) in enumerate(items):
+            if index >= sample:
+                break
+            measured += _sizeof(key, seen, sample) + _sizeof(value, seen, sample)
+        return size + _extrapolate(measured, min(count, sample), count)
+
+    if isinstance(obj, _CONTAINERS) or type(obj).__name__ == "deque":
+        count = len(obj)
+        measured = 0
+        for index, item in enumerate(obj):
+            if index >= sample:
+                break
+            measured += _sizeof(item, seen, sample)
+        return size + _extrapolate(measured, min(count, sample), count)
+
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return size
+
+    # Arbitrary object: own attributes one level deep
+    for value in _attribute_values(obj):
+        if id(value) not in seen and isinstance(value, (str, bytes, int, float, tuple)):
+            seen.add(id(value))
+            size += sys.getsizeof(value)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def _extrapolate(measured, sampled, total):
+    if not sampled:
+        return 0
+    return int(measured * total / sampled)
+
+
+def _attribute_values(obj):
+    if hasattr(obj, "__dict__"):
+        yield from vars(obj).values()
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            try:
+                yield getattr(obj, slot)
+            except AttributeError:
+                continue
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+class ContainerStats:
+    __slots__ = ("name", "entries", "bytes", "entries_delta", "bytes_delta")
+
+    def __init__(self, name, entries, size, entries_delta, bytes_delta):
+        self.name = name
+        self.entries = entries
+        self.bytes = size
+        self.entries_delta = entries_delta
+        self.bytes_delta = bytes_delta
+
+
+class MemoryReport:
+    def __init__(self, taken_at, traced_current, traced_peak, top_growth, containers, baseline):
+        self.taken_at = taken_at
+        self.traced_current = traced_current
+        self.traced_peak = traced_peak
+        self.top_growth = top_growth      # list of tracemalloc.StatisticDiff
+        self.containers = containers      # list of ContainerStats
+        self.baseline = baseline          # True if this was the first snapshot (nothing to diff)
+
+
+class MemoryTracker:
+    """Snapshots tracemalloc and named state containers, diffing each against the previous"""
+
+    def __init__(self, frames=10):
+        """
+        Args:
+            frames: Stack depth tracemalloc records per allocation
+        """
+        self.frames = frames
+        self._containers = {}
+        self._previous_snapshot = None
+        self._previous_containers = {}
+        self.last_snapshot_at = None
+
+    def register(self, name, getter, size=True):
+        """
+        Track a state container
+
+        Args:
+            name: Label used in reports
+            getter: Callable returning the container, or an int entry count
+            size: Whether to estimate the container's deep size
+        """
+        self._containers[name] = (getter, size)
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def stop(self):
+        """Stop tracing and forget the previous snapshot"""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._previous_snapshot = None
+        self.last_snapshot_at = None
+
+    def container_stats(self):
+        stats = []
+        for name, (getter, measure) in self._containers.items():
+            try:
+                value = getter()
+            except Exception:
+                continue
+            if isinstance(value, int):
+                entries, size = value, None
+            else:
+                entries = len(value)
+                size = approx_sizeof(value) if measure else None
+            previous = self._previous_containers.get(name)
+            stats.append(ContainerStats(
+                name, entries, size,
+                entries - previous[0] if previous else None,
+                size - previous[1] if previous and size is not None and previous[1] is not None else None
+            ))
+        return stats
+
+    def _start(self):
+        baseline = not tracemalloc.is_tracing() or self._previous_snapshot is None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        return baseline
+
+    def _take_and_diff(self, top):
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        top_growth = []
+        if self._previous_snapshot is not None:
+            top_growth = [
+                stat for stat in snapshot.compare_to(self._previous_snapshot, "lineno")
+                if stat.size_diff > 0
+            ][:top]
+        return snapshot, top_growth
+
+    def _finish(self, snapshot, top_growth, containers, baseline):
+        current, peak = tracemalloc.get_traced_memory()
+        self._previous_snapshot = snapshot
+        self._previous_containers = {stat.name: (stat.entries, stat.bytes) for stat in containers}
+        self.last_snapshot_at = time.time()
+        return MemoryReport(self.last_snapshot_at, current, peak, top_growth, containers, baseline)
+
+    def snapshot(self, top=10):
+        """
+        Take a snapshot and diff it against the previous one
+
+        The first call starts tracemalloc and only records a baseline. This
+        runs entirely in the calling thread; from the event loop use
+        snapshot_async().
+
+        Returns:
+            MemoryReport
+        """
+        baseline = self._start()
+        snapshot, top_growth = self._take_and_diff(top)
+        return self._finish(snapshot, top_growth, self.container_stats(), baseline)
+
+    async def snapshot_async(self, top=10):
+        """
+        snapshot() with the tracemalloc work moved to a worker thread
+
+        Copying and diffing the traces takes seconds on a large heap. Only
+        the trace copy inside take_snapshot() still holds the GIL throughout;
+        the filtering and diffing yield to the event loop like any other
+        thread. Container sizes are sampled, so they are measured on the loop
+        where the containers are safe to iterate.
+        """
+        baseline = self._start()
+        containers = self.container_stats()
+        snapshot, top_growth = await asyncio.to_thread(self._take_and_diff, top)
+        return self._finish(snapshot, top_growth, containers, baseline)
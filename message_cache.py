@@ -0,0 +1,117 @@
+"""
+Compact LRU cache of recent message content for delete/edit logging
+
+discord.py's own message cache keeps full Message objects; this keeps only
+what the delete and edit logs need (IDs, a content snippet and attachment
+filenames) in __slots__ records, bounded by both entry count and an
+approximate byte budget, so far more history fits in the same memory.
+"""
+
+import sys
+from collections import OrderedDict
+
+# Approximate fixed cost of one cached record: the slotted object plus its OrderedDict slot
+_RECORD_OVERHEAD = 200
+
+
+class CachedMessage:
+    __slots__ = ("message_id", "author_id", "author_name", "author_bot", "channel_id", "guild_id", "content", "attachments", "size")
+
+    def __init__(self, message_id, author_id, author_name, author_bot, channel_id, guild_id, content, attachments):
+        self.message_id = message_id
+        self.author_id = author_id
+        self.author_name = author_name
+        self.author_bot = author_bot
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.content = content
+        self.attachments = attachments
+        self.size = self._measure()
+
+    def _measure(self):
+        size = _RECORD_OVERHEAD + sys.getsizeof(self.content) + sys.getsizeof(self.author_name)
+        return size + sum(sys.getsizeof(name) for name in self.attachments)
+
+
+class MessageCache:
+    """Message ID -> CachedMessage with count and byte budgets and LRU eviction"""
+
+    def __init__(self, max_messages=50000, max_bytes=32 * 1024 * 1024, snippet_length=1024, on_lookup=None):
+        """
+        Args:
+            max_messages: Most records kept
+            max_bytes: Approximate memory budget for all records
+            snippet_length: Characters of content kept per message
+            on_lookup: Optional callable receiving 'hit' or 'miss' for each lookup
+        """
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.snippet_length = snippet_length
+        self.on_lookup = on_lookup
+        self.records = OrderedDict()
+        self.bytes = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, message):
+        """Cache a discord.Message (or anything shaped like one)"""
+        record = CachedMessage(
+            message.id,
+            message.author.id,
+            str(message.author),
+            message.author.bot,
+            message.channel.id,
+            message.guild.id if message.guild else None,
+            (message.content or "")[:self.snippet_length],
+            tuple(attachment.filename for attachment in message.attachments)
+        )
+        self._store(record)
+        return record
+
+    def _store(self, record):
+        previous = self.records.pop(record.message_id, None)
+        if previous is not None:
+            self.bytes -= previous.size
+        self.records[record.message_id] = record
+        self.bytes += record.size
+        self._evict()
+
+    def _evict(self):
+        while self.records and (len(self.records) > self.max_messages or self.bytes > self.max_bytes):
+            _, evicted = self.records.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+
+    def _lookup(self, message_id, remove):
+        record = self.records.pop(message_id, None) if remove else self.records.get(message_id)
+        if record is not None and remove:
+            self.bytes -= record.size
+        elif record is not None:
+            self.records.move_to_end(message_id)
+        if self.on_lookup:
+            self.on_lookup("hit" if record is not None else "miss")
+        return record
+
+    def get(self, message_id):
+        return self._lookup(message_id, remove=False)
+
+    def pop(self, message_id):
+        return self._lookup(message_id, remove=True)
+
+    def discard(self, message_id):
+        """Drop a record without counting a lookup"""
+        record = self.records.pop(message_id, None)
+        if record is not None:
+            self.bytes -= record.size
+
+    def update_content(self, record, content):
+        """Store edited content for a cached record"""
+        old_size = record.size
+        record.content = (content or "")[:self.snippet_length]
+        record.size = record._measure()
+        self.bytes += record.size - old_size
+        if record.message_id in self.records:
+            self.records.move_to_end(record.message_id)
+            self._evict()
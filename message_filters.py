@@ -0,0 +1,77 @@
+"""
+Ordered on_message filter pipeline
+
+Each stage pairs a cheap synchronous check with the action taken when it
+hits. Stages run in order of declared cost, stages that need message content
+are skipped for messages without any, and the first stage that hits decides
+the message: its action runs and later stages are skipped. Per-stage check
+time and hits are reported through a callback.
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class FilterStage:
+    __slots__ = ("name", "check", "action", "cost", "needs_content", "enabled")
+
+    def __init__(self, name, check, action, cost, needs_content, enabled):
+        self.name = name
+        self.check = check
+        self.action = action
+        self.cost = cost
+        self.needs_content = needs_content
+        self.enabled = enabled
+
+
+class MessageFilterPipeline:
+    """Runs message filter stages cheapest first, stopping at the first hit"""
+
+    def __init__(self, on_stage=None):
+        """
+        Args:
+            on_stage: Optional callable receiving (stage name, check seconds, hit)
+                      for every stage that runs
+        """
+        self.on_stage = on_stage
+        self.stages = []
+
+    def add(self, name, check, action, cost=1, needs_content=False, enabled=None):
+        """
+        Add a stage
+
+        Args:
+            name: Stage name for metrics and logs
+            check: Callable taking the message and returning a truthy decision
+                   (passed on to the action) or a falsy value to let it through
+            action: Coroutine function called with (message, decision) on a hit
+            cost: Relative cost of the check; cheaper stages run first
+            needs_content: Skip the stage for messages with no text content
+            enabled: Optional callable; the stage is skipped while it returns False
+        """
+        self.stages.append(FilterStage(name, check, action, cost, needs_content, enabled))
+        self.stages.sort(key=lambda stage: stage.cost)
+
+    async def run(self, message):
+        """
+        Filter a message
+
+        Returns:
+            Name of the stage that acted on the message, or None if it passed
+        """
+        for stage in self.stages:
+            if stage.enabled is not None and not stage.enabled():
+                continue
+            if stage.needs_content and not message.content:
+                continue
+
+            start = time.perf_counter()
+            decision = stage.check(message)
+            if self.on_stage:
+                self.on_stage(stage.name, time.perf_counter() - start, bool(decision))
+            if decision:
+                await stage.action(message, decision)
+                return stage.name
+        return None
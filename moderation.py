@@ -0,0 +1,123 @@
+"""
+Moderation action executor for auto-moderation
+
+Deleting the offending message, warning the author and logging the action
+are independent, so they run concurrently instead of one after another.
+Deletions are queued per (channel, author): the first goes out straight
+away and anything from the same author that arrives while it is in flight
+is removed with one bulk delete. Warnings to the same user are collapsed to
+one message per window, so a spammer gets one warning rather than one per
+deleted message.
+"""
+
+import asyncio
+import logging
+import time
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Most messages one bulk delete request accepts
+BULK_DELETE_LIMIT = 100
+
+
+class ModerationExecutor:
+    """Runs delete/warn/log moderation actions concurrently with batching and deduplication"""
+
+    def __init__(self, send_log, warning_window=10, warning_lifetime=5, on_action=None):
+        """
+        Args:
+            send_log: Coroutine function posting an embed to the logs channel
+            warning_window: Seconds during which further warnings to a user are suppressed
+            warning_lifetime: Seconds before a warning message deletes itself
+            on_action: Optional callable receiving the action name ('delete',
+                       'bulk_delete', 'warning', 'warning_suppressed') each time one happens
+        """
+        self.send_log = send_log
+        self.warning_window = warning_window
+        self.warning_lifetime = warning_lifetime
+        self.on_action = on_action
+        self._pending_deletes = {}  # (channel_id, author_id) -> [messages]
+        self._delete_tasks = {}     # (channel_id, author_id) -> flush task
+        self._last_warned = {}      # user_id -> monotonic time of last warning
+
+    def _count(self, action):
+        if self.on_action:
+            self.on_action(action)
+
+    async def moderate(self, message, warning, embed):
+        """
+        Delete a message, warn its author and log it, concurrently
+
+        Args:
+            message: The offending message
+            warning: Warning text for the channel (the author is mentioned
+                     by the caller), or None for no warning
+            embed: Log embed for the logs channel
+        """
+        actions = [self.delete(message), self.send_log(embed)]
+        if warning:
+            actions.append(self.warn(message.channel, message.author, warning))
+        for result in await asyncio.gather(*actions, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.error(f"Error in moderation action: {result}")
+
+    async def delete(self, message):
+        """Queue a message for deletion and wait until it is gone"""
+        key = (message.channel.id, message.author.id)
+        self._pending_deletes.setdefault(key, []).append(message)
+        task = self._delete_tasks.get(key)
+        if task is None or task.done():
+            task = self._delete_tasks[key] = asyncio.create_task(self._flush_deletes(key, message.channel))
+        await asyncio.shield(task)
+
+    async def _flush_deletes(self, key, channel):
+        try:
+            while self._pending_deletes.get(key):
+                batch = self._pending_deletes[key][:BULK_DELETE_LIMIT]
+                self._pending_deletes[key] = self._pending_deletes[key][BULK_DELETE_LIMIT:]
+                await self._delete_batch(channel, batch)
+        finally:
+            self._pending_deletes.pop(key, None)
+            self._delete_tasks.pop(key, None)
+
+    async def _delete_batch(self, channel, messages):
+        try:
+            if len(messages) == 1:
+                await messages[0].delete()
+                self._count("delete")
+            else:
+                await channel.delete_messages(messages)
+                self._count("bulk_delete")
+                logger.info(f"Bulk deleted {len(messages)} messages in #{channel.name}")
+        except discord.errors.NotFound:
+            pass
+        except discord.errors.Forbidden:
+            logger.error("Bot doesn't have permission to delete messages")
+        except discord.HTTPException as e:
+            # Bulk delete refuses the whole batch if any message can't be bulk deleted
+            logger.warning(f"Bulk delete failed ({e}), deleting {len(messages)} messages individually")
+            for message in messages:
+                try:
+                    await message.delete()
+                    self._count("delete")
+                except discord.errors.NotFound:
+                    pass
+
+    async def warn(self, channel, user, text):
+        """Post an auto-deleting warning unless this user was warned within the window"""
+        now = time.monotonic()
+        last = self._last_warned.get(user.id)
+        if last is not None and now - last < self.warning_window:
+            self._count("warning_suppressed")
+            return
+        self._last_warned[user.id] = now
+        self._prune_warnings(now)
+        await channel.send(text, delete_after=self.warning_lifetime)
+        self._count("warning")
+
+    def _prune_warnings(self, now):
+        if len(self._last_warned) > 1000:
+            cutoff = now - self.warning_window
+            self._last_warned = {user_id: at for user_id, at in self._last_warned.items() if at >= cutoff}
@@ -0,0 +1,149 @@
+"""
+Persistent bot panels (pinned-style messages such as the links and verification embeds)
+
+Each panel is a named builder returning the message's content/embed/view.
+The manager remembers the panel's message ID and a hash of its content in the
+bot's state store (kept in the database, so it survives dyno restarts), so
+on startup an unchanged panel costs one fetch, a changed one is edited in
+place and only a deleted one is reposted. Panels deleted while the bot is
+running are reposted straight away.
+"""
+
+import hashlib
+import json
+import logging
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+# Embed fields left out of the hash: they can change between builds (e.g. an avatar URL
+# resolving to a fallback image) without the panel needing an edit
+VOLATILE_EMBED_FIELDS = ("thumbnail", "timestamp")
+
+
+def content_hash(content=None, embed=None, view=None):
+    """Stable hash of a message payload, ignoring volatile embed fields"""
+    embed_data = None
+    if embed:
+        embed_data = {key: value for key, value in embed.to_dict().items() if key not in VOLATILE_EMBED_FIELDS}
+    payload = {
+        "content": content,
+        "embed": embed_data,
+        "components": view.to_components() if view else None,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class Panel:
+    __slots__ = ("name", "channel_id", "build")
+
+    def __init__(self, name, channel_id, build):
+        self.name = name
+        self.channel_id = channel_id
+        self.build = build
+
+
+class PanelManager:
+    """Creates, edits and restores the bot's persistent panels"""
+
+    def __init__(self, bot, state, state_prefix="panel:"):
+        """
+        Args:
+            bot: The discord.py client
+            state: StateStore holding each panel's channel, message ID and hash
+            state_prefix: Key prefix for panel entries in the state store
+        """
+        self.bot = bot
+        self.state = state
+        self.state_prefix = state_prefix
+        self._panels = {}
+        bot.add_listener(self.on_raw_message_delete, "on_raw_message_delete")
+        bot.add_listener(self.on_raw_bulk_message_delete, "on_raw_bulk_message_delete")
+
+    def register(self, name, channel_id, build):
+        """
+        Register a panel
+
+        Args:
+            name: Unique panel name
+            channel_id: Channel the panel lives in
+            build: Coroutine function returning a dict of message kwargs
+                   (content, embed, view)
+        """
+        self._panels[name] = Panel(name, channel_id, build)
+
+    def _entry(self, name):
+        return self.state.get(self.state_prefix + name)
+
+    async def ensure(self, name):
+        """
+        Bring a panel up to date
+
+        Returns:
+            'unchanged', 'edited', 'created' or None on failure
+        """
+        panel = self._panels[name]
+        try:
+            channel = self.bot.get_channel(panel.channel_id)
+            if not channel:
+                logger.error(f"Could not find channel {panel.channel_id} for the {name} panel")
+                return None
+
+            kwargs = await panel.build()
+            new_hash = content_hash(kwargs.get("content"), kwargs.get("embed"), kwargs.get("view"))
+            entry = self._entry(name)
+
+            message = None
+            if entry and entry.get("channel_id") == channel.id:
+                try:
+                    message = await channel.fetch_message(entry["message_id"])
+                except discord.NotFound:
+                    message = None
+                if message is not None and entry.get("hash") == new_hash:
+                    return "unchanged"
+            elif entry is None:
+                message = await self._adopt_existing(channel)
+
+            if message is not None:
+                await message.edit(**kwargs)
+                result = "edited"
+            else:
+                message = await channel.send(**kwargs)
+                result = "created"
+
+            self.state.set(self.state_prefix + name, {"channel_id": channel.id, "message_id": message.id, "hash": new_hash})
+            logger.info(f"Panel {name}: {result}")
+            return result
+        except Exception as e:
+            logger.error(f"Error updating the {name} panel: {e}")
+            return None
+
+    async def ensure_all(self):
+        return {name: await self.ensure(name) for name in self._panels}
+
+    async def _adopt_existing(self, channel):
+        """First run without saved state: reuse the newest earlier bot post and remove the rest"""
+        adopted = None
+        async for message in channel.history(limit=10):
+            if message.author != self.bot.user:
+                continue
+            if adopted is None:
+                adopted = message
+            else:
+                await message.delete()
+        return adopted
+
+    async def on_raw_message_delete(self, payload):
+        await self._restore_deleted({payload.message_id})
+
+    async def on_raw_bulk_message_delete(self, payload):
+        await self._restore_deleted(payload.message_ids)
+
+    async def _restore_deleted(self, message_ids):
+        for name in self._panels:
+            entry = self._entry(name)
+            if entry and entry.get("message_id") in message_ids:
+                logger.warning(f"Panel {name} was deleted, reposting")
+                await self.ensure(name)
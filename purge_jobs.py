@@ -0,0 +1,327 @@
+"""
+Background message purge jobs
+
+A job walks a channel's history from newest to oldest (optionally bounded
+by a time range) and deletes messages matching its filters. Messages under
+14 days old go through bulk delete, 100 per request; older ones can only be
+deleted one at a time, so that path is throttled. Progress is reported
+through a callback (the command edits its ephemeral reply) for as long as
+the caller says it stays valid, the job's history cursor is saved to the
+state store so a restart resumes where it left off, and jobs can be
+cancelled. Only a limited number of jobs run per
+channel at once.
+"""
+
+import asyncio
+import logging
+import re
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Bulk delete only accepts messages younger than 14 days; keep a margin for clock skew
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+BULK_DELETE_LIMIT = 100
+
+
+def _to_timestamp(value):
+    return value.timestamp() if value else None
+
+
+def _from_timestamp(value):
+    return datetime.fromtimestamp(value, tz=timezone.utc) if value else None
+
+
+class PurgeJob:
+    """One purge: its filters, counters and history cursor"""
+
+    def __init__(self, channel_id, requested_by, limit, author_id=None, after=None, before=None,
+                 pattern=None, job_id=None):
+        self.id = job_id or uuid.uuid4().hex[:8]
+        self.channel_id = channel_id
+        self.requested_by = requested_by
+        self.limit = limit
+        self.author_id = author_id
+        self.after = after
+        self.before = before
+        self.pattern = pattern
+        self._regex = re.compile(pattern, re.IGNORECASE) if pattern else None
+        self.cursor = None  # ID of the oldest message already scanned
+        self.scanned = 0
+        self.deleted = 0
+        self.status = "queued"
+        self.error = None
+        self.cancel_requested = False
+        self.progress_expired = False
+        self.started_at = time.monotonic()
+        self.task = None
+
+    def matches(self, message):
+        if self.author_id and message.author.id != self.author_id:
+            return False
+        if self._regex and not self._regex.search(message.content or ""):
+            return False
+        return True
+
+    def describe(self):
+        filters = []
+        if self.author_id:
+            filters.append(f"author <@{self.author_id}>")
+        if self.after:
+            filters.append(f"after {self.after:%Y-%m-%d %H:%M}")
+        if self.before:
+            filters.append(f"before {self.before:%Y-%m-%d %H:%M}")
+        if self.pattern:
+            filters.append(f"matching `{self.pattern}`")
+        return ", ".join(filters) or "all messages"
+
+    def to_dict(self):
+        return {
+            "channel_id": self.channel_id,
+            "requested_by": self.requested_by,
+            "limit": self.limit,
+            "author_id": self.author_id,
+            "after": _to_timestamp(self.after),
+            "before": _to_timestamp(self.before),
+            "pattern": self.pattern,
+            "cursor": self.cursor,
+            "scanned": self.scanned,
+            "deleted": self.deleted,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, job_id, data):
+        job = cls(
+            data["channel_id"], data["requested_by"], data["limit"],
+            author_id=data.get("author_id"),
+            after=_from_timestamp(data.get("after")),
+            before=_from_timestamp(data.get("before")),
+            pattern=data.get("pattern"),
+            job_id=job_id
+        )
+        job.error = data.get("error")
+        job.cursor = data.get("cursor")
+        job.scanned = data.get("scanned", 0)
+        job.deleted = data.get("deleted", 0)
+        return job
+
+
+class PurgeJobManager:
+    """Runs, tracks, persists and cancels purge jobs"""
+
+    def __init__(self, bot, state, max_per_channel=1, single_delete_interval=1.0,
+                 progress_interval=3.0, on_finished=None, state_key="purge_jobs"):
+        """
+        Args:
+            bot: The discord.py client
+            state: StateStore where unfinished jobs are kept for resuming
+            max_per_channel: Most jobs running in one channel at a time
+            single_delete_interval: Seconds between single deletes of messages
+                                    too old for bulk delete
+            progress_interval: Minimum seconds between progress callbacks
+            on_finished: Optional coroutine function called with each job
+                         that finishes, fails or is cancelled
+            state_key: Key of the job table in the state store
+        """
+        self.bot = bot
+        self.state = state
+        self.max_per_channel = max_per_channel
+        self.single_delete_interval = single_delete_interval
+        self.progress_interval = progress_interval
+        self.on_finished = on_finished
+        self.state_key = state_key
+        self.jobs = {}
+        # IDs of messages this manager deleted one by one, so delete logging can skip them
+        self._single_deleted = deque(maxlen=1000)
+
+    def running_in(self, channel_id):
+        return [job for job in self.jobs.values() if job.channel_id == channel_id and job.status == "running"]
+
+    def start(self, job, progress=None, progress_for=None):
+        """
+        Start a job in the background
+
+        Args:
+            job: The PurgeJob
+            progress: Optional coroutine function called with the job as it advances
+            progress_for: Seconds the progress callback stays usable (an
+                          interaction token expires after 15 minutes); it is
+                          called once more with job.progress_expired set and
+                          then no longer
+
+        Raises:
+            ValueError: The channel already has max_per_channel jobs running
+        """
+        if len(self.running_in(job.channel_id)) >= self.max_per_channel:
+            raise ValueError("A purge is already running in this channel")
+        job.status = "running"
+        job.error = None
+        self.jobs[job.id] = job
+        self._save(job)
+        job.task = asyncio.create_task(self._run(job, progress, progress_for))
+        return job
+
+    def cancel(self, job_id):
+        """Cancel a running job; returns False if there is no such job"""
+        job = self.jobs.get(job_id)
+        if job is None or job.task is None or job.task.done():
+            return False
+        job.cancel_requested = True
+        job.task.cancel()
+        return True
+
+    def saved_jobs(self):
+        """Unfinished jobs recorded in the state store"""
+        return {job_id: data for job_id, data in (self.state.get(self.state_key) or {}).items()}
+
+    def resume_all(self):
+        """
+        Restart jobs interrupted by a restart (progress then goes to on_finished only)
+
+        Failed jobs are left for an explicit resume().
+        """
+        resumed = []
+        for job_id, data in self.saved_jobs().items():
+            if job_id in self.jobs or data.get("error"):
+                continue
+            job = PurgeJob.from_dict(job_id, data)
+            try:
+                self.start(job)
+                resumed.append(job)
+                logger.info(f"Resumed purge job {job.id} in channel {job.channel_id} ({job.deleted} deleted so far)")
+            except ValueError:
+                pass
+        return resumed
+
+    def resume(self, job_id, progress=None, progress_for=None):
+        """Restart a saved job that failed or was interrupted"""
+        data = self.saved_jobs().get(job_id)
+        if data is None:
+            return None
+        job = self.jobs.get(job_id)
+        if job is not None and job.status == "running":
+            raise ValueError("That purge is already running")
+        return self.start(PurgeJob.from_dict(job_id, data), progress, progress_for)
+
+    def was_single_deleted(self, message_id):
+        """Whether a message was removed by a purge's single-delete path"""
+        return message_id in self._single_deleted
+
+    def _save(self, job):
+        jobs = self.saved_jobs()
+        jobs[job.id] = job.to_dict()
+        self.state.set(self.state_key, jobs)
+
+    def _forget(self, job):
+        jobs = self.saved_jobs()
+        if jobs.pop(job.id, None) is not None:
+            self.state.set(self.state_key, jobs)
+
+    async def _run(self, job, progress, progress_for=None):
+        last_progress = time.monotonic()
+        progress_until = last_progress + progress_for if progress_for else None
+
+        async def report(force=False):
+            nonlocal last_progress, progress
+            if progress is None:
+                return
+            now = time.monotonic()
+            if not force and now - last_progress < self.progress_interval:
+                return
+            last_progress = now
+            if progress_until is not None and now >= progress_until:
+                # Last update before the callback expires
+                job.progress_expired = True
+                callback, progress = progress, None
+                try:
+                    await callback(job)
+                except Exception as e:
+                    logger.warning(f"Could not report progress of purge job {job.id}: {e}")
+                return
+            try:
+                await progress(job)
+            except Exception as e:
+                logger.warning(f"Could not report progress of purge job {job.id}: {e}")
+
+        try:
+            channel = self.bot.get_channel(job.channel_id)
+            if channel is None:
+                raise RuntimeError(f"Channel {job.channel_id} not found")
+
+            before = discord.Object(id=job.cursor) if job.cursor else job.before
+            batch = []
+            async for message in channel.history(limit=None, before=before, after=job.after, oldest_first=False):
+                if job.deleted + len(batch) >= job.limit:
+                    break
+                job.scanned += 1
+                if job.matches(message):
+                    if discord.utils.utcnow() - message.created_at < BULK_DELETE_MAX_AGE:
+                        batch.append(message)
+                        if len(batch) >= BULK_DELETE_LIMIT:
+                            await self._bulk_delete(channel, job, batch)
+                            batch = []
+                    else:
+                        # Past the bulk delete cutoff; everything from here on is older
+                        if batch:
+                            await self._bulk_delete(channel, job, batch)
+                            batch = []
+                        await self._single_delete(job, message)
+                        await asyncio.sleep(self.single_delete_interval)
+                if not batch:
+                    job.cursor = message.id
+                    if job.scanned % BULK_DELETE_LIMIT == 0:
+                        self._save(job)
+                await report()
+            if batch:
+                await self._bulk_delete(channel, job, batch)
+
+            job.status = "done"
+        except asyncio.CancelledError:
+            if not job.cancel_requested:
+                # Shutting down: leave the saved job to be resumed on the next start
+                self._save(job)
+                raise
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Purge job {job.id} failed: {e}")
+
+        if job.status == "failed":
+            self._save(job)  # Kept for /purgejobs resume
+        else:
+            self._forget(job)
+        logger.info(f"Purge job {job.id} {job.status}: {job.deleted} deleted, {job.scanned} scanned")
+        self._prune_finished()
+        await report(force=True)
+        if self.on_finished:
+            try:
+                await self.on_finished(job)
+            except Exception as e:
+                logger.error(f"Error reporting purge job {job.id}: {e}")
+
+    def _prune_finished(self, keep=20):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status != "running"]
+        for job_id in finished[:-keep]:
+            del self.jobs[job_id]
+
+    async def _bulk_delete(self, channel, job, messages):
+        await channel.delete_messages(messages)
+        job.deleted += len(messages)
+        job.cursor = messages[-1].id
+        self._save(job)
+
+    async def _single_delete(self, job, message):
+        self._single_deleted.append(message.id)
+        try:
+            await message.delete()
+            job.deleted += 1
+        except discord.NotFound:
+            pass
+        job.cursor = message.id
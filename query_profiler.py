@@ -0,0 +1,185 @@
+"""
+Query profiling wrappers for the asyncpg pool used by the Burp bot
+
+ProfiledPool wraps an asyncpg pool so that every acquire() hands out a
+ProfiledConnection. Each fetch/fetchrow/fetchval/execute call is timed and
+recorded against a normalised query fingerprint (literals and $n parameters
+replaced by ?), together with rows returned and the time spent waiting for
+the connection. Statements slower than the threshold are kept for a digest.
+"""
+
+import re
+import time
+from collections import deque
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"\$\d+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def fingerprint(query):
+    """Normalise a SQL statement so that calls differing only in values group together"""
+    normalised = _STRING_LITERAL.sub("?", query)
+    normalised = _PARAMETER.sub("?", normalised)
+    normalised = _NUMBER_LITERAL.sub("?", normalised)
+    normalised = _IN_LIST.sub("(?)", normalised)
+    return _WHITESPACE.sub(" ", normalised).strip()
+
+
+class QueryStats:
+    """Aggregated timings for one query fingerprint"""
+    __slots__ = ("fingerprint", "calls", "errors", "total_time", "max_time", "total_rows", "total_wait")
+
+    def __init__(self, query_fingerprint):
+        self.fingerprint = query_fingerprint
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.total_rows = 0
+        self.total_wait = 0.0
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.calls if self.calls else 0.0
+
+
+class QueryProfiler:
+    """Collects per-fingerprint statistics and slow statements"""
+
+    def __init__(self, slow_threshold=0.5, max_slow_entries=200):
+        """
+        Args:
+            slow_threshold: Seconds above which a statement is reported as slow
+            max_slow_entries: Slow statements buffered between digests
+        """
+        self.slow_threshold = slow_threshold
+        self.stats = {}
+        self.slow_queries = deque(maxlen=max_slow_entries)
+        self.acquire_count = 0
+        self.acquire_wait_total = 0.0
+        self.acquire_wait_max = 0.0
+        self.started_at = time.time()
+
+    def record(self, query, elapsed, rows, wait=0.0, error=False):
+        key = fingerprint(query)
+        entry = self.stats.get(key)
+        if entry is None:
+            entry = self.stats[key] = QueryStats(key)
+        entry.calls += 1
+        entry.total_time += elapsed
+        entry.total_rows += rows
+        entry.total_wait += wait
+        if elapsed > entry.max_time:
+            entry.max_time = elapsed
+        if error:
+            entry.errors += 1
+        if elapsed >= self.slow_threshold:
+            self.slow_queries.append((time.time(), key, elapsed, rows))
+
+    def record_acquire(self, wait):
+        self.acquire_count += 1
+        self.acquire_wait_total += wait
+        if wait > self.acquire_wait_max:
+            self.acquire_wait_max = wait
+
+    def drain_slow_queries(self):
+        """Return and clear the slow statements collected since the last call"""
+        drained = list(self.slow_queries)
+        self.slow_queries.clear()
+        return drained
+
+    def top(self, n=10, key="total_time"):
+        """Most expensive fingerprints, ordered by the given QueryStats attribute"""
+        return sorted(self.stats.values(), key=lambda entry: getattr(entry, key), reverse=True)[:n]
+
+
+def _row_count(method, result):
+    if method == "fetch":
+        return len(result)
+    if method in ("fetchrow", "fetchval"):
+        return 0 if result is None else 1
+    if method == "execute" and isinstance(result, str):
+        # Status tags look like "SELECT 5" / "UPDATE 3" / "INSERT 0 1"
+        tail = result.rsplit(" ", 1)[-1]
+        return int(tail) if tail.isdigit() else 0
+    return 0
+
+
+class ProfiledConnection:
+    """Delegates to an asyncpg connection, timing the query methods"""
+
+    def __init__(self, conn, profiler, wait=0.0):
+        self._conn = conn
+        self._profiler = profiler
+        # Pool wait is attributed to the first statement run on this checkout
+        self._wait = wait
+
+    async def _profiled(self, method, query, args, kwargs):
+        wait, self._wait = self._wait, 0.0
+        start = time.perf_counter()
+        try:
+            result = await getattr(self._conn, method)(query, *args, **kwargs)
+        except Exception:
+            self._profiler.record(query, time.perf_counter() - start, 0, wait, error=True)
+            raise
+        self._profiler.record(query, time.perf_counter() - start, _row_count(method, result), wait)
+        return result
+
+    async def fetch(self, query, *args, **kwargs):
+        return await self._profiled("fetch", query, args, kwargs)
+
+    async def fetchrow(self, query, *args, **kwargs):
+        return await self._profiled("fetchrow", query, args, kwargs)
+
+    async def fetchval(self, query, *args, **kwargs):
+        return await self._profiled("fetchval", query, args, kwargs)
+
+    async def execute(self, query, *args, **kwargs):
+        return await self._profiled("execute", query, args, kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class _ProfiledAcquire:
+    def __init__(self, pool, profiler, on_acquire):
+        self._pool = pool
+        self._profiler = profiler
+        self._on_acquire = on_acquire
+        self._conn = None
+
+    async def __aenter__(self):
+        start = time.perf_counter()
+        self._conn = await self._pool.acquire()
+        wait = time.perf_counter() - start
+        self._profiler.record_acquire(wait)
+        if self._on_acquire:
+            self._on_acquire(wait)
+        return ProfiledConnection(self._conn, self._profiler, wait)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._pool.release(self._conn)
+
+
+class ProfiledPool:
+    """Wraps an asyncpg pool so acquired connections are profiled"""
+
+    def __init__(self, pool, profiler, on_acquire=None):
+        """
+        Args:
+            pool: The underlying asyncpg pool
+            profiler: QueryProfiler receiving the measurements
+            on_acquire: Optional callback receiving each acquire wait in seconds
+        """
+        self._pool = pool
+        self.profiler = profiler
+        self._on_acquire = on_acquire
+
+    def acquire(self):
+        return _ProfiledAcquire(self._pool, self.profiler, self._on_acquire)
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
@@ -0,0 +1,66 @@
+"""
+Per-guild role name -> ID registry
+
+Role checks by name (discord.utils.get over guild.roles) are a linear scan on
+every call. The registry resolves each configured name once per guild and
+then answers with dict lookups (guild.get_role / member.get_role); it is
+invalidated for a guild whenever one of its roles is created, updated or
+deleted.
+"""
+
+import logging
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class RoleRegistry:
+    """Resolves configured role names to role IDs, per guild"""
+
+    def __init__(self, bot, on_lookup=None):
+        """
+        Args:
+            bot: The discord.py client (role create/update/delete events invalidate the registry)
+            on_lookup: Optional callable receiving 'hit' or 'miss' for each name resolution
+        """
+        self.bot = bot
+        self.on_lookup = on_lookup
+        self._ids = {}  # guild_id -> {role name: role ID or None}
+        bot.add_listener(self._on_role_changed, "on_guild_role_create")
+        bot.add_listener(self._on_role_changed, "on_guild_role_delete")
+        bot.add_listener(self._on_role_updated, "on_guild_role_update")
+
+    def role_id(self, guild, name):
+        """ID of the guild's role with this name, or None if there is none"""
+        names = self._ids.setdefault(guild.id, {})
+        if name in names:
+            if self.on_lookup:
+                self.on_lookup("hit")
+            return names[name]
+
+        if self.on_lookup:
+            self.on_lookup("miss")
+        role = discord.utils.get(guild.roles, name=name)
+        names[name] = role.id if role else None
+        return names[name]
+
+    def get(self, guild, name):
+        """The guild's role with this name, or None"""
+        role_id = self.role_id(guild, name)
+        return guild.get_role(role_id) if role_id else None
+
+    def has_role(self, member, name):
+        """Whether a member holds the named role"""
+        role_id = self.role_id(member.guild, name)
+        return bool(role_id) and member.get_role(role_id) is not None
+
+    def invalidate(self, guild_id):
+        self._ids.pop(guild_id, None)
+
+    async def _on_role_changed(self, role):
+        self.invalidate(role.guild.id)
+
+    async def _on_role_updated(self, before, after):
+        if before.name != after.name:
+            self.invalidate(after.guild.id)
@@ -0,0 +1,190 @@
+"""
+Low-overhead sampling CPU profiler for the Burp bot
+
+A SIGPROF interval timer fires every `interval` seconds of CPU time the
+process consumes, across all of its threads (event loop, webhook server, log
+listener). On each tick the handler reads every thread's own CPU clock and
+charges the sample to the thread that used the most CPU since the previous
+tick, recording that thread's stack (from sys._current_frames()) as a tuple
+of code objects. Idle time is not sampled, so the profile shows what is
+burning CPU and in which thread. Nothing is formatted until the profile is
+exported as collapsed stacks (flamegraph.pl, speedscope, inferno) or as a
+speedscope JSON document.
+
+Where per-thread CPU clocks are unavailable (time.pthread_getcpuclockid is
+missing, e.g. macOS) every sample is charged to the main thread, so CPU
+burned in other threads shows up under whatever the event loop was running;
+`per_thread` is False in that case.
+
+Unix only (needs signal.setitimer); must be started from the main thread.
+"""
+
+import json
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+MAX_DEPTH = 128
+
+
+def _frame_label(code):
+    filename = code.co_filename
+    # Keep the path short but unambiguous: last two components
+    parts = filename.replace("\\", "/").rsplit("/", 2)
+    short = "/".join(parts[-2:]) if len(parts) > 1 else filename
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+def _thread_cpu_time(thread_id):
+    return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+
+
+class StackSampler:
+    """Counts the stacks of whichever thread is using the CPU on SIGPROF ticks"""
+
+    per_thread = hasattr(time, "pthread_getcpuclockid")
+
+    def __init__(self, interval=0.01):
+        """
+        Args:
+            interval: Seconds of process CPU time between samples
+        """
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self.started_at = None
+        self.stopped_at = None
+        self._previous_handler = None
+        self._cpu_times = {}     # thread ident -> CPU seconds at the previous tick
+        self._thread_names = {}  # thread ident -> thread name
+
+    @staticmethod
+    def available():
+        return hasattr(signal, "setitimer") and hasattr(signal, "SIGPROF")
+
+    @property
+    def running(self):
+        return self.started_at is not None and self.stopped_at is None
+
+    def start(self):
+        if not self.available():
+            raise RuntimeError("Sampling profiler needs SIGPROF/setitimer (Unix only)")
+        if threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("Sampling profiler must be started from the main thread")
+        if self.running:
+            return
+        self.samples.clear()
+        self.sample_count = 0
+        self._cpu_times = {}
+        self._thread_names = {}
+        self.started_at = time.time()
+        self.stopped_at = None
+        self._previous_handler = signal.signal(signal.SIGPROF, self._handle)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        if not self.running:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        self.stopped_at = time.time()
+
+    def _handle(self, signum, frame):
+        main_id = threading.main_thread().ident
+        if not self.per_thread:
+            self._record(frame, self._thread_name(main_id))
+            return
+
+        # Charge the tick to the thread whose CPU clock advanced the most
+        busiest, busiest_delta = main_id, -1.0
+        frames = sys._current_frames()
+        for thread_id in frames:
+            try:
+                cpu = _thread_cpu_time(thread_id)
+            except (OSError, OverflowError):
+                continue
+            delta = cpu - self._cpu_times.get(thread_id, cpu)
+            self._cpu_times[thread_id] = cpu
+            if delta > busiest_delta:
+                busiest, busiest_delta = thread_id, delta
+        # The signal interrupted the main thread, so its live frame is the handler's argument
+        self._record(frame if busiest == main_id else frames[busiest], self._thread_name(busiest))
+
+    def _thread_name(self, thread_id):
+        name = self._thread_names.get(thread_id)
+        if name is None:
+            for thread in threading.enumerate():
+                self._thread_names[thread.ident] = thread.name
+            name = self._thread_names.setdefault(thread_id, f"thread-{thread_id}")
+        return name
+
+    def _record(self, frame, thread):
+        stack = []
+        while frame is not None and len(stack) < MAX_DEPTH:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        stack.reverse()
+        self.samples[(thread, tuple(stack))] += 1
+        self.sample_count += 1
+
+    def collapsed(self):
+        """Profile as collapsed stacks, one 'frame;frame;frame count' line per stack"""
+        lines = []
+        for (thread, stack), count in self.samples.most_common():
+            frames = [thread] + [_frame_label(code) for code in stack]
+            lines.append(f"{';'.join(frames)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name="burpbot"):
+        """Profile as a speedscope JSON document (one sampled profile per thread)"""
+        frames = []
+        frame_index = {}
+        profiles = {}
+        for (thread, stack), count in self.samples.items():
+            indices = []
+            for code in stack:
+                index = frame_index.get(code)
+                if index is None:
+                    index = frame_index[code] = len(frames)
+                    frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+                indices.append(index)
+            profile = profiles.setdefault(thread, {"samples": [], "weights": []})
+            profile["samples"].append(indices)
+            profile["weights"].append(count * self.interval)
+
+        document = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "burpbot stack_sampler",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(profile["weights"]),
+                    "samples": profile["samples"],
+                    "weights": profile["weights"],
+                }
+                for thread, profile in profiles.items()
+            ],
+        }
+        return json.dumps(document, separators=(",", ":"))
+
+    def top_functions(self, n=10):
+        """(label, self_samples) for the functions most often on top of the stack"""
+        totals = Counter()
+        for (_, stack), count in self.samples.items():
+            if stack:
+                totals[stack[-1]] += count
+        return [(_frame_label(code), count) for code, count in totals.most_common(n)]
+
+    def thread_totals(self):
+        """(thread name, samples) for each thread that was charged CPU"""
+        totals = Counter()
+        for (thread, _), count in self.samples.items():
+            totals[thread] += count
+        return totals.most_common()
@@ -0,0 +1,163 @@
+"""
+Small persistent key/value state for the Burp bot
+
+Keeps bookkeeping that should survive restarts (last synced command tree
+hash, panel message IDs, purge job cursors). Values must be
+JSON-serialisable and are read from memory. Once a database pool is attached
+the state lives in a Postgres table, so it survives Heroku dyno restarts
+(whose filesystem is wiped); until then, or without a database, it falls
+back to a JSON file.
+
+set() and delete() only update memory and mark the key dirty; the changes
+are written shortly afterwards in one batch, to the database or, for the
+file, from a worker thread, so callers on the event loop never block on a
+write.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        key TEXT PRIMARY KEY,
+        value JSONB NOT NULL,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+"""
+
+
+class StateStore:
+    """Dictionary persisted to a Postgres table or a JSON file"""
+
+    def __init__(self, path=None, table="burpbot_state", flush_delay=1.0):
+        """
+        Args:
+            path: JSON file used when no database is attached (None for memory only)
+            table: Database table holding the state once a pool is attached
+            flush_delay: Seconds to gather changes before writing them
+        """
+        self.path = path
+        self.table = table
+        self.flush_delay = flush_delay
+        self._data = {}
+        self._dirty = set()
+        self._changed = set()  # Keys set or deleted since startup
+        self._pool = None
+        self._flush_task = None
+        if path:
+            try:
+                with open(path) as f:
+                    self._data = json.load(f)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Could not read state file {path}, starting empty: {e}")
+
+    @property
+    def durable(self):
+        """Whether the state is kept in the database"""
+        return self._pool is not None
+
+    async def attach_database(self, pool):
+        """
+        Move the state to the database and load what it holds
+
+        Keys changed since startup keep their new value; for everything else
+        the database wins over the file. Keys only in memory are written to
+        the database.
+        """
+        async with pool.acquire() as conn:
+            await conn.execute(CREATE_TABLE_SQL.format(table=self.table))
+            rows = await conn.fetch(f"SELECT key, value FROM {self.table}")
+        stored = {row["key"]: json.loads(row["value"]) for row in rows}
+        self._dirty |= self._changed
+        self._dirty.update(key for key in self._data if key not in stored)
+        self._data.update({key: value for key, value in stored.items() if key not in self._changed})
+        self._pool = pool
+        logger.info(f"Loaded {len(stored)} state entries from the database")
+        if self._dirty:
+            await self.flush()
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def set(self, key, value):
+        if self._data.get(key) == value:
+            return
+        self._data[key] = value
+        self._mark_dirty(key)
+
+    def delete(self, key):
+        if self._data.pop(key, None) is not None:
+            self._mark_dirty(key)
+
+    def _mark_dirty(self, key):
+        self._changed.add(key)
+        self._dirty.add(key)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Not on an event loop (scripts): write straight away
+            if self._pool is None:
+                self._dirty.clear()
+                self._write_file(self._serialise())
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Changes made while a write is in flight go out in the next batch
+        while self._dirty:
+            await asyncio.sleep(self.flush_delay)
+            if not await self.flush():
+                break
+
+    async def flush(self):
+        """Write all pending changes now; returns False if the write failed"""
+        if not self._dirty:
+            return True
+        dirty, self._dirty = self._dirty, set()
+        try:
+            if self._pool is not None:
+                await self._write_database(dirty)
+            elif self.path:
+                await asyncio.to_thread(self._write_file, self._serialise())
+        except Exception as e:
+            logger.error(f"Could not save bot state: {e}")
+            # Keep the keys dirty so the next change retries them
+            self._dirty |= dirty
+            return False
+        return True
+
+    async def _write_database(self, keys):
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                for key in keys:
+                    if key in self._data:
+                        await conn.execute(
+                            f"""INSERT INTO {self.table} (key, value, updated_at) VALUES ($1, $2::jsonb, NOW())
+                                ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = NOW()""",
+                            key, json.dumps(self._data[key])
+                        )
+                    else:
+                        await conn.execute(f"DELETE FROM {self.table} WHERE key = $1", key)
+
+    def _serialise(self):
+        return json.dumps(self._data, indent=2, sort_keys=True)
+
+    def _write_file(self, text):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".state-", suffix=".json")
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.error(f"Could not write state file {self.path}: {e}")
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audit_index import AuditLogIndex
+
+
+class FakeGuild:
+    def __init__(self, guild_id=1):
+        self.id = guild_id
+        self.audit_log_calls = 0
+
+    async def audit_logs(self, **kwargs):
+        self.audit_log_calls += 1
+        return
+        yield
+
+
+class FakeTarget:
+    def __init__(self, target_id):
+        self.id = target_id
+
+
+class FakeEntry:
+    def __init__(self, guild, action, target_id):
+        self.guild = guild
+        self.action = action
+        self.target = FakeTarget(target_id)
+        self.created_at = datetime.now(timezone.utc)
+
+
+class AuditLogIndexTest(unittest.TestCase):
+    def test_miss_while_live_does_not_fetch(self):
+        guild = FakeGuild()
+        index = AuditLogIndex(wait=0.01, is_live=lambda guild: True)
+        entry = asyncio.run(index.lookup(guild, "kick", 42, max_age=10))
+        self.assertIsNone(entry)
+        self.assertEqual(guild.audit_log_calls, 0)
+        self.assertEqual(index.misses, 1)
+
+    def test_miss_when_not_live_fetches(self):
+        guild = FakeGuild()
+        index = AuditLogIndex(wait=0.01, is_live=lambda guild: False)
+        asyncio.run(index.lookup(guild, "kick", 42, max_age=10))
+        self.assertEqual(guild.audit_log_calls, 1)
+
+    def test_opt_in_fetch_while_live(self):
+        guild = FakeGuild()
+        index = AuditLogIndex(wait=0.01, is_live=lambda guild: True)
+        asyncio.run(index.lookup(guild, "ban", 42, fetch_on_miss=True))
+        self.assertEqual(guild.audit_log_calls, 1)
+
+    def test_entry_arriving_during_wait_is_a_hit(self):
+        guild = FakeGuild()
+        index = AuditLogIndex(wait=1.0, is_live=lambda guild: True)
+
+        async def scenario():
+            lookup = asyncio.create_task(index.lookup(guild, "kick", 42, max_age=10))
+            await asyncio.sleep(0)
+            index.add(FakeEntry(guild, "kick", 42))
+            return await lookup
+
+        entry = asyncio.run(scenario())
+        self.assertIsNotNone(entry)
+        self.assertEqual(guild.audit_log_calls, 0)
+        self.assertEqual(index.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+Lightweight span tracing for the Burp bot
+
+Spans are context managers that track the current span in a contextvar, so
+nested spans in the same task (or tasks created from it) share a trace ID and
+link to their parent. Work handed across threads (the webhook server to the
+event loop) passes the parent span explicitly.
+
+Finished spans are written as JSON lines to a rotating file through the same
+non-blocking queue as the bot's logs, and their durations are kept in bounded
+in-memory windows for quick percentile summaries.
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from collections import defaultdict, deque
+
+from log_setup import DropCountingQueueHandler
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id():
+    return os.urandom(8).hex()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "root", "start", "start_wall",
+                 "attrs", "error", "duration", "_token")
+
+    def __init__(self, tracer, name, parent, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.span_id = _new_id()
+        if parent is not None:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.root = parent.root
+        else:
+            self.trace_id = _new_id()
+            self.parent_id = None
+            self.root = self
+        self.attrs = attrs
+        self.error = None
+        self.duration = None
+        self.start = None
+        self.start_wall = None
+        self._token = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def elapsed(self):
+        """Seconds since this span started"""
+        return time.perf_counter() - self.start
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.start_wall = time.time()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self)
+        return False
+
+    def to_dict(self):
+        return {
+            "trace": self.trace_id,
+            "span": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "start": self.start_wall,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+
+class Tracer:
+    """Creates spans and records their durations"""
+
+    def __init__(self, path=None, max_bytes=10 * 1024 * 1024, backup_count=3, queue_size=10000, window=1000):
+        """
+        Args:
+            path: Trace file (JSON lines); None keeps summaries in memory only
+            max_bytes: Size at which the trace file is rotated
+            backup_count: Rotated files to keep
+            queue_size: Finished spans buffered before new ones are dropped
+            window: Recent samples kept per span name / latency for summaries
+        """
+        self.path = None
+        self.window = window
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.queue_size = queue_size
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._logger = None
+        if path:
+            self.open(path)
+
+    def open(self, path):
+        """Start writing finished spans to a trace file (once; later calls are ignored)"""
+        if self._logger is not None:
+            return
+        file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=self.max_bytes, backupCount=self.backup_count)
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        span_queue = queue.Queue(maxsize=self.queue_size)
+        self._queue_handler = DropCountingQueueHandler(span_queue)
+        self._listener = logging.handlers.QueueListener(span_queue, file_handler)
+        self._listener.start()
+        atexit.register(self._listener.stop)
+
+        self._logger = logging.getLogger("burpbot.trace")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(self._queue_handler)
+        self.path = path
+
+    def span(self, name, parent=None, **attrs):
+        """
+        Start a span (use as a context manager)
+
+        Args:
+            name: Span name
+            parent: Parent span; defaults to the current span in this context
+            **attrs: IDs and other attributes to record
+        """
+        return Span(self, name, parent if parent is not None else _current_span.get(), attrs)
+
+    @staticmethod
+    def current():
+        return _current_span.get()
+
+    def observe(self, name, seconds):
+        """Record a latency that isn't a span duration (e.g. DB insert to post)"""
+        self._samples[name].append(seconds)
+
+    def _finish(self, span):
+        self._samples[span.name].append(span.duration)
+        if self._logger is not None:
+            try:
+                self._logger.info(json.dumps(span.to_dict(), default=str, separators=(",", ":")))
+            except Exception:
+                pass
+
+    def summary(self):
+        """{name: (count, p50, p99, max)} over the recent window, in seconds"""
+        result = {}
+        for name, samples in list(self._samples.items()):
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+            pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+            result[name] = (len(ordered), pick(0.5), pick(0.99), ordered[-1])
+        return result
+
+    def traced(self, name):
+        """Decorator running an async function inside a span (set attributes via Tracer.current())"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
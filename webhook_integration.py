@@ -4,21 +4,200 @@ Add these functions to your Gas Streaks backend to automatically post to Discord
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+import aiohttp
+import asyncio
 import os
 import logging
+import queue
+import random
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# HTTP status codes worth retrying (rate limited / transient server errors)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header, or None if it is missing or not a number"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
 class DiscordWebhookIntegration:
-    def __init__(self, webhook_base_url=None):
+    def __init__(self, webhook_base_url=None, timeout=10, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, pool_maxsize=4,
+                 background=False, queue_size=1000):
         """
         Initialize Discord webhook integration
         
         Args:
             webhook_base_url: Base URL of your Discord bot's webhook endpoints
                              (e.g., "https://your-bot-app.herokuapp.com")
+            timeout: Per-request timeout in seconds
+            max_retries: Retries after the first attempt for transient failures
+            backoff_base: Base delay in seconds for exponential backoff
+            backoff_max: Upper bound in seconds for a single backoff delay
+            pool_maxsize: Keep-alive connections held open to the bot
+            background: If True, announce_* only enqueue and a sender thread
+                        delivers the payloads asynchronously
+            queue_size: Maximum number of pending payloads in background mode;
+                        new payloads are dropped (and counted) when full
         """
         self.webhook_base_url = webhook_base_url or os.environ.get('DISCORD_WEBHOOK_URL')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        
+        # Persistent session so connections to the bot are reused
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Delivery counters
+        self.stats = {
+            "sent": 0,
+            "failed": 0,
+            "retried": 0,
+            "dropped": 0,
+            "flushed": 0
+        }
+        self._stats_lock = threading.Lock()
+        
+        # Optional background sender
+        self.background = background
+        self._queue = None
+        self._sender_thread = None
+        if background:
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._sender_thread = threading.Thread(
+                target=self._sender_loop,
+                name="discord-webhook-sender",
+                daemon=True
+            )
+            self._sender_thread.start()
+    
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+    
+    def _backoff_delay(self, attempt):
+        """Full-jitter exponential backoff delay for the given retry attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def _post(self, path, payload):
+        """
+        POST a payload to the bot, retrying transient failures
+        
+        Returns:
+            True if the bot accepted the payload, False otherwise
+        """
+        url = f"{self.webhook_base_url}{path}"
+        
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+                
+                if response.status_code == 200:
+                    self._count("sent")
+                    return True
+                
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    logger.error(f"Webhook {path} rejected payload: {response.status_code}")
+                    break
+                
+                logger.warning(f"Webhook {path} returned {response.status_code} (attempt {attempt + 1})")
+                
+                # Honour Retry-After from the bot if present
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after is not None and attempt < self.max_retries:
+                    self._count("retried")
+                    time.sleep(min(retry_after, self.backoff_max))
+                    continue
+                    
+            except requests.RequestException as e:
+                logger.warning(f"Webhook {path} request error (attempt {attempt + 1}): {e}")
+            
+            if attempt < self.max_retries:
+                self._count("retried")
+                time.sleep(self._backoff_delay(attempt))
+        
+        self._count("failed")
+        return False
+    
+    def _sender_loop(self):
+        """Background thread that drains the queue"""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                path, payload, description = item
+                if self._post(path, payload):
+                    logger.info(f"Successfully announced {description} to Discord")
+                else:
+                    logger.error(f"Failed to announce {description} to Discord")
+            except Exception as e:
+                logger.error(f"Error in Discord webhook sender: {e}")
+            finally:
+                self._queue.task_done()
+    
+    def _deliver(self, path, payload, description):
+        """Send now, or enqueue for the sender thread in background mode"""
+        if not self.background:
+            if self._post(path, payload):
+                logger.info(f"Successfully announced {description} to Discord")
+                return True
+            logger.error(f"Failed to announce {description} to Discord")
+            return False
+        
+        try:
+            self._queue.put_nowait((path, payload, description))
+            return True
+        except queue.Full:
+            self._count("dropped")
+            logger.warning(f"Discord webhook queue full, dropped {description}")
+            return False
+    
+    def flush(self, timeout=None):
+        """
+        Wait for queued payloads to be delivered (background mode only)
+        
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+        
+        Returns:
+            True if the queue drained within the timeout
+        """
+        if not self.background:
+            return True
+        
+        pending = self._queue.unfinished_tasks
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        self._count("flushed", pending)
+        return True
+    
+    def close(self, timeout=5):
+        """Flush pending payloads, stop the sender thread and close the session"""
+        if self.background and self._sender_thread.is_alive():
+            self.flush(timeout)
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+            self._sender_thread.join(timeout)
+        self.session.close()
         
     def announce_winner(self, winner_address, prize_amount, streak_length, game_id):
         """
@@ -42,18 +221,7 @@ class DiscordWebhookIntegration:
                 "game_id": game_id
             }
             
-            response = requests.post(
-                f"{self.webhook_base_url}/webhook/winner",
-                json=payload,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                logger.info(f"Successfully announced winner {winner_address} to Discord")
-                return True
-            else:
-                logger.error(f"Failed to announce winner to Discord: {response.status_code}")
-                return False
+            return self._deliver("/webhook/winner", payload, f"winner {winner_address}")
                 
         except Exception as e:
             logger.error(f"Error announcing winner to Discord: {e}")
@@ -77,19 +245,229 @@ class DiscordWebhookIntegration:
                 "game_id": game_id
             }
             
-            response = requests.post(
-                f"{self.webhook_base_url}/webhook/new_pool",
-                json=payload,
-                timeout=10
-            )
+            return self._deliver("/webhook/new_pool", payload, f"new prize pool {game_id}")
+                
+        except Exception as e:
+            logger.error(f"Error announcing prize pool to Discord: {e}")
+            return False
+
+class AsyncDiscordWebhookIntegration:
+    def __init__(self, webhook_base_url=None, session=None, timeout=10, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, max_connections=8,
+                 max_concurrency=4, batch_window=0.05, max_batch_size=25):
+        """
+        Initialize asyncio Discord webhook integration
+        
+        Args:
+            webhook_base_url: Base URL of your Discord bot's webhook endpoints
+                             (e.g., "https://your-bot-app.herokuapp.com")
+            session: Optional shared aiohttp.ClientSession; one is created
+                     (and owned) on first use if not provided
+            timeout: Per-request timeout in seconds
+            max_retries: Retries after the first attempt for transient failures
+            backoff_base: Base delay in seconds for exponential backoff
+            backoff_max: Upper bound in seconds for a single backoff delay
+            max_connections: Connection pool size for an owned session
+            max_concurrency: Maximum requests in flight to the bot at once
+            batch_window: Seconds to collect events into a single request
+            max_batch_size: Events per request before a batch is sent early
+        """
+        self.webhook_base_url = webhook_base_url or os.environ.get('DISCORD_WEBHOOK_URL')
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_connections = max_connections
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        
+        self.session = session
+        self._owns_session = session is None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        
+        # path -> [(payload, future), ...] waiting for the batch window to close
+        self._pending = {}
+        self._batch_timers = {}
+        self._inflight = set()
+        self._closed = False
+        
+        self.stats = {
+            "sent": 0,
+            "failed": 0,
+            "retried": 0,
+            "batches": 0
+        }
+    
+    async def __aenter__(self):
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def start(self):
+        """Create the shared session if one was not supplied"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._owns_session = True
+    
+    def _backoff_delay(self, attempt):
+        """Full-jitter exponential backoff delay for the given retry attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    async def _post(self, path, body):
+        """POST a payload (or list of payloads) to the bot with retries"""
+        url = f"{self.webhook_base_url}{path}"
+        
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    async with self.session.post(url, json=body, timeout=self.timeout) as response:
+                        if response.status == 200:
+                            return True
+                        
+                        if response.status not in RETRYABLE_STATUS_CODES:
+                            logger.error(f"Webhook {path} rejected payload: {response.status}")
+                            return False
+                        
+                        logger.warning(f"Webhook {path} returned {response.status} (attempt {attempt + 1})")
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                
+                if retry_after is not None and attempt < self.max_retries:
+                    self.stats["retried"] += 1
+                    await asyncio.sleep(min(retry_after, self.backoff_max))
+                    continue
+                    
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Webhook {path} request error (attempt {attempt + 1}): {e}")
             
-            if response.status_code == 200:
-                logger.info(f"Successfully announced new prize pool {game_id} to Discord")
-                return True
-            else:
-                logger.error(f"Failed to announce prize pool to Discord: {response.status_code}")
+            if attempt < self.max_retries:
+                self.stats["retried"] += 1
+                await asyncio.sleep(self._backoff_delay(attempt))
+        
+        return False
+    
+    async def _send_batch(self, path):
+        """Send everything pending for a path as one request"""
+        self._batch_timers.pop(path, None)
+        batch = self._pending.pop(path, [])
+        if not batch:
+            return
+        
+        payloads = [payload for payload, _ in batch]
+        body = payloads[0] if len(payloads) == 1 else payloads
+        
+        try:
+            await self.start()
+            ok = await self._post(path, body)
+        except Exception as e:
+            logger.error(f"Error sending Discord webhook batch: {e}")
+            ok = False
+        
+        self.stats["batches"] += 1
+        self.stats["sent" if ok else "failed"] += len(batch)
+        if ok:
+            logger.info(f"Successfully announced {len(batch)} event(s) to Discord via {path}")
+        else:
+            logger.error(f"Failed to announce {len(batch)} event(s) to Discord via {path}")
+        
+        for _, future in batch:
+            if not future.done():
+                future.set_result(ok)
+    
+    async def _send_after_window(self, path):
+        await asyncio.sleep(self.batch_window)
+        await self._send_batch(path)
+    
+    def _track(self, task):
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+        return task
+    
+    async def _deliver(self, path, payload):
+        """Queue a payload into the current batch window and wait for delivery"""
+        if self._closed:
+            logger.warning("AsyncDiscordWebhookIntegration is closed, dropping payload")
+            return False
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(path, []).append((payload, future))
+        
+        if len(self._pending[path]) >= self.max_batch_size:
+            timer = self._batch_timers.pop(path, None)
+            if timer:
+                timer.cancel()
+            self._track(asyncio.create_task(self._send_batch(path)))
+        elif path not in self._batch_timers:
+            self._batch_timers[path] = self._track(asyncio.create_task(self._send_after_window(path)))
+        
+        return await asyncio.shield(future)
+    
+    async def flush(self):
+        """Send all pending batches immediately and wait for in-flight requests"""
+        for path in list(self._batch_timers):
+            self._batch_timers.pop(path).cancel()
+        for path in list(self._pending):
+            self._track(asyncio.create_task(self._send_batch(path)))
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+    
+    async def close(self):
+        """Flush pending events and close the session if we own it"""
+        self._closed = True
+        await self.flush()
+        if self._owns_session and self.session and not self.session.closed:
+            await self.session.close()
+    
+    async def announce_winner(self, winner_address, prize_amount, streak_length, game_id):
+        """
+        Announce a Gas Streaks winner to Discord
+        
+        Args:
+            winner_address: Winner's wallet address
+            prize_amount: Amount won in ADA
+            streak_length: Length of the winning streak
+            game_id: Unique game identifier
+        """
+        try:
+            if not self.webhook_base_url:
+                logger.warning("Discord webhook URL not configured")
                 return False
-                
+            
+            payload = {
+                "winner_address": winner_address,
+                "prize_amount": str(prize_amount),
+                "streak_length": str(streak_length),
+                "game_id": game_id
+            }
+            
+            return await self._deliver("/webhook/winner", payload)
+            
+        except Exception as e:
+            logger.error(f"Error announcing winner to Discord: {e}")
+            return False
+    
+    async def announce_new_prize_pool(self, total_prize, game_id):
+        """
+        Announce a new prize pool to Discord
+        
+        Args:
+            total_prize: Total prize amount in ADA
+            game_id: Unique game identifier
+        """
+        try:
+            if not self.webhook_base_url:
+                logger.warning("Discord webhook URL not configured")
+                return False
+            
+            payload = {
+                "total_prize": str(total_prize),
+                "game_id": game_id
+            }
+            
+            return await self._deliver("/webhook/new_pool", payload)
+            
         except Exception as e:
             logger.error(f"Error announcing prize pool to Discord: {e}")
             return False
@@ -103,6 +481,12 @@ from webhook_integration import DiscordWebhookIntegration
 # Initialize the integration
 discord = DiscordWebhookIntegration()
 
+# Or deliver from a background thread so announce_* never blocks a request:
+# discord = DiscordWebhookIntegration(background=True, queue_size=1000)
+# ...and on shutdown:
+# discord.close()
+# discord.stats -> {"sent": ..., "failed": ..., "retried": ..., "dropped": ..., "flushed": ...}
+
 # When someone wins:
 def handle_game_winner(winner_address, prize_amount, streak_length, game_id):
     # Your existing winner logic...
@@ -124,4 +508,12 @@ def create_new_prize_pool(total_prize, game_id):
         total_prize=total_prize,
         game_id=game_id
     )
+
+# For asyncio-based services, use the async variant instead:
+
+from webhook_integration import AsyncDiscordWebhookIntegration
+
+async def main():
+    async with AsyncDiscordWebhookIntegration() as discord:
+        await discord.announce_winner(winner_address, prize_amount, streak_length, game_id)
 """